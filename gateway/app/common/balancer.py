@@ -0,0 +1,109 @@
+"""
+업스트림 레플리카 로드밸런싱 (least-outstanding-requests + 수동 헬스 체크 기반 제외)
+
+연속 실패(연결 오류/타임아웃/502·503·504, Retry-After가 붙은 503은 제외)가 쌓인 레플리카는 일정 시간 후보에서 빠지고,
+제외 시간이 지나면 다시 트래픽을 받는다. 모든 레플리카가 제외된 경우에도 요청은 보낸다.
+"""
+import logging
+import random
+import time
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger("gateway.balancer")
+
+# 레플리카 장애로 보는 업스트림 상태 코드
+FAILURE_STATUSES = (502, 503, 504)
+
+
+def is_failure(response) -> bool:
+    """레플리카/브레이커 실패로 셀 응답인지.
+    Retry-After가 붙은 503은 서비스가 의도적으로 부하를 덜어낸 것(대기열·풀 포화)이므로 실패로 보지 않는다"""
+    status = response.status_code
+    if status == 503 and "retry-after" in response.headers:
+        return False
+    return status in FAILURE_STATUSES
+
+
+class Replica:
+    __slots__ = ("url", "outstanding", "consecutive_failures", "ejected_until", "ejections", "requests", "failures")
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.requests = 0
+        self.failures = 0
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+
+class Upstream:
+    """서비스 하나의 레플리카 집합"""
+
+    def __init__(self, name: str, urls: Iterable[str], eject_failures: int = 5, eject_seconds: float = 30.0):
+        self.name = name
+        self.replicas: List[Replica] = [Replica(u) for u in urls if u]
+        if not self.replicas:
+            raise ValueError(f"upstream '{name}' has no replica URLs")
+        self.eject_failures = eject_failures
+        self.eject_seconds = eject_seconds
+
+    def pick(self, exclude: Iterable[Replica] = ()) -> Replica:
+        """진행 중 요청이 가장 적은 정상 레플리카 (동률이면 무작위)"""
+        replicas = self.replicas
+        if len(replicas) == 1:
+            return replicas[0]
+        now = time.monotonic()
+        excluded = set(exclude)
+        candidates = [r for r in replicas if r.available(now) and r not in excluded]
+        if not candidates:
+            # 모두 제외/사용 중이면 제외 여부를 무시하고 고른다
+            candidates = [r for r in replicas if r not in excluded] or replicas
+        least = min(r.outstanding for r in candidates)
+        return random.choice([r for r in candidates if r.outstanding == least])
+
+    def acquire(self, replica: Replica):
+        replica.outstanding += 1
+        replica.requests += 1
+
+    def release(self, replica: Replica, ok: bool):
+        """요청 종료. ok=False가 연속으로 쌓이면 레플리카를 일시 제외"""
+        replica.outstanding -= 1
+        if ok:
+            replica.consecutive_failures = 0
+            return
+        replica.failures += 1
+        replica.consecutive_failures += 1
+        now = time.monotonic()
+        # 이미 제외된 레플리카에 뒤늦게 도착한 실패로 제외 시간을 다시 늘리지 않고,
+        # 마지막 남은 정상 레플리카는 제외하지 않는다
+        if (replica.consecutive_failures >= self.eject_failures and replica.available(now)
+                and sum(r.available(now) for r in self.replicas) > 1):
+            replica.ejections += 1
+            # 반복 제외될수록 제외 시간을 늘린다 (최대 10배)
+            duration = self.eject_seconds * min(replica.ejections, 10)
+            replica.ejected_until = now + duration
+            replica.consecutive_failures = 0
+            logger.warning(f"🚫 레플리카 제외: {self.name} {replica.url} ({duration:.0f}s)")
+
+    def stats(self) -> List[dict]:
+        now = time.monotonic()
+        return [
+            {
+                "url": r.url,
+                "outstanding": r.outstanding,
+                "requests": r.requests,
+                "failures": r.failures,
+                "ejected": not r.available(now),
+                "ejections": r.ejections,
+            }
+            for r in self.replicas
+        ]
+
+
+def parse_urls(value: Optional[str]) -> List[str]:
+    """콤마로 구분된 레플리카 URL 목록"""
+    return [u.strip() for u in (value or "").split(",") if u.strip()]
@@ -0,0 +1,128 @@
+"""
+배치 요청 (/api/batch) - 여러 하위 요청을 한 번의 왕복으로 처리
+
+요청 본문 예시:
+{"timeout": 3,
+ "requests": [
+   {"id": "assessment", "method": "GET", "path": "/api/assessment/summary?company_id=1"},
+   {"id": "report", "method": "POST", "path": "/api/report/preview", "body": {"year": 2024}}
+ ]}
+
+하위 요청은 원 요청의 헤더(쿠키, Authorization, Origin 등)를 이어받고 항목별 headers로 덮어쓸 수 있다.
+각 하위 요청은 일반 프록시 경로(캐시/병합/재시도/브레이커)를 그대로 탄다.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+BATCH_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE", "HEAD")
+# 원 요청에서 하위 요청으로 넘기지 않는 헤더 (본문 프레이밍은 항목별로 다시 정한다)
+DROPPED_HEADERS = (b"content-length", b"content-type", b"transfer-encoding", b"content-encoding")
+
+
+class BatchError(Exception):
+    """배치 요청 형식 오류 (400)"""
+
+
+@dataclass
+class BatchItem:
+    id: str
+    method: str
+    path: str
+    query: str = ""
+    headers: List[Tuple[bytes, bytes]] = field(default_factory=list)
+    body: bytes = b""
+
+
+def parse_batch(payload, max_items: int) -> List[BatchItem]:
+    """배치 본문 → 하위 요청 목록. 형식이 잘못되면 BatchError"""
+    if not isinstance(payload, dict) or not isinstance(payload.get("requests"), list):
+        raise BatchError("body must be an object with a 'requests' list")
+    specs = payload["requests"]
+    if not specs:
+        raise BatchError("'requests' is empty")
+    if len(specs) > max_items:
+        raise BatchError(f"too many sub-requests ({len(specs)} > {max_items})")
+
+    items, seen = [], set()
+    for index, spec in enumerate(specs):
+        if not isinstance(spec, dict) or not isinstance(spec.get("path"), str):
+            raise BatchError(f"requests[{index}] must be an object with a 'path'")
+        item_id = str(spec.get("id", index))
+        if item_id in seen:
+            raise BatchError(f"duplicate id: {item_id}")
+        seen.add(item_id)
+
+        method = str(spec.get("method", "GET")).upper()
+        if method not in BATCH_METHODS:
+            raise BatchError(f"requests[{index}]: unsupported method {method}")
+        url = urlsplit(spec["path"])
+        if url.scheme or url.netloc or not url.path.startswith("/api/"):
+            raise BatchError(f"requests[{index}]: path must start with /api/")
+
+        headers = [(str(k).lower().encode("latin-1"), str(v).encode("latin-1"))
+                   for k, v in (spec.get("headers") or {}).items()]
+        body = b""
+        if spec.get("body") is not None:
+            body = json.dumps(spec["body"]).encode()
+            if not any(k == b"content-type" for k, _ in headers):
+                headers.append((b"content-type", b"application/json"))
+        items.append(BatchItem(item_id, method, url.path, url.query, headers, body))
+    return items
+
+
+def sub_request(request: Request, item: BatchItem) -> Request:
+    """원 요청의 연결 정보와 헤더를 이어받는 하위 요청"""
+    overridden = {k for k, _ in item.headers}
+    headers = [(k, v) for k, v in request.scope["headers"]
+               if k not in DROPPED_HEADERS and k not in overridden]
+    headers += item.headers
+    if item.body:
+        headers.append((b"content-length", str(len(item.body)).encode()))
+
+    scope = dict(request.scope)
+    scope.update(
+        method=item.method,
+        path=item.path,
+        raw_path=item.path.encode(),
+        query_string=item.query.encode(),
+        headers=headers,
+        state={},
+    )
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": item.body, "more_body": False}
+
+    return Request(scope, receive)
+
+
+def item_result(item: BatchItem, response: Response, elapsed: float) -> dict:
+    """하위 응답 → 배치 결과 항목 (JSON 본문은 파싱해서, 그 외는 문자열로)"""
+    content_type = response.headers.get("content-type", "")
+    body: Optional[object] = None
+    if response.body:
+        if "json" in content_type:
+            try:
+                body = json.loads(response.body)
+            except ValueError:
+                body = response.body.decode("utf-8", errors="replace")
+        else:
+            body = response.body.decode("utf-8", errors="replace")
+    headers = {k: response.headers[k] for k in ("content-type", "etag", "cache-control", "x-cache", "retry-after")
+               if k in response.headers}
+    return {"id": item.id, "status": response.status_code, "headers": headers, "body": body,
+            "elapsed_ms": round(elapsed * 1000, 1)}
+
+
+def error_result(item: BatchItem, status: int, error: str, detail: str) -> dict:
+    return {"id": item.id, "status": status, "headers": {}, "body": {"error": error, "detail": detail},
+            "elapsed_ms": None}
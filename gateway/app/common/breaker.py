@@ -0,0 +1,150 @@
+"""
+업스트림별 서킷 브레이커와 동시 처리 상한 (load shedding)
+
+- 서킷 브레이커: 최근 N건의 실패율이 임계값을 넘으면 OPEN → 일정 시간 후 HALF_OPEN에서
+  소수의 탐색 요청만 통과시키고, 성공하면 CLOSED로 복귀한다
+- 동시 처리 상한: 업스트림별 진행 중 요청이 MAX_INFLIGHT를 넘으면 즉시 거절한다
+거절된 요청은 게이트웨이에서 503 + Retry-After로 바로 응답한다.
+"""
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from .config import settings, service_env, service_env_bool
+
+logger = logging.getLogger("gateway.breaker")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+@dataclass
+class BreakerConfig:
+    enabled: bool = True
+    window: int = 20            # 실패율 계산에 쓰는 최근 결과 수
+    min_requests: int = 10      # 이보다 적으면 OPEN으로 가지 않음
+    failure_ratio: float = 0.5
+    open_seconds: float = 10.0
+    half_open_probes: int = 2
+    max_inflight: int = 200     # 0이면 제한 없음
+
+    @classmethod
+    def for_service(cls, service: str) -> "BreakerConfig":
+        """서비스별 환경변수({SERVICE}_BREAKER_*, {SERVICE}_MAX_INFLIGHT)를 반영한 설정"""
+        return cls(
+            enabled=service_env_bool(service, "BREAKER_ENABLED", settings.BREAKER_ENABLED),
+            window=int(service_env(service, "BREAKER_WINDOW", str(settings.BREAKER_WINDOW))),
+            min_requests=int(service_env(service, "BREAKER_MIN_REQUESTS", str(settings.BREAKER_MIN_REQUESTS))),
+            failure_ratio=float(service_env(service, "BREAKER_FAILURE_RATIO", str(settings.BREAKER_FAILURE_RATIO))),
+            open_seconds=float(service_env(service, "BREAKER_OPEN_SECONDS", str(settings.BREAKER_OPEN_SECONDS))),
+            half_open_probes=int(service_env(service, "BREAKER_HALF_OPEN_PROBES", str(settings.BREAKER_HALF_OPEN_PROBES))),
+            max_inflight=int(service_env(service, "MAX_INFLIGHT", str(settings.MAX_INFLIGHT))),
+        )
+
+
+class Rejection:
+    __slots__ = ("reason", "retry_after")
+
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class Ticket:
+    """통과한 요청 하나. close()는 여러 번 불러도 한 번만 반영된다"""
+
+    __slots__ = ("guard", "ok", "probe", "closed")
+
+    def __init__(self, guard: "UpstreamGuard", probe: bool):
+        self.guard = guard
+        self.ok = True
+        self.probe = probe
+        self.closed = False
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.guard._finish(self)
+
+
+class UpstreamGuard:
+    """업스트림 하나의 브레이커 상태와 진행 중 요청 수"""
+
+    def __init__(self, name: str, config: BreakerConfig):
+        self.name = name
+        self.config = config
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.inflight = 0
+        self.probes = 0
+        self.shed_overload = 0
+        self.shed_open = 0
+        self.opens = 0
+        self._results = deque(maxlen=config.window)
+
+    def admit(self):
+        """Ticket 또는 Rejection"""
+        config = self.config
+        if config.max_inflight and self.inflight >= config.max_inflight:
+            self.shed_overload += 1
+            return Rejection("overloaded", 1.0)
+
+        probe = False
+        if config.enabled and self.state != CLOSED:
+            if self.state == OPEN:
+                remaining = self.opened_at + config.open_seconds - time.monotonic()
+                if remaining > 0:
+                    self.shed_open += 1
+                    return Rejection("circuit open", remaining)
+                self._transition(HALF_OPEN)
+            if self.probes >= config.half_open_probes:
+                self.shed_open += 1
+                return Rejection("circuit half-open", config.open_seconds)
+            self.probes += 1
+            probe = True
+
+        self.inflight += 1
+        return Ticket(self, probe)
+
+    def _finish(self, ticket: Ticket):
+        self.inflight -= 1
+        if not self.config.enabled:
+            return
+        if ticket.probe:
+            self.probes -= 1
+            if self.state == HALF_OPEN:
+                self._transition(CLOSED if ticket.ok else OPEN)
+            return
+        self._results.append(ticket.ok)
+        if self.state == CLOSED and len(self._results) >= self.config.min_requests:
+            failures = self._results.count(False)
+            if failures / len(self._results) >= self.config.failure_ratio:
+                self._transition(OPEN)
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        logger.warning(f"⚡ 서킷 브레이커 {self.name}: {self.state} -> {state}")
+        self.state = state
+        if state == OPEN:
+            self.opens += 1
+            self.opened_at = time.monotonic()
+        if state == CLOSED:
+            self._results.clear()
+
+    def stats(self) -> dict:
+        results = self._results
+        return {
+            "state": self.state,
+            "inflight": self.inflight,
+            "max_inflight": self.config.max_inflight,
+            "failure_ratio": round(results.count(False) / len(results), 3) if results else 0.0,
+            "opens": self.opens,
+            "shed_open": self.shed_open,
+            "shed_overload": self.shed_overload,
+        }
+
@@ -0,0 +1,287 @@
+"""
+GET 응답 캐시 (L1: 프로세스 내 LRU + TTL, L2: Redis 공유 캐시)
+
+- 업스트림 Cache-Control(no-store/private/no-cache/max-age/s-maxage)을 따른다
+- 만료된 항목은 ETag/Last-Modified로 조건부 재검증(304)한다
+- CORS 헤더는 저장하지 않고 응답 시점에 요청 Origin 기준으로 다시 붙인다
+"""
+import hashlib
+import json
+import logging
+import struct
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from starlette.requests import Request
+
+from .config import settings, service_env, service_env_bool
+from .redis_client import get_redis
+
+logger = logging.getLogger("gateway.cache")
+
+# 저장하는 업스트림 응답 헤더
+STORED_HEADERS = ("content-type", "cache-control", "etag", "last-modified", "vary")
+# 업스트림 Vary 중 키에 이미 반영된(또는 본문에 영향이 없는) 헤더
+KEYED_VARY = {"origin", "accept-encoding", "cookie", "authorization"}
+
+
+@dataclass
+class CachePolicy:
+    enabled: bool = False
+    ttl: float = 30.0        # Cache-Control에 수명이 없을 때 기본 TTL(초)
+    max_ttl: float = 300.0   # 업스트림 max-age 상한
+    stale_ttl: float = 300.0  # 만료 후 재검증용으로 보관하는 시간
+
+    @classmethod
+    def for_service(cls, service: str) -> "CachePolicy":
+        """서비스별 환경변수({SERVICE}_CACHE_*)를 반영한 캐시 정책"""
+        return cls(
+            enabled=service_env_bool(service, "CACHE_ENABLED", False),
+            ttl=float(service_env(service, "CACHE_TTL", str(settings.CACHE_TTL))),
+            max_ttl=float(service_env(service, "CACHE_MAX_TTL", str(settings.CACHE_MAX_TTL))),
+            stale_ttl=float(service_env(service, "CACHE_STALE_TTL", str(settings.CACHE_STALE_TTL))),
+        )
+
+
+@dataclass
+class CacheEntry:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    stored_at: float
+    expires_at: float
+    must_revalidate: bool = False
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get("etag")
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get("last-modified")
+
+    def is_fresh(self, now: float) -> bool:
+        return not self.must_revalidate and now < self.expires_at
+
+    def age(self, now: float) -> int:
+        return max(0, int(now - self.stored_at))
+
+    def to_bytes(self) -> bytes:
+        meta = asdict(self)
+        meta.pop("body")
+        raw = json.dumps(meta).encode()
+        return struct.pack("!I", len(raw)) + raw + self.body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CacheEntry":
+        (size,) = struct.unpack("!I", data[:4])
+        meta = json.loads(data[4:4 + size])
+        return cls(body=data[4 + size:], **meta)
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Cache-Control 헤더 → {지시어: 값}"""
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, arg = part.partition("=")
+        directives[name.strip().lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+def freshness(headers, policy: CachePolicy) -> Optional[Tuple[float, bool]]:
+    """업스트림 응답의 (TTL, must_revalidate). 저장하면 안 되면 None"""
+    if "set-cookie" in headers:
+        return None
+    vary = {v.strip().lower() for v in headers.get("vary", "").split(",") if v.strip()}
+    if "*" in vary or not vary <= KEYED_VARY:
+        return None
+
+    cc = parse_cache_control(headers.get("cache-control"))
+    if "no-store" in cc or "private" in cc:
+        return None
+    must_revalidate = "no-cache" in cc
+    for directive in ("s-maxage", "max-age"):
+        if cc.get(directive) and cc[directive].isdigit():
+            return min(float(cc[directive]), policy.max_ttl), must_revalidate
+    return policy.ttl, must_revalidate
+
+
+def request_fingerprint(request: Request, extra: Iterable[str] = (),
+                        headers: Iterable[str] = (), cookies: Iterable[str] = ()) -> str:
+    """method/path/정렬된 query + 지정한 헤더·쿠키 값으로 요청 키 생성"""
+    query = sorted(parse_qsl(request.url.query, keep_blank_values=True))
+    parts = [request.method, request.url.path, json.dumps(query), *extra]
+    parts += [f"h:{h}={request.headers.get(h, '')}" for h in headers]
+    parts += [f"c:{c}={request.cookies.get(c, '')}" for c in cookies]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def cache_key(request: Request, service: str) -> str:
+    """사용자별로 분리된 캐시 키 (인증 헤더와 세션 쿠키 포함)"""
+    return request_fingerprint(request, extra=(service,), headers=("authorization",), cookies=("session_token",))
+
+
+def merge_vary(value: Optional[str], name: str) -> str:
+    """Vary 헤더에 name을 중복 없이 추가"""
+    names = [v.strip() for v in (value or "").split(",") if v.strip()]
+    if name.lower() not in {n.lower() for n in names}:
+        names.append(name)
+    return ", ".join(names)
+
+
+def request_bypasses_cache(request: Request) -> bool:
+    """클라이언트가 캐시 사용을 원치 않는 경우 (강력 새로고침 등)"""
+    cc = parse_cache_control(request.headers.get("cache-control"))
+    return "no-cache" in cc or "no-store" in cc or request.headers.get("pragma") == "no-cache"
+
+
+class LRUCache:
+    """항목 수/바이트 상한이 있는 프로세스 내 LRU (이벤트 루프 단일 스레드 전제, 락 없음)"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._data: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        self.delete(key)
+        self._data[key] = entry
+        self.bytes += len(entry.body)
+        while self._data and (len(self._data) > self.max_entries or self.bytes > self.max_bytes):
+            _, evicted = self._data.popitem(last=False)
+            self.bytes -= len(evicted.body)
+
+    def delete(self, key: str):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry.body)
+
+    def clear(self):
+        self._data.clear()
+        self.bytes = 0
+
+
+class RedisCache:
+    """Redis L2 캐시. 장애 시 예외를 삼키고 캐시 미스로 처리한다.
+    client를 주지 않으면 호출할 때마다 get_redis()로 공용 클라이언트를 찾는다 (set_redis로 교체 가능)"""
+
+    def __init__(self, client=None, prefix: str = "gw:cache:"):
+        self._client = client
+        self.prefix = prefix
+        self.errors = 0
+
+    @property
+    def client(self):
+        return self._client if self._client is not None else get_redis()
+
+    @property
+    def enabled(self) -> bool:
+        return self.client is not None
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        client = self.client
+        if client is None:
+            return None
+        try:
+            data = await client.get(self.prefix + key)
+            return CacheEntry.from_bytes(data) if data else None
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"L2 캐시 조회 실패: {e}")
+            return None
+
+    async def set(self, key: str, entry: CacheEntry, ttl: float):
+        client = self.client
+        if client is None:
+            return
+        try:
+            await client.set(self.prefix + key, entry.to_bytes(), ex=max(1, int(ttl)))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"L2 캐시 저장 실패: {e}")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    l1_hits: int = 0
+    l2_hits: int = 0
+    misses: int = 0
+    revalidated: int = 0
+    not_modified: int = 0
+    stores: int = 0
+    bypass: int = 0
+
+
+class ResponseCache:
+    """L1(LRU) → L2(Redis) 순으로 조회하고 양쪽에 저장"""
+
+    def __init__(self, l1: LRUCache, l2: Optional[RedisCache] = None):
+        self.l1 = l1
+        self.l2 = l2
+        self.counters = CacheStats()
+
+    async def lookup(self, key: str) -> Tuple[Optional[CacheEntry], str]:
+        """(항목, 출처 "l1"/"l2"/"")"""
+        entry = self.l1.get(key)
+        if entry is not None:
+            return entry, "l1"
+        if self.l2 is not None:
+            entry = await self.l2.get(key)
+            if entry is not None:
+                self.l1.set(key, entry)
+                return entry, "l2"
+        return None, ""
+
+    def record_hit(self, source: str):
+        self.counters.hits += 1
+        if source == "l1":
+            self.counters.l1_hits += 1
+        elif source == "l2":
+            self.counters.l2_hits += 1
+
+    async def store(self, key: str, entry: CacheEntry, policy: CachePolicy):
+        if len(entry.body) > settings.CACHE_MAX_ENTRY_BYTES:
+            return
+        self.counters.stores += 1
+        self.l1.set(key, entry)
+        if self.l2 is not None:
+            await self.l2.set(key, entry, entry.expires_at - entry.stored_at + policy.stale_ttl)
+
+    def stats(self) -> dict:
+        c = self.counters
+        lookups = c.hits + c.misses + c.revalidated
+        return {
+            **asdict(c),
+            "hit_ratio": round((c.hits + c.revalidated) / lookups, 4) if lookups else 0.0,
+            "l1_entries": len(self.l1),
+            "l1_bytes": self.l1.bytes,
+            "l2_enabled": self.l2 is not None and self.l2.enabled,
+            "l2_errors": self.l2.errors if self.l2 is not None else 0,
+        }
+
+
+def build_entry(status: int, headers, body: bytes, ttl: float, must_revalidate: bool) -> CacheEntry:
+    now = time.time()
+    stored = {k: headers[k] for k in STORED_HEADERS if k in headers}
+    return CacheEntry(status=status, headers=stored, body=body, stored_at=now,
+                      expires_at=now + ttl, must_revalidate=must_revalidate)
+
+
+response_cache = ResponseCache(LRUCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_MAX_BYTES), RedisCache())
@@ -0,0 +1,75 @@
+"""
+동일 요청 single-flight 병합
+
+같은 키(method/path/query/지정 헤더)의 멱등 요청이 동시에 들어오면 업스트림 호출은
+한 번만 하고 결과를 모든 대기자에게 나눠준다. 업스트림 호출은 별도 태스크로 실행해서
+먼저 온 클라이언트가 끊겨도 나머지 대기자는 결과를 받는다.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Dict, Iterable, TypeVar
+
+from starlette.requests import Request
+
+from .cache import request_fingerprint
+from .config import settings
+
+logger = logging.getLogger("gateway.coalesce")
+
+T = TypeVar("T")
+
+COALESCE_METHODS = ("GET", "HEAD")
+
+
+@dataclass
+class CoalesceStats:
+    leaders: int = 0    # 실제로 업스트림에 보낸 호출 수
+    followers: int = 0  # 진행 중인 호출에 합류한 요청 수 (절약된 업스트림 호출)
+
+
+class SingleFlight:
+    def __init__(self, key_headers: Iterable[str], key_cookies: Iterable[str]):
+        self.key_headers = tuple(h.strip().lower() for h in key_headers if h.strip())
+        self.key_cookies = tuple(c.strip() for c in key_cookies if c.strip())
+        self.counters = CoalesceStats()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def key(self, request: Request, service: str) -> str:
+        # 조건부 요청 헤더가 다르면 응답(200/304)이 달라지므로 항상 키에 포함
+        headers = self.key_headers + ("if-none-match", "if-modified-since")
+        return request_fingerprint(request, extra=(service,), headers=headers, cookies=self.key_cookies)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """진행 중인 동일 호출이 있으면 그 결과를, 없으면 fn()을 실행해 공유"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.counters.followers += 1
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        self.counters.leaders += 1
+        task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Future):
+        self._inflight.pop(key, None)
+        # 대기자가 모두 끊긴 경우에도 예외가 "never retrieved"로 남지 않도록 소비
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        c = self.counters
+        total = c.leaders + c.followers
+        return {
+            **asdict(c),
+            "inflight": len(self._inflight),
+            "coalesced_ratio": round(c.followers / total, 4) if total else 0.0,
+        }
+
+
+single_flight = SingleFlight(
+    settings.COALESCE_KEY_HEADERS.split(","),
+    settings.COALESCE_KEY_COOKIES.split(","),
+)
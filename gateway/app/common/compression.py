@@ -0,0 +1,156 @@
+"""
+응답 압축 (gzip / brotli)
+
+- Accept-Encoding의 q 값으로 인코딩을 고르고, 같으면 br → gzip 순으로 선호한다
+- 압축 대상 Content-Type이고 크기가 min_size 이상인 응답만 압축한다
+  (스트리밍 응답은 Content-Length가 없으면 크기를 모르므로 압축한다)
+- 스트리밍 응답은 청크마다 flush해서 SSE 등도 지연 없이 전달한다
+- 업스트림이 이미 클라이언트가 받을 수 있는 인코딩으로 보냈으면 다시 압축하지 않고 그대로 전달한다
+brotli 패키지가 없으면 gzip만 사용한다.
+"""
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from .config import settings, service_env, service_env_bool
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli는 선택 의존성
+    brotli = None
+
+# 선호 순서 (q 값이 같을 때)
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+# 업스트림에 요청하는 인코딩 = httpx가 풀 수 있는 인코딩
+UPSTREAM_ACCEPT_ENCODING = ", ".join(ENCODINGS)
+
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/javascript", "application/xml",
+    "application/x-ndjson", "image/svg+xml",
+)
+# 압축하지 않는 상태 코드 (본문 없음)
+NO_BODY_STATUSES = (204, 304)
+
+
+@dataclass
+class CompressionPolicy:
+    enabled: bool = True
+    min_size: int = 1024       # 이보다 작은 응답은 압축하지 않음(바이트)
+    gzip_level: int = 6
+    brotli_quality: int = 4    # 실시간 응답용 (11은 너무 느림)
+
+    @classmethod
+    def for_service(cls, service: str) -> "CompressionPolicy":
+        """서비스별 환경변수({SERVICE}_COMPRESSION_*)를 반영한 압축 정책"""
+        return cls(
+            enabled=service_env_bool(service, "COMPRESSION_ENABLED", settings.COMPRESSION_ENABLED),
+            min_size=int(service_env(service, "COMPRESSION_MIN_SIZE", str(settings.COMPRESSION_MIN_SIZE))),
+            gzip_level=int(service_env(service, "COMPRESSION_GZIP_LEVEL", str(settings.COMPRESSION_GZIP_LEVEL))),
+            brotli_quality=int(service_env(service, "COMPRESSION_BROTLI_QUALITY", str(settings.COMPRESSION_BROTLI_QUALITY))),
+        )
+
+
+def parse_accept_encoding(value: Optional[str]) -> Dict[str, float]:
+    """Accept-Encoding → {인코딩: q}"""
+    result: Dict[str, float] = {}
+    for part in (value or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, arg = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(arg)
+                except ValueError:
+                    q = 0.0
+        result[name] = q
+    return result
+
+
+def accepts(accept_encoding: Optional[str], encoding: str) -> bool:
+    """클라이언트가 encoding을 받을 수 있는지"""
+    accepted = parse_accept_encoding(accept_encoding)
+    return accepted.get(encoding.lower(), accepted.get("*", 0.0)) > 0
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """사용할 인코딩. 받을 수 있는 것이 없으면 None"""
+    accepted = parse_accept_encoding(accept_encoding)
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compressible(headers, status: int) -> bool:
+    """압축 대상 응답인지 (이미 인코딩된 응답, no-transform, 본문 없는 응답 제외)"""
+    if status < 200 or status in NO_BODY_STATUSES:
+        return False
+    if headers.get("content-encoding", "identity").lower() != "identity":
+        return False
+    if "no-transform" in headers.get("cache-control", "").lower():
+        return False
+    content_type = headers.get("content-type", "").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or "+json" in content_type or "+xml" in content_type
+
+
+def weak_etag(etag: Optional[str]) -> Optional[str]:
+    """압축된 표현은 바이트가 달라지므로 강한 ETag를 약한 ETag로 바꾼다"""
+    if etag and not etag.startswith("W/"):
+        return "W/" + etag
+    return etag
+
+
+class Encoder:
+    """스트리밍 인코더. 입력/출력 바이트와 CPU 시간을 누적한다"""
+
+    def __init__(self, encoding: str, policy: CompressionPolicy):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=policy.brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(policy.gzip_level, zlib.DEFLATED, 31)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def compress(self, chunk: bytes, flush: bool = True) -> bytes:
+        """청크 압축. flush=True면 지금까지의 입력을 바로 내보낸다"""
+        started = time.thread_time()
+        c = self._compressor
+        if self.encoding == "br":
+            out = c.process(chunk)
+            if flush:
+                out += c.flush()
+        else:
+            out = c.compress(chunk)
+            if flush:
+                out += c.flush(zlib.Z_SYNC_FLUSH)
+        self.cpu_seconds += time.thread_time() - started
+        self.bytes_in += len(chunk)
+        self.bytes_out += len(out)
+        return out
+
+    def finish(self) -> bytes:
+        started = time.thread_time()
+        c = self._compressor
+        out = c.finish() if self.encoding == "br" else c.flush(zlib.Z_FINISH)
+        self.cpu_seconds += time.thread_time() - started
+        self.bytes_out += len(out)
+        return out
+
+    def ratio(self) -> Optional[float]:
+        """압축 후/압축 전 크기 (입력이 없으면 None)"""
+        return self.bytes_out / self.bytes_in if self.bytes_in else None
+
+
+def compress_body(body: bytes, encoding: str, policy: CompressionPolicy) -> Tuple[bytes, Encoder]:
+    """버퍼링된 본문 전체를 압축. (압축 본문, 통계가 담긴 인코더)"""
+    encoder = Encoder(encoding, policy)
+    return encoder.compress(body, flush=False) + encoder.finish(), encoder
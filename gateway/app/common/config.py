@@ -0,0 +1,124 @@
+import os
+
+
+def env_bool(key: str, default: bool) -> bool:
+    """환경변수를 bool로 해석 (true/1/yes/on)"""
+    value = os.getenv(key)
+    if value is None:
+        return default
+    return value.strip().lower() in ("true", "1", "yes", "on")
+
+
+def service_env(service: str, key: str, default: str) -> str:
+    """서비스별 환경변수 조회: ACCOUNT_POOL_MAX_CONNECTIONS → POOL_MAX_CONNECTIONS → 기본값"""
+    prefix = service.upper().replace("-", "_")
+    return os.getenv(f"{prefix}_{key}", os.getenv(key, default))
+
+
+def service_env_bool(service: str, key: str, default: bool) -> bool:
+    """service_env의 bool 버전"""
+    return service_env(service, key, str(default)).strip().lower() in ("true", "1", "yes", "on")
+
+
+class Settings:
+    SERVICE_NAME = "gateway"
+    PORT = int(os.getenv("PORT", "8080"))
+    UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "20"))
+
+    # ---- 업스트림 커넥션 풀 (서비스별로 {SERVICE}_POOL_* 로 덮어쓰기) ----
+    POOL_MAX_CONNECTIONS = int(os.getenv("POOL_MAX_CONNECTIONS", "100"))
+    POOL_MAX_KEEPALIVE = int(os.getenv("POOL_MAX_KEEPALIVE", "20"))
+    POOL_KEEPALIVE_EXPIRY = float(os.getenv("POOL_KEEPALIVE_EXPIRY", "30"))
+    POOL_HTTP2 = env_bool("POOL_HTTP2", True)
+
+    # ---- 스트리밍 프록시 (서비스별로 {SERVICE}_PROXY_STREAMING, {SERVICE}_MAX_BODY_SIZE) ----
+    PROXY_STREAMING = env_bool("PROXY_STREAMING", True)
+    MAX_BODY_SIZE = int(os.getenv("MAX_BODY_SIZE", str(50 * 1024 * 1024)))  # 0이면 제한 없음
+
+    # ---- 라우트 테이블 / 레플리카 제외 (서비스별로 {SERVICE}_EJECT_* 로 덮어쓰기) ----
+    ROUTES_FILE = os.getenv("ROUTES_FILE", "")
+    EJECT_FAILURES = int(os.getenv("EJECT_FAILURES", "5"))
+    EJECT_SECONDS = float(os.getenv("EJECT_SECONDS", "30"))
+
+    # ---- 적응형 타임아웃 / 재시도 / 헤지 (서비스별로 {SERVICE}_RETRY_MAX 등으로 덮어쓰기) ----
+    ADAPTIVE_TIMEOUT = env_bool("ADAPTIVE_TIMEOUT", True)
+    TIMEOUT_MULTIPLIER = float(os.getenv("TIMEOUT_MULTIPLIER", "3"))
+    TIMEOUT_MIN = float(os.getenv("TIMEOUT_MIN", "1"))
+    RETRY_MAX = int(os.getenv("RETRY_MAX", "2"))
+    RETRY_BACKOFF_BASE = float(os.getenv("RETRY_BACKOFF_BASE", "0.05"))
+    RETRY_BACKOFF_MAX = float(os.getenv("RETRY_BACKOFF_MAX", "1"))
+    RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+    HEDGE_ENABLED = env_bool("HEDGE_ENABLED", False)
+    HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+
+    # ---- 서킷 브레이커 / 동시 처리 상한 (서비스별로 {SERVICE}_BREAKER_*, {SERVICE}_MAX_INFLIGHT) ----
+    BREAKER_ENABLED = env_bool("BREAKER_ENABLED", True)
+    BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+    BREAKER_MIN_REQUESTS = int(os.getenv("BREAKER_MIN_REQUESTS", "10"))
+    BREAKER_FAILURE_RATIO = float(os.getenv("BREAKER_FAILURE_RATIO", "0.5"))
+    BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "10"))
+    BREAKER_HALF_OPEN_PROBES = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "2"))
+    MAX_INFLIGHT = int(os.getenv("MAX_INFLIGHT", "200"))  # 0이면 제한 없음
+
+    # ---- GET 응답 캐시 (서비스별로 {SERVICE}_CACHE_ENABLED 등으로 opt-in) ----
+    CACHE_TTL = float(os.getenv("CACHE_TTL", "30"))
+    CACHE_MAX_TTL = float(os.getenv("CACHE_MAX_TTL", "300"))
+    CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "300"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    CACHE_MAX_ENTRY_BYTES = int(os.getenv("CACHE_MAX_ENTRY_BYTES", str(1024 * 1024)))
+
+    # ---- 동일 요청 병합 (서비스별로 {SERVICE}_COALESCE_ENABLED 로 opt-in) ----
+    COALESCE_ENABLED = env_bool("COALESCE_ENABLED", False)
+    COALESCE_KEY_HEADERS = os.getenv("COALESCE_KEY_HEADERS", "authorization,accept")
+    COALESCE_KEY_COOKIES = os.getenv("COALESCE_KEY_COOKIES", "session_token")
+
+    # ---- SSE / WebSocket 패스스루 (서비스별로 {SERVICE}_STREAM_IDLE_TIMEOUT, {SERVICE}_WEBSOCKET_ENABLED) ----
+    STREAM_IDLE_TIMEOUT = float(os.getenv("STREAM_IDLE_TIMEOUT", "300"))  # 이 시간 동안 데이터가 없으면 종료(초)
+    WEBSOCKET_PING_INTERVAL = float(os.getenv("WEBSOCKET_PING_INTERVAL", "20"))  # 0이면 ping 안 함
+    WEBSOCKET_MAX_MESSAGE = int(os.getenv("WEBSOCKET_MAX_MESSAGE", str(1024 * 1024)))
+
+    # ---- 배치 요청 (/api/batch) ----
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "20"))
+    BATCH_TIMEOUT = float(os.getenv("BATCH_TIMEOUT", "10"))  # 전체 마감 시간 상한(초)
+
+    # ---- 응답 압축 (서비스별로 {SERVICE}_COMPRESSION_* 로 덮어쓰기) ----
+    COMPRESSION_ENABLED = env_bool("COMPRESSION_ENABLED", True)
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+    # ---- 엣지 세션 검증 (서비스별로 {SERVICE}_AUTH_REQUIRED) ----
+    AUTH_MODE = os.getenv("AUTH_MODE", "off")  # off | signed | redis
+    AUTH_REQUIRED = env_bool("AUTH_REQUIRED", False)  # True면 세션 없는 요청을 게이트웨이에서 401
+    AUTH_PUBLIC_PATHS = os.getenv("AUTH_PUBLIC_PATHS", "/api/account/login,/api/account/signup,/api/account/logout")
+    SESSION_COOKIE = os.getenv("SESSION_COOKIE", "session_token")
+    SESSION_SECRET = os.getenv("SESSION_SECRET", "")
+    SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", str(24 * 3600)))
+    SESSION_IDLE_TTL = int(os.getenv("SESSION_IDLE_TTL", "0"))  # redis 모드: 조회 시 키 TTL 연장(초), 0이면 연장 안 함
+    SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "30"))
+    SESSION_CACHE_MAX = int(os.getenv("SESSION_CACHE_MAX", "10000"))
+    SESSION_REDIS_PREFIX = os.getenv("SESSION_REDIS_PREFIX", "session:")
+    SESSION_REVOKE_CHANNEL = os.getenv("SESSION_REVOKE_CHANNEL", "session:revoked")
+
+    # ---- 요청 수 제한 / 토큰 버킷 (서비스별로 {SERVICE}_RATE_LIMIT_* 로 덮어쓰기, rate 0이면 해당 기준 끔) ----
+    RATE_LIMIT_ENABLED = env_bool("RATE_LIMIT_ENABLED", True)
+    RATE_LIMIT_IP_RATE = float(os.getenv("RATE_LIMIT_IP_RATE", "20"))  # 초당 요청 수
+    RATE_LIMIT_IP_BURST = float(os.getenv("RATE_LIMIT_IP_BURST", "40"))
+    RATE_LIMIT_USER_RATE = float(os.getenv("RATE_LIMIT_USER_RATE", "10"))
+    RATE_LIMIT_USER_BURST = float(os.getenv("RATE_LIMIT_USER_BURST", "30"))
+    RATE_LIMIT_COMPANY_RATE = float(os.getenv("RATE_LIMIT_COMPANY_RATE", "50"))
+    RATE_LIMIT_COMPANY_BURST = float(os.getenv("RATE_LIMIT_COMPANY_BURST", "100"))
+    RATE_LIMIT_PROXY_HOPS = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "0"))  # 앞단 프록시 수 (X-Forwarded-For 신뢰 범위)
+    # 앞단 프록시 없이 클라이언트가 직접 붙을 때만 True (소켓 주소를 클라이언트 IP로 사용)
+    RATE_LIMIT_TRUST_PEER = env_bool("RATE_LIMIT_TRUST_PEER", False)
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    RATE_LIMIT_REDIS_SYNC = env_bool("RATE_LIMIT_REDIS_SYNC", False)  # 게이트웨이 레플리카 간 사용량 공유
+    RATE_LIMIT_SYNC_INTERVAL = float(os.getenv("RATE_LIMIT_SYNC_INTERVAL", "1"))
+
+    # ---- Redis (공유 캐시 등) ----
+    REDIS_URL = os.getenv("REDIS_URL", "")
+    REDIS_TIMEOUT = float(os.getenv("REDIS_TIMEOUT", "0.2"))
+
+
+settings = Settings()
@@ -0,0 +1,136 @@
+"""
+Prometheus 텍스트 포맷 메트릭
+
+기록 경로는 이벤트 루프 단일 스레드에서만 호출되므로 락 없이 리스트 카운터만 올리고,
+라벨은 기존 문자열의 튜플로 받는다. 문자열 포맷팅은 /metrics 스크레이프 시에만 한다.
+풀/브레이커 같은 게이지는 스크레이프 시점에 collector 콜백으로 읽어온다.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# 상태 코드 → 클래스 라벨 (핫패스에서 포맷팅하지 않도록 미리 만든 표)
+STATUS_CLASSES = ("0xx", "1xx", "2xx", "3xx", "4xx", "5xx")
+ERROR_CLASS = "error"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+OVERHEAD_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+RATIO_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+CPU_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def status_class(status: int) -> str:
+    index = status // 100
+    return STATUS_CLASSES[index] if 0 <= index < len(STATUS_CLASSES) else ERROR_CLASS
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # 라벨 튜플 → [버킷별 개수(누적 아님)..., +Inf 개수, 합계]
+        self._series: Dict[Tuple, List[float]] = {}
+
+    def observe(self, labels: Tuple, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="%s"' % bound
+                yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}"
+            cumulative += series[len(self.buckets)]
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {_number(series[-1])}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}"
+
+
+# collector: 스크레이프 시 (이름, 타입, 설명, [(라벨 이름, 라벨 값, 값), ...]) 목록을 반환
+Sample = Tuple[Sequence[str], Sequence, float]
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.histograms: List[Histogram] = []
+        self.collectors: List[Collector] = []
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]) -> Histogram:
+        h = Histogram(name, help_text, label_names, buckets)
+        self.histograms.append(h)
+        return h
+
+    def register_collector(self, collector: Collector):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for h in self.histograms:
+            lines.extend(h.render())
+        for collector in self.collectors:
+            for name, kind, help_text, samples in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for label_names, label_values, value in samples:
+                    lines.append(f"{name}{_labels(label_names, label_values)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+upstream_latency = registry.histogram(
+    "gateway_upstream_latency_seconds",
+    "Upstream response time per attempt (to headers when streaming).",
+    ("route", "upstream", "status_class"),
+    LATENCY_BUCKETS,
+)
+gateway_overhead = registry.histogram(
+    "gateway_overhead_seconds",
+    "Time spent in the gateway excluding upstream waits.",
+    ("route", "status_class"),
+    OVERHEAD_BUCKETS,
+)
+response_size = registry.histogram(
+    "gateway_response_size_bytes",
+    "Response body size sent to clients.",
+    ("route", "status_class"),
+    SIZE_BUCKETS,
+)
+compression_ratio = registry.histogram(
+    "gateway_compression_ratio",
+    "Compressed size divided by original size per response.",
+    ("route", "encoding"),
+    RATIO_BUCKETS,
+)
+compression_cpu = registry.histogram(
+    "gateway_compression_cpu_seconds",
+    "CPU time spent compressing one response.",
+    ("route", "encoding"),
+    CPU_BUCKETS,
+)
@@ -0,0 +1,238 @@
+"""
+토큰 버킷 기반 요청 수 제한 (admission control)
+
+라우트별로 클라이언트 IP / 사용자 / 회사(company_id) 단위 버킷을 두고, 요청 1건에 토큰 1개를 쓴다.
+- rate: 초당 채워지는 토큰 수, burst: 버킷 크기 (순간 허용량). rate가 0이면 해당 기준은 제한하지 않음
+- 사용자/회사 기준은 엣지 세션 검증(AUTH_MODE)으로 확인된 사용자에게만 적용된다
+- IP 기준은 클라이언트 IP를 알 수 있을 때만 적용된다: RATE_LIMIT_PROXY_HOPS(앞단 프록시 수, Railway 인그레스면 1)
+  또는 프록시 없이 직접 받는 경우 RATE_LIMIT_TRUST_PEER. 둘 다 없으면 소켓 주소가 프록시 주소라서
+  모든 사용자가 버킷 하나를 나눠 쓰게 되므로 IP 기준을 끈다 (시작 시 경고)
+- 적용되는 버킷 중 하나라도 비어 있으면 어느 버킷에서도 토큰을 쓰지 않고 거절한다 (429 + Retry-After)
+
+버킷은 프로세스 메모리(LRU, RATE_LIMIT_MAX_KEYS개)에 둔다.
+RATE_LIMIT_REDIS_SYNC를 켜면 RATE_LIMIT_SYNC_INTERVAL마다 각 게이트웨이 레플리카가 로컬 사용량을
+Redis 카운터(INCRBYFLOAT)에 더하고, 그 사이 다른 레플리카가 쓴 양만큼 로컬 버킷에서 뺀다.
+핫패스에는 네트워크 왕복이 없고, 레플리카 간 오차는 동기화 주기 동안의 사용량으로 제한된다.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from starlette.requests import HTTPConnection
+
+from .breaker import Rejection
+from .config import settings, service_env, service_env_bool
+from .redis_client import get_redis
+
+logger = logging.getLogger("gateway.ratelimit")
+
+DIMENSIONS = ("ip", "user", "company")
+# Redis 동기화 카운터 보관 시간(초). 만료 후 다시 생기면 이전 합계와 비교하지 않는다
+SYNC_KEY_TTL = 300
+# 이 시간 안에 조회된 버킷만 동기화한다 (로컬에서 잠시 쉬는 동안에도 다른 레플리카 사용량을 반영)
+SYNC_ACTIVE_SECONDS = 60
+
+
+@dataclass
+class RateLimitPolicy:
+    enabled: bool = True
+    ip_rate: float = 20.0        # 초당 토큰 (0이면 제한 없음)
+    ip_burst: float = 40.0
+    user_rate: float = 10.0
+    user_burst: float = 30.0
+    company_rate: float = 50.0
+    company_burst: float = 100.0
+
+    @classmethod
+    def for_service(cls, service: str) -> "RateLimitPolicy":
+        """서비스별 환경변수({SERVICE}_RATE_LIMIT_*)를 반영한 정책"""
+        return cls(
+            enabled=service_env_bool(service, "RATE_LIMIT_ENABLED", settings.RATE_LIMIT_ENABLED),
+            ip_rate=float(service_env(service, "RATE_LIMIT_IP_RATE", str(settings.RATE_LIMIT_IP_RATE))),
+            ip_burst=float(service_env(service, "RATE_LIMIT_IP_BURST", str(settings.RATE_LIMIT_IP_BURST))),
+            user_rate=float(service_env(service, "RATE_LIMIT_USER_RATE", str(settings.RATE_LIMIT_USER_RATE))),
+            user_burst=float(service_env(service, "RATE_LIMIT_USER_BURST", str(settings.RATE_LIMIT_USER_BURST))),
+            company_rate=float(service_env(service, "RATE_LIMIT_COMPANY_RATE", str(settings.RATE_LIMIT_COMPANY_RATE))),
+            company_burst=float(service_env(service, "RATE_LIMIT_COMPANY_BURST", str(settings.RATE_LIMIT_COMPANY_BURST))),
+        )
+
+    def limit(self, dimension: str) -> Tuple[float, float]:
+        """(rate, burst). burst가 rate보다 작으면 rate를 버킷 크기로 쓴다"""
+        rate = getattr(self, f"{dimension}_rate")
+        return rate, max(getattr(self, f"{dimension}_burst"), rate, 1.0)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated", "pending", "synced_total")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+        self.pending = 0.0        # 마지막 동기화 이후 이 레플리카가 쓴 토큰
+        self.synced_total = 0.0   # 마지막 동기화 때 본 Redis 합계
+
+    def refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self) -> float:
+        """토큰 1개가 찰 때까지 남은 시간(초)"""
+        return max(0.0, (1.0 - self.tokens) / self.rate)
+
+
+def client_ip(conn: HTTPConnection) -> Optional[str]:
+    """클라이언트 IP. 앞단 프록시 수(RATE_LIMIT_PROXY_HOPS)만큼 X-Forwarded-For를 오른쪽부터 신뢰한다.
+    프록시 수를 모르고 RATE_LIMIT_TRUST_PEER도 아니면 None (IP 기준 제한 안 함)"""
+    hops = settings.RATE_LIMIT_PROXY_HOPS
+    if hops > 0:
+        forwarded = [ip.strip() for ip in conn.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if forwarded:
+            return forwarded[-min(hops, len(forwarded))]
+    elif not settings.RATE_LIMIT_TRUST_PEER:
+        return None
+    return conn.client.host if conn.client else None
+
+
+class RateLimiter:
+    """라우트×기준×값 → 토큰 버킷 (이벤트 루프 단일 스레드 전제, 락 없음)"""
+
+    def __init__(self, max_keys: int = 100000, redis_sync: bool = False, sync_interval: float = 1.0,
+                 prefix: str = "gw:rl:"):
+        self.max_keys = max_keys
+        self.redis_sync = redis_sync
+        self.sync_interval = sync_interval
+        self.prefix = prefix
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        # 동기화 대상 버킷 키 → 마지막 조회 시각
+        self._active: Dict[str, float] = {}
+        self._syncer: Optional[asyncio.Task] = None
+        self.allowed = 0
+        # (라우트, 기준) → 거절 수
+        self.rejected: Dict[Tuple[str, str], int] = {}
+        self.sync_errors = 0
+
+    def check(self, route: str, policy: RateLimitPolicy, conn: HTTPConnection,
+              user_id: Optional[str] = None, company_id: Optional[str] = None) -> Optional[Rejection]:
+        """통과하면 None(토큰 소비), 한도를 넘으면 Rejection"""
+        if not policy.enabled:
+            return None
+        values = {"ip": client_ip(conn), "user": user_id, "company": company_id}
+        now = time.monotonic()
+        buckets: List[TokenBucket] = []
+        denied, retry_after = None, 0.0
+        for dimension in DIMENSIONS:
+            rate, burst = policy.limit(dimension)
+            if rate <= 0 or not values[dimension]:
+                continue
+            bucket = self._bucket(f"{route}:{dimension}:{values[dimension]}", rate, burst, now)
+            bucket.refill(now)
+            if bucket.tokens < 1.0 and bucket.wait_time() > retry_after:
+                denied, retry_after = dimension, bucket.wait_time()
+            buckets.append(bucket)
+
+        if denied is not None:
+            key = (route, denied)
+            self.rejected[key] = self.rejected.get(key, 0) + 1
+            return Rejection(f"{denied} rate limit exceeded", retry_after)
+        for bucket in buckets:
+            bucket.tokens -= 1.0
+            bucket.pending += 1.0
+        self.allowed += 1
+        return None
+
+    def _bucket(self, key: str, rate: float, burst: float, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.rate != rate or bucket.burst != burst:
+            bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            # 오래 안 쓰인 버킷은 가득 찬 상태와 같으므로 버려도 된다
+            evicted, _ = self._buckets.popitem(last=False)
+            self._active.pop(evicted, None)
+        if self.redis_sync:
+            self._active[key] = now
+        return bucket
+
+    async def start(self):
+        """Redis 동기화 시작 (Redis가 없으면 레플리카별 로컬 한도로 동작)"""
+        if settings.RATE_LIMIT_ENABLED and settings.RATE_LIMIT_IP_RATE > 0 \
+                and settings.RATE_LIMIT_PROXY_HOPS <= 0 and not settings.RATE_LIMIT_TRUST_PEER:
+            logger.warning("⚠️ RATE_LIMIT_PROXY_HOPS가 설정되지 않아 IP 기준 요청 제한을 끕니다 "
+                           "(프록시 뒤라면 프록시 수, 직접 받는다면 RATE_LIMIT_TRUST_PEER=true)")
+        if self.redis_sync and get_redis() is not None and self._syncer is None:
+            self._syncer = asyncio.ensure_future(self._sync_loop())
+
+    async def stop(self):
+        if self._syncer is not None:
+            self._syncer.cancel()
+            await asyncio.gather(self._syncer, return_exceptions=True)
+            self._syncer = None
+
+    async def _sync_loop(self):
+        logger.info(f"🪣 요청 제한 Redis 동기화 시작 ({self.sync_interval:.1f}s 주기)")
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.sync_errors += 1
+                logger.warning(f"요청 제한 동기화 실패: {e}")
+
+    async def sync(self):
+        """로컬 사용량을 Redis에 더하고, 다른 레플리카가 쓴 만큼 로컬 버킷에서 뺀다"""
+        client = get_redis()
+        if client is None or not self._active:
+            return
+        horizon = time.monotonic() - SYNC_ACTIVE_SECONDS
+        items = []
+        pipe = client.pipeline(transaction=False)
+        for key, touched in list(self._active.items()):
+            bucket = self._buckets.get(key)
+            if bucket is None or touched < horizon:
+                del self._active[key]
+                continue
+            delta, bucket.pending = bucket.pending, 0.0
+            items.append((bucket, delta))
+            pipe.incrbyfloat(self.prefix + key, delta)
+            pipe.expire(self.prefix + key, SYNC_KEY_TTL)
+        if not items:
+            return
+        results = await pipe.execute()
+        now = time.monotonic()
+        for (bucket, delta), total in zip(items, results[::2]):
+            total = float(total)
+            remote = total - bucket.synced_total - delta
+            # 처음 보는 카운터(합계 0)나 만료 후 다시 생긴 카운터(음수)는 과거 사용량을 반영하지 않는다
+            if bucket.synced_total and remote > 0:
+                # 먼저 지금까지 채워질 양을 반영해야 빼낸 토큰이 burst 상한에 묻히지 않는다
+                bucket.refill(now)
+                bucket.tokens = max(-bucket.burst, bucket.tokens - remote)
+            bucket.synced_total = total
+
+    def stats(self) -> dict:
+        rejected: Dict[str, Dict[str, int]] = {}
+        for (route, dimension), count in self.rejected.items():
+            rejected.setdefault(route, {})[dimension] = count
+        return {
+            "allowed": self.allowed,
+            "rejected": rejected,
+            "buckets": len(self._buckets),
+            "ip_limit": settings.RATE_LIMIT_PROXY_HOPS > 0 or settings.RATE_LIMIT_TRUST_PEER,
+            "redis_sync": self._syncer is not None,
+            "sync_errors": self.sync_errors,
+        }
+
+
+rate_limiter = RateLimiter(
+    settings.RATE_LIMIT_MAX_KEYS,
+    settings.RATE_LIMIT_REDIS_SYNC,
+    settings.RATE_LIMIT_SYNC_INTERVAL,
+)
@@ -0,0 +1,141 @@
+"""
+라우트별 적응형 타임아웃 / 재시도 / 헤지 요청 설정과 상태
+
+- 타임아웃: 최근 응답 헤더 도착 시간 p99 × 배수 (하한 TIMEOUT_MIN, 상한은 라우트 타임아웃 예산).
+  본문이 있는 요청(업로드)에는 적용하지 않고 남은 예산을 모두 쓴다
+- 재시도: 멱등 메서드만, 지터가 들어간 지수 백오프, 다른 레플리카로 전송
+- 헤지: 멱등 GET이 지연 백분위를 넘기면 두 번째 레플리카에 한 번 더 보낸다
+- 재시도·헤지는 retry budget(요청 대비 비율) 안에서만 허용해 장애 중인 업스트림에 부하를 키우지 않는다
+- 들어온 요청 하나에는 라우트 타임아웃 예산만큼의 마감 시각이 하나 있고, 재시도·헤지는 남은 시간만 쓴다
+  (업스트림 마감 헤더도 남은 시간). 남은 시간이 TIMEOUT_MIN보다 적으면 더 재시도하지 않는다
+"""
+import random
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .config import settings, service_env, service_env_bool
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+# 업스트림에 전달하는 남은 응답 예산(밀리초). 서비스의 DeadlineMiddleware가 읽는다
+DEADLINE_HEADER = "x-request-timeout-ms"
+
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 2
+    backoff_base: float = 0.05
+    backoff_max: float = 1.0
+    budget_ratio: float = 0.2      # 요청 1건당 적립되는 재시도/헤지 토큰
+    hedge: bool = False
+    hedge_percentile: float = 95.0
+    adaptive_timeout: bool = True
+    timeout_multiplier: float = 3.0
+    timeout_min: float = 1.0
+
+    @classmethod
+    def for_service(cls, service: str) -> "RetryPolicy":
+        """서비스별 환경변수({SERVICE}_RETRY_* 등)를 반영한 정책"""
+        return cls(
+            max_retries=int(service_env(service, "RETRY_MAX", str(settings.RETRY_MAX))),
+            backoff_base=float(service_env(service, "RETRY_BACKOFF_BASE", str(settings.RETRY_BACKOFF_BASE))),
+            backoff_max=float(service_env(service, "RETRY_BACKOFF_MAX", str(settings.RETRY_BACKOFF_MAX))),
+            budget_ratio=float(service_env(service, "RETRY_BUDGET_RATIO", str(settings.RETRY_BUDGET_RATIO))),
+            hedge=service_env_bool(service, "HEDGE_ENABLED", settings.HEDGE_ENABLED),
+            hedge_percentile=float(service_env(service, "HEDGE_PERCENTILE", str(settings.HEDGE_PERCENTILE))),
+            adaptive_timeout=service_env_bool(service, "ADAPTIVE_TIMEOUT", settings.ADAPTIVE_TIMEOUT),
+            timeout_multiplier=float(service_env(service, "TIMEOUT_MULTIPLIER", str(settings.TIMEOUT_MULTIPLIER))),
+            timeout_min=float(service_env(service, "TIMEOUT_MIN", str(settings.TIMEOUT_MIN))),
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """attempt번째 재시도 전 대기 시간 (full jitter)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+
+class LatencyTracker:
+    """최근 N개 지연 샘플의 링 버퍼. 백분위는 조회 시 계산하고 잠시 캐시한다"""
+
+    def __init__(self, size: int = 512, min_samples: int = 50, refresh: float = 1.0):
+        self._samples: List[float] = []
+        self._size = size
+        self._index = 0
+        self._min_samples = min_samples
+        self._refresh = refresh
+        self._sorted: List[float] = []
+        self._sorted_at = 0.0
+
+    def record(self, seconds: float):
+        if len(self._samples) < self._size:
+            self._samples.append(seconds)
+        else:
+            self._samples[self._index] = seconds
+            self._index = (self._index + 1) % self._size
+
+    def percentile(self, p: float) -> Optional[float]:
+        """샘플이 부족하면 None"""
+        if len(self._samples) < self._min_samples:
+            return None
+        now = time.monotonic()
+        if now - self._sorted_at > self._refresh:
+            self._sorted = sorted(self._samples)
+            self._sorted_at = now
+        data = self._sorted
+        return data[min(len(data) - 1, int(len(data) * p / 100))]
+
+
+class RetryBudget:
+    """요청마다 ratio만큼 토큰을 적립하고 재시도/헤지 1회에 1개씩 소비"""
+
+    def __init__(self, ratio: float, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.retries = 0
+        self.hedges = 0
+        self.exhausted = 0
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        self.exhausted += 1
+        return False
+
+
+class RouteResilience:
+    """라우트 하나의 지연 통계와 재시도 예산"""
+
+    def __init__(self, policy: RetryPolicy, budget_timeout: float):
+        self.policy = policy
+        self.budget_timeout = budget_timeout
+        self.latency = LatencyTracker()
+        self.budget = RetryBudget(policy.budget_ratio)
+
+    def timeout(self) -> float:
+        """이번 요청의 업스트림 응답 대기 한도"""
+        if not self.policy.adaptive_timeout:
+            return self.budget_timeout
+        p99 = self.latency.percentile(99)
+        if p99 is None:
+            return self.budget_timeout
+        return min(self.budget_timeout, max(self.policy.timeout_min, p99 * self.policy.timeout_multiplier))
+
+    def hedge_delay(self) -> Optional[float]:
+        """헤지 요청을 보낼 시점 (샘플 부족 시 None → 헤지 안 함)"""
+        return self.latency.percentile(self.policy.hedge_percentile)
+
+    def stats(self) -> dict:
+        p50, p99 = self.latency.percentile(50), self.latency.percentile(99)
+        return {
+            "timeout": round(self.timeout(), 3),
+            "p50": round(p50, 4) if p50 is not None else None,
+            "p99": round(p99, 4) if p99 is not None else None,
+            "retries": self.budget.retries,
+            "hedges": self.budget.hedges,
+            "budget_tokens": round(self.budget.tokens, 2),
+            "budget_exhausted": self.budget.exhausted,
+        }
@@ -0,0 +1,312 @@
+"""
+엣지 세션 검증
+
+session_token 쿠키(또는 Authorization: Bearer)를 게이트웨이에서 검증하고,
+업스트림에는 신뢰 헤더(X-User-Id, X-Company-Id)로 사용자 정보를 전달한다.
+클라이언트가 보낸 같은 이름의 헤더는 항상 제거한다.
+
+AUTH_MODE
+- off    : 검증하지 않음 (신뢰 헤더 제거만)
+- signed : HMAC-SHA256 서명 토큰을 로컬에서 검증 (네트워크 없음)
+           토큰 = base64url(payload JSON) + "." + base64url(HMAC(SESSION_SECRET, payload 부분))
+           payload = {"sid": 세션 ID, "uid": 사용자 ID, "cid": 회사 ID, "exp": 만료 epoch}
+- redis  : 불투명 토큰으로 Redis의 {SESSION_REDIS_PREFIX}{token} (JSON: user_id, company_id) 조회
+           SESSION_IDLE_TTL을 주면 캐시 미스로 조회할 때마다 키 TTL을 그만큼 늘린다 (expires_at은 넘기지 않음)
+
+두 모드 모두 검증 결과를 짧은 TTL의 프로세스 내 캐시에 두어 핫패스에서 네트워크 왕복이 없다.
+폐기(로그아웃)는 SESSION_REVOKE_CHANNEL로 세션 ID를 publish하면 즉시 로컬 캐시에 반영되고,
+signed 모드는 캐시 미스 시 {SESSION_REDIS_PREFIX}revoked:{sid} 키도 확인한다.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+from starlette.requests import HTTPConnection
+
+from .config import settings
+from .redis_client import get_redis
+
+logger = logging.getLogger("gateway.session")
+
+USER_HEADER = "x-user-id"
+COMPANY_HEADER = "x-company-id"
+# 클라이언트가 직접 보내면 안 되는 신뢰 헤더
+TRUSTED_HEADERS = (USER_HEADER, COMPANY_HEADER)
+
+MODES = ("off", "signed", "redis")
+
+
+class SessionStoreUnavailable(Exception):
+    """Redis 세션 저장소 조회 실패 (토큰이 유효한지 알 수 없음)"""
+
+
+@dataclass
+class Identity:
+    session_id: str
+    user_id: str
+    company_id: Optional[str]
+    expires_at: Optional[float] = None
+
+    def headers(self) -> Dict[str, str]:
+        headers = {USER_HEADER: self.user_id}
+        if self.company_id:
+            headers[COMPANY_HEADER] = self.company_id
+        return headers
+
+
+@dataclass
+class SessionStats:
+    valid: int = 0
+    invalid: int = 0
+    missing: int = 0
+    revoked: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    store_errors: int = 0
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _b64encode(value: bytes) -> str:
+    return base64.urlsafe_b64encode(value).rstrip(b"=").decode()
+
+
+def sign_token(payload: dict, secret: str) -> str:
+    """signed 모드 토큰 발급 (발급 측과 형식을 맞추기 위한 참조 구현)"""
+    body = _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+    signature = hmac.new(secret.encode(), body.encode(), hashlib.sha256).digest()
+    return f"{body}.{_b64encode(signature)}"
+
+
+def verify_token(token: str, secret: str, now: float) -> Optional[Identity]:
+    """서명/만료를 확인한 Identity. 형식이 틀리거나 서명이 다르거나 만료됐으면 None"""
+    body, _, signature = token.partition(".")
+    if not body or not signature:
+        return None
+    expected = hmac.new(secret.encode(), body.encode(), hashlib.sha256).digest()
+    try:
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            return None
+        payload = json.loads(_b64decode(body))
+    except ValueError:
+        return None
+    if not isinstance(payload, dict) or not payload.get("uid") or not payload.get("sid"):
+        return None
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)) and expires_at <= now:
+        return None
+    return Identity(str(payload["sid"]), str(payload["uid"]),
+                    str(payload["cid"]) if payload.get("cid") else None, expires_at)
+
+
+def extract_token(conn: HTTPConnection) -> Optional[str]:
+    """쿠키 우선, 없으면 Authorization: Bearer"""
+    token = conn.cookies.get(settings.SESSION_COOKIE)
+    if token:
+        return token
+    scheme, _, value = conn.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and value.strip():
+        return value.strip()
+    return None
+
+
+class SessionValidator:
+    """토큰 → Identity. 결과(무효 포함)를 TTL 캐시에 보관한다 (이벤트 루프 단일 스레드 전제, 락 없음)"""
+
+    def __init__(self, mode: str, secret: str = "", cache_ttl: float = 30.0, cache_max: int = 10000):
+        if mode not in MODES:
+            raise ValueError(f"unknown AUTH_MODE: {mode}")
+        if mode == "signed" and not secret:
+            logger.error("AUTH_MODE=signed 이지만 SESSION_SECRET이 비어 있어 세션 검증을 끕니다.")
+            mode = "off"
+        self.mode = mode
+        self.secret = secret
+        self.cache_ttl = cache_ttl
+        self.cache_max = cache_max
+        self.counters = SessionStats()
+        # 토큰 → (캐시 만료 시각, Identity 또는 None)
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        # 폐기된 세션 ID → 기록 만료 시각 (캐시 TTL과 무관하게 즉시 거절, 기록 순서 = 만료 순서)
+        self._revoked: "OrderedDict[str, float]" = OrderedDict()
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    async def authenticate(self, conn: HTTPConnection) -> Optional[Identity]:
+        """유효한 세션이면 Identity, 토큰이 없거나 무효면 None.
+        redis 모드에서 저장소를 조회할 수 없으면 SessionStoreUnavailable"""
+        if not self.enabled:
+            return None
+        token = extract_token(conn)
+        if not token:
+            self.counters.missing += 1
+            return None
+
+        now = time.time()
+        cached = self._cache.get(token)
+        if cached is not None and cached[0] > now:
+            self.counters.cache_hits += 1
+            self._cache.move_to_end(token)
+            identity = cached[1]
+        else:
+            self.counters.cache_misses += 1
+            identity = await self._load(token, now)
+            self._remember(token, identity, now)
+
+        if identity is None:
+            self.counters.invalid += 1
+            return None
+        if self._is_revoked(identity.session_id, now) or (identity.expires_at and identity.expires_at <= now):
+            self.counters.revoked += 1
+            return None
+        self.counters.valid += 1
+        return identity
+
+    async def _load(self, token: str, now: float) -> Optional[Identity]:
+        if self.mode == "signed":
+            identity = verify_token(token, self.secret, now)
+            if identity is not None and await self._revoked_in_store(identity.session_id):
+                self._mark_revoked(identity.session_id, now)
+            return identity
+        return await self._lookup(token)
+
+    async def _lookup(self, token: str) -> Optional[Identity]:
+        client = get_redis()
+        if client is None:
+            raise SessionStoreUnavailable("REDIS_URL is not configured")
+        try:
+            raw = await client.get(settings.SESSION_REDIS_PREFIX + token)
+        except Exception as e:
+            self.counters.store_errors += 1
+            raise SessionStoreUnavailable(str(e)) from e
+        if not raw:
+            return None
+        try:
+            data = json.loads(raw)
+            identity = Identity(token, str(data["user_id"]), data.get("company_id"), data.get("expires_at"))
+        except (ValueError, KeyError, TypeError):
+            logger.warning("세션 저장소 값 형식 오류")
+            return None
+        if settings.SESSION_IDLE_TTL > 0:
+            await self._extend(client, identity)
+        return identity
+
+    async def _extend(self, client, identity: Identity):
+        """유휴 만료 연장 (캐시 미스 때만 호출되므로 토큰당 SESSION_CACHE_TTL에 한 번). 실패해도 통과"""
+        ttl = settings.SESSION_IDLE_TTL
+        if identity.expires_at:
+            ttl = min(ttl, int(identity.expires_at - time.time()))
+        if ttl <= 0:
+            return
+        try:
+            await client.expire(settings.SESSION_REDIS_PREFIX + identity.session_id, ttl)
+        except Exception as e:
+            self.counters.store_errors += 1
+            logger.warning(f"세션 만료 연장 실패: {e}")
+
+    async def _revoked_in_store(self, session_id: str) -> bool:
+        """signed 모드: 재시작 전에 폐기된 세션 확인 (Redis 장애 시 통과)"""
+        client = get_redis()
+        if client is None:
+            return False
+        try:
+            return bool(await client.exists(f"{settings.SESSION_REDIS_PREFIX}revoked:{session_id}"))
+        except Exception as e:
+            self.counters.store_errors += 1
+            logger.warning(f"세션 폐기 목록 조회 실패: {e}")
+            return False
+
+    def _remember(self, token: str, identity: Optional[Identity], now: float):
+        expires = now + self.cache_ttl
+        if identity is not None and identity.expires_at:
+            expires = min(expires, identity.expires_at)
+        self._cache[token] = (expires, identity)
+        self._cache.move_to_end(token)
+        while len(self._cache) > self.cache_max:
+            self._cache.popitem(last=False)
+
+    def _is_revoked(self, session_id: str, now: float) -> bool:
+        expires = self._revoked.get(session_id)
+        if expires is None:
+            return False
+        if expires <= now:
+            # 서명 토큰 최대 수명이 지난 기록은 의미가 없으므로 읽을 때 지운다
+            del self._revoked[session_id]
+            return False
+        return True
+
+    def _mark_revoked(self, session_id: str, now: float):
+        self._revoked[session_id] = now + settings.SESSION_MAX_AGE
+        self._revoked.move_to_end(session_id)
+        # 만료 시각 순으로 쌓이므로 앞쪽의 만료된 기록만 정리하면 된다
+        while self._revoked:
+            oldest, expires = next(iter(self._revoked.items()))
+            if expires > now:
+                break
+            del self._revoked[oldest]
+
+    def revoke(self, session_id: str):
+        """세션 폐기를 로컬에 반영 (redis 모드에서는 세션 ID가 곧 토큰)"""
+        self._mark_revoked(session_id, time.time())
+        self._cache.pop(session_id, None)
+
+    async def start(self):
+        """폐기 채널 구독 시작 (Redis가 없으면 캐시 TTL이 지나야 반영됨)"""
+        if self.enabled and get_redis() is not None and self._listener is None:
+            self._listener = asyncio.ensure_future(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _listen(self):
+        channel = settings.SESSION_REVOKE_CHANNEL
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.subscribe(channel)
+                logger.info(f"🔑 세션 폐기 채널 구독: {channel}")
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None and message["type"] == "message":
+                        data = message["data"]
+                        self.revoke(data.decode() if isinstance(data, bytes) else str(data))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"세션 폐기 채널 오류, 재구독 대기: {e}")
+                await asyncio.sleep(5)
+            finally:
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            **asdict(self.counters),
+            "cached": len(self._cache),
+            "revoked_sessions": len(self._revoked),
+        }
+
+
+session_validator = SessionValidator(
+    settings.AUTH_MODE,
+    settings.SESSION_SECRET,
+    settings.SESSION_CACHE_TTL,
+    settings.SESSION_CACHE_MAX,
+)
@@ -0,0 +1,109 @@
+"""
+스트리밍 프록시 유틸리티
+
+요청 본문은 청크 단위로 업스트림에 흘려보내고, 업스트림 응답은 받은 청크를
+그대로 StreamingResponse로 전달한다. 본문 크기 제한도 버퍼링 없이 적용한다.
+"""
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Optional
+
+import httpx
+from starlette.requests import Request
+
+from .compression import Encoder
+
+logger = logging.getLogger("gateway.streaming")
+
+EVENT_STREAM = "text/event-stream"
+
+
+class BodyTooLarge(Exception):
+    """요청 본문이 MAX_BODY_SIZE를 초과"""
+
+    def __init__(self, limit: int):
+        super().__init__(f"request body exceeds {limit} bytes")
+        self.limit = limit
+
+
+def has_body(request: Request) -> bool:
+    """본문이 있는 요청인지 (GET 등에 chunked 전송이 붙지 않도록)"""
+    headers = request.headers
+    if "transfer-encoding" in headers:
+        return True
+    return headers.get("content-length", "0") not in ("", "0")
+
+
+def wants_event_stream(request: Request) -> bool:
+    """클라이언트가 SSE를 요청했는지 (EventSource는 Accept: text/event-stream을 보낸다)"""
+    return EVENT_STREAM in request.headers.get("accept", "")
+
+
+def is_event_stream(headers) -> bool:
+    return headers.get("content-type", "").startswith(EVENT_STREAM)
+
+
+def check_declared_length(request: Request, limit: int):
+    """Content-Length가 선언되어 있으면 본문을 읽기 전에 바로 거절"""
+    declared = request.headers.get("content-length")
+    if limit and declared and declared.isdigit() and int(declared) > limit:
+        raise BodyTooLarge(limit)
+
+
+async def iter_request_body(request: Request, limit: int) -> AsyncIterator[bytes]:
+    """요청 본문을 청크 단위로 전달하면서 누적 크기를 검사"""
+    total = 0
+    async for chunk in request.stream():
+        if not chunk:
+            continue
+        total += len(chunk)
+        if limit and total > limit:
+            raise BodyTooLarge(limit)
+        yield chunk
+
+
+async def read_request_body(request: Request, limit: int) -> bytes:
+    """버퍼링 모드용: 크기 제한을 적용하며 본문 전체를 읽는다"""
+    return b"".join([chunk async for chunk in iter_request_body(request, limit)])
+
+
+async def relay_response(upstream: httpx.Response, on_close: Optional[Callable[[], None]] = None,
+                         on_size: Optional[Callable[[int], None]] = None,
+                         encoder: Optional[Encoder] = None, raw: bool = False,
+                         idle_timeout: Optional[float] = None) -> AsyncIterator[bytes]:
+    """업스트림 응답 청크를 즉시 전달하고, 끝나거나 클라이언트가 끊으면 연결을 반납
+
+    raw=True면 업스트림 Content-Encoding을 풀지 않고 그대로, encoder가 있으면 청크마다 압축해서 보낸다.
+    idle_timeout 동안 다음 청크가 없으면 SSE는 정상 종료(클라이언트가 재연결)하고,
+    그 외 응답은 잘린 본문이 완결된 것처럼 보이지 않도록 예외로 끊는다.
+    """
+    sent = 0
+    event_stream = is_event_stream(upstream.headers)
+    try:
+        chunks = (upstream.aiter_raw() if raw else upstream.aiter_bytes()).__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), idle_timeout)
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                if event_stream:
+                    logger.info(f"⌛ SSE 유휴 종료({idle_timeout:.0f}s): {upstream.request.url}")
+                    break
+                raise httpx.ReadTimeout(f"no data from upstream for {idle_timeout:.0f}s", request=upstream.request)
+            if encoder is not None:
+                chunk = encoder.compress(chunk)
+                if not chunk:
+                    continue
+            sent += len(chunk)
+            yield chunk
+        if encoder is not None:
+            tail = encoder.finish()
+            sent += len(tail)
+            yield tail
+    finally:
+        await upstream.aclose()
+        if on_close is not None:
+            on_close()
+        if on_size is not None:
+            on_size(sent)
@@ -0,0 +1,164 @@
+"""
+업스트림 서비스별 공유 HTTP 클라이언트 풀
+
+요청마다 AsyncClient를 새로 만들면 매번 TCP/TLS 핸드셰이크가 발생하므로,
+서비스당 하나의 클라이언트를 기동 시 만들고 종료 시 닫는다.
+"""
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+import httpx
+
+from .config import settings, service_env, service_env_bool
+
+logger = logging.getLogger("gateway.upstream")
+
+# HTTP/2는 h2 패키지가 있을 때만 사용 (TLS ALPN으로 협상, 평문 http://는 HTTP/1.1 유지)
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass
+class PoolConfig:
+    max_connections: int
+    max_keepalive: int
+    keepalive_expiry: float
+    http2: bool
+
+    @classmethod
+    def for_service(cls, service: str) -> "PoolConfig":
+        """서비스별 환경변수({SERVICE}_POOL_*)를 반영한 풀 설정"""
+        return cls(
+            max_connections=int(service_env(service, "POOL_MAX_CONNECTIONS", str(settings.POOL_MAX_CONNECTIONS))),
+            max_keepalive=int(service_env(service, "POOL_MAX_KEEPALIVE", str(settings.POOL_MAX_KEEPALIVE))),
+            keepalive_expiry=float(service_env(service, "POOL_KEEPALIVE_EXPIRY", str(settings.POOL_KEEPALIVE_EXPIRY))),
+            http2=service_env_bool(service, "POOL_HTTP2", settings.POOL_HTTP2) and HTTP2_AVAILABLE,
+        )
+
+
+class PoolStats:
+    """커넥션 획득 대기 시간 누적 (요청 헤더 전송 직전까지의 시간, 신규 연결 시 connect 포함)"""
+
+    __slots__ = ("acquired", "wait_total", "wait_max")
+
+    def __init__(self):
+        self.acquired = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, wait: float):
+        self.acquired += 1
+        self.wait_total += wait
+        if wait > self.wait_max:
+            self.wait_max = wait
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """httpcore trace 이벤트로 커넥션 획득 대기 시간을 측정하는 트랜스포트"""
+
+    def __init__(self, stats: PoolStats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        stats = self.stats
+        outer_trace = request.extensions.get("trace")
+        acquired = False
+
+        async def trace(event_name: str, info: dict):
+            nonlocal acquired
+            if not acquired and event_name.endswith("send_request_headers.started"):
+                acquired = True
+                stats.record(time.perf_counter() - started)
+            if outer_trace is not None:
+                await outer_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        return await super().handle_async_request(request)
+
+    def connection_counts(self) -> Dict[str, int]:
+        """현재 풀의 활성/유휴 커넥션 수"""
+        # httpx는 풀 상태를 공개하지 않으므로 httpcore 풀을 직접 조회
+        pool = getattr(self, "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for c in connections if c.is_idle())
+        return {"active": len(connections) - idle, "idle": idle}
+
+
+class UpstreamClients:
+    """서비스 이름 → 공유 AsyncClient 레지스트리"""
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, InstrumentedTransport] = {}
+        self._configs: Dict[str, PoolConfig] = {}
+
+    def register(self, service: str, config: Optional[PoolConfig] = None) -> httpx.AsyncClient:
+        """서비스용 클라이언트 생성 (이미 있으면 그대로 반환)"""
+        if service in self._clients:
+            return self._clients[service]
+        config = config or PoolConfig.for_service(service)
+        transport = InstrumentedTransport(
+            PoolStats(),
+            http2=config.http2,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+        )
+        client = httpx.AsyncClient(
+            transport=transport,
+            timeout=settings.UPSTREAM_TIMEOUT,
+            follow_redirects=True,
+        )
+        self._clients[service] = client
+        self._transports[service] = transport
+        self._configs[service] = config
+        logger.info(f"🔌 업스트림 풀 생성: {service} {asdict(config)}")
+        return client
+
+    def get(self, service: str) -> httpx.AsyncClient:
+        client = self._clients.get(service)
+        if client is None:
+            # 기동 전에 호출된 경우(테스트 등)에도 동작하도록 지연 생성
+            client = self.register(service)
+        return client
+
+    async def close(self):
+        for service, client in self._clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"업스트림 풀 종료 실패: {service} {e}")
+        self._clients.clear()
+        self._transports.clear()
+        self._configs.clear()
+
+    def pool_stats(self, service: str) -> PoolStats:
+        return self._transports[service].stats
+
+    def stats(self) -> Dict[str, dict]:
+        """서비스별 풀 설정 및 커넥션/획득 대기 통계"""
+        result = {}
+        for service, transport in self._transports.items():
+            s = transport.stats
+            result[service] = {
+                "config": asdict(self._configs[service]),
+                "connections": transport.connection_counts(),
+                "acquire": {
+                    "count": s.acquired,
+                    "wait_avg_ms": round(s.wait_total / s.acquired * 1000, 3) if s.acquired else 0.0,
+                    "wait_max_ms": round(s.wait_max * 1000, 3),
+                },
+            }
+        return result
+
+
+upstream_clients = UpstreamClients()
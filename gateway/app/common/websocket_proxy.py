@@ -0,0 +1,131 @@
+"""
+WebSocket 프록시
+
+클라이언트 ↔ 업스트림 메시지를 양방향으로 그대로 중계한다.
+- 한쪽이 닫히면 다른 쪽도 같은 close code로 닫는다 (클라이언트 연결 종료가 업스트림까지 전달됨)
+- 양방향 모두 idle_timeout 동안 메시지가 없으면 두 연결을 모두 닫는다
+"""
+import asyncio
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+import websockets
+from starlette.websockets import WebSocket, WebSocketState
+
+from .config import settings
+
+logger = logging.getLogger("gateway.websocket")
+
+# 업스트림 핸드셰이크에서 websockets가 다시 만드는 헤더
+HANDSHAKE_HEADERS = {
+    "host", "upgrade", "connection", "sec-websocket-key", "sec-websocket-version",
+    "sec-websocket-extensions", "sec-websocket-protocol", "content-length", "transfer-encoding",
+}
+# 보낼 수 없는(예약된) close code는 1001(going away)로 바꿔 전달
+RESERVED_CLOSE_CODES = (1005, 1006, 1015)
+IDLE_CLOSE_CODE = 1001
+
+
+def upstream_ws_url(base_url: str, rest: str, query: str) -> str:
+    """http(s) 레플리카 URL → ws(s) URL"""
+    url = "ws" + base_url[len("http"):] if base_url.startswith("http") else base_url
+    url += "/" + rest.lstrip("/")
+    return f"{url}?{query}" if query else url
+
+
+def forward_headers(client: WebSocket) -> List[Tuple[str, str]]:
+    """핸드셰이크 헤더를 뺀 클라이언트 헤더 (쿠키, Authorization, Origin 등)"""
+    return [(k, v) for k, v in client.headers.items() if k.lower() not in HANDSHAKE_HEADERS]
+
+
+def requested_subprotocols(client: WebSocket) -> List[str]:
+    value = client.headers.get("sec-websocket-protocol", "")
+    return [p.strip() for p in value.split(",") if p.strip()]
+
+
+def _sendable(code: Optional[int]) -> int:
+    if not code or code in RESERVED_CLOSE_CODES:
+        return IDLE_CLOSE_CODE
+    return code
+
+
+async def _close_client(client: WebSocket, code: int, reason: str = ""):
+    if client.application_state != WebSocketState.DISCONNECTED and client.client_state != WebSocketState.DISCONNECTED:
+        try:
+            await client.close(code=code, reason=reason)
+        except RuntimeError:
+            pass
+
+
+async def relay_websocket(client: WebSocket, url: str, headers: Iterable[Tuple[str, str]],
+                          subprotocols: List[str], open_timeout: float, idle_timeout: float) -> str:
+    """업스트림에 연결하고 양방향 중계. 종료 사유("client", "upstream", "idle")를 반환.
+    업스트림 연결 실패(OSError, InvalidHandshake, TimeoutError)는 accept 전에 그대로 올려 보낸다."""
+    loop = asyncio.get_running_loop()
+    async with websockets.connect(
+        url,
+        extra_headers=list(headers),
+        subprotocols=subprotocols or None,
+        open_timeout=open_timeout,
+        ping_interval=settings.WEBSOCKET_PING_INTERVAL or None,
+        max_size=settings.WEBSOCKET_MAX_MESSAGE or None,
+        close_timeout=5,
+    ) as upstream:
+        await client.accept(subprotocol=upstream.subprotocol)
+        last_activity = loop.time()
+
+        async def client_to_upstream() -> int:
+            nonlocal last_activity
+            while True:
+                message = await client.receive()
+                if message["type"] == "websocket.disconnect":
+                    return message.get("code", 1000)
+                last_activity = loop.time()
+                if message.get("text") is not None:
+                    await upstream.send(message["text"])
+                elif message.get("bytes") is not None:
+                    await upstream.send(message["bytes"])
+
+        async def upstream_to_client():
+            nonlocal last_activity
+            async for message in upstream:
+                last_activity = loop.time()
+                if isinstance(message, str):
+                    await client.send_text(message)
+                else:
+                    await client.send_bytes(message)
+
+        async def idle_watch():
+            while True:
+                remaining = last_activity + idle_timeout - loop.time()
+                if remaining <= 0:
+                    return
+                await asyncio.sleep(remaining)
+
+        tasks = {
+            asyncio.ensure_future(client_to_upstream()): "client",
+            asyncio.ensure_future(upstream_to_client()): "upstream",
+        }
+        if idle_timeout:
+            tasks[asyncio.ensure_future(idle_watch())] = "idle"
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        first = next(iter(done))
+        reason = tasks[first]
+        if reason == "client":
+            # 클라이언트가 끊었으면 업스트림에도 같은 코드로 종료를 알린다
+            code = first.result() if first.exception() is None else None
+            await upstream.close(code=_sendable(code))
+        elif reason == "upstream":
+            await _close_client(client, _sendable(upstream.close_code), upstream.close_reason or "")
+        else:
+            logger.info(f"⌛ WebSocket 유휴 종료({idle_timeout:.0f}s): {url}")
+            await upstream.close(code=IDLE_CLOSE_CODE, reason="idle timeout")
+            await _close_client(client, IDLE_CLOSE_CODE, "idle timeout")
+        return reason
@@ -1,8 +1,38 @@
 # main.py (gateway) — CORS 보강 버전
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, WebSocket
+from starlette.requests import HTTPConnection
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.responses import Response, JSONResponse
-import httpx, os, logging
+from starlette.background import BackgroundTask
+from starlette.responses import Response, JSONResponse, PlainTextResponse, StreamingResponse
+import asyncio, httpx, json, logging, time, websockets
+from typing import Optional, Tuple
+
+from .common.batch import BatchError, BatchItem, error_result, item_result, parse_batch, sub_request
+from .common.cache import (
+    CachePolicy, build_entry, cache_key, freshness, merge_vary, request_bypasses_cache, response_cache,
+)
+from .common.coalesce import COALESCE_METHODS, single_flight
+from .common.compression import (
+    UPSTREAM_ACCEPT_ENCODING, CompressionPolicy, Encoder, accepts, compress_body, compressible, negotiate, weak_etag,
+)
+from .common.balancer import is_failure
+from .common.breaker import Rejection
+from .common.config import settings
+from .common.ratelimit import rate_limiter
+from .common.redis_client import close_redis
+from .common.metrics import (
+    ERROR_CLASS, compression_cpu, compression_ratio, gateway_overhead, registry as metrics_registry,
+    response_size, status_class, upstream_latency,
+)
+from .common.resilience import DEADLINE_HEADER, IDEMPOTENT_METHODS
+from .common.session import TRUSTED_HEADERS, Identity, SessionStoreUnavailable, session_validator
+from .common.streaming import (
+    BodyTooLarge, check_declared_length, has_body, is_event_stream, iter_request_body, read_request_body,
+    relay_response, wants_event_stream,
+)
+from .common.upstream import upstream_clients
+from .common.websocket_proxy import forward_headers, relay_websocket, requested_subprotocols, upstream_ws_url
+from .router.route_table import Route, route_table
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("gateway")
@@ -40,87 +70,795 @@ def cors_headers_for(request: Request):
     # 화이트리스트 밖이면 CORS 헤더 미부착(브라우저가 차단)
     return {}
 
-ACCOUNT_SERVICE_URL = os.getenv("ACCOUNT_SERVICE_URL")
-CHATBOT_SERVICE_URL = os.getenv("CHATBOT_SERVICE_URL", "http://localhost:8003")
-TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "20"))
+@app.on_event("startup")
+async def startup():
+    """업스트림별 공유 클라이언트(커넥션 풀) 생성"""
+    for route in route_table.routes:
+        upstream_clients.register(route.name)
+    await session_validator.start()
+    await rate_limiter.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await session_validator.stop()
+    await rate_limiter.stop()
+    await upstream_clients.close()
+    await close_redis()
 
 @app.get("/health")
 async def health(): 
     return {"status": "healthy", "service": "gateway"}
 
+@app.get("/gateway/pools")
+async def pool_stats():
+    """업스트림 커넥션 풀 통계 (활성/유휴 커넥션, 획득 대기 시간)"""
+    return upstream_clients.stats()
+
+@app.get("/gateway/routes")
+async def route_stats():
+    """라우트 테이블과 레플리카별 진행 중 요청/실패/제외 상태"""
+    return [
+        {"name": r.name, "prefix": r.prefix, "timeout": r.timeout, "streaming": r.streaming,
+         "cache": r.cache.enabled, "coalesce": r.coalesce, "resilience": r.resilience.stats(),
+         "replicas": r.upstream.stats()}
+        for r in route_table.routes
+    ]
+
+@app.get("/gateway/breakers")
+async def breaker_stats():
+    """업스트림별 서킷 브레이커 상태와 거절(shed) 수"""
+    return {r.name: r.guard.stats() for r in route_table.routes}
+
+BREAKER_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+def _collect_gateway_metrics():
+    """스크레이프 시점에 풀/브레이커/캐시/병합 상태를 게이지·카운터로 변환"""
+    pools = upstream_clients.stats()
+    yield ("gateway_pool_connections", "gauge", "Upstream pool connections by state.", [
+        (("upstream", "state"), (name, state), count)
+        for name, p in pools.items() for state, count in p["connections"].items()
+    ])
+    yield ("gateway_pool_acquire_total", "counter", "Connections acquired from the upstream pool.", [
+        (("upstream",), (name,), upstream_clients.pool_stats(name).acquired) for name in pools
+    ])
+    yield ("gateway_pool_acquire_wait_seconds_total", "counter", "Total time waiting to acquire a connection.", [
+        (("upstream",), (name,), upstream_clients.pool_stats(name).wait_total) for name in pools
+    ])
+    routes = route_table.routes
+    yield ("gateway_breaker_state", "gauge", "Circuit breaker state (0=closed, 1=half_open, 2=open).", [
+        (("upstream",), (r.name,), BREAKER_STATE_VALUES[r.guard.state]) for r in routes
+    ])
+    yield ("gateway_upstream_inflight", "gauge", "In-flight requests per upstream.", [
+        (("upstream",), (r.name,), r.guard.inflight) for r in routes
+    ])
+    yield ("gateway_shed_total", "counter", "Requests rejected by breaker or concurrency limit.", [
+        (("upstream", "reason"), (r.name, reason), count)
+        for r in routes for reason, count in (("open", r.guard.shed_open), ("overload", r.guard.shed_overload))
+    ])
+    yield ("gateway_retries_total", "counter", "Retries and hedged requests sent upstream.", [
+        (("upstream", "kind"), (r.name, kind), count)
+        for r in routes for kind, count in (("retry", r.resilience.budget.retries), ("hedge", r.resilience.budget.hedges))
+    ])
+    cache = response_cache.counters
+    yield ("gateway_cache_events_total", "counter", "Response cache lookups by result.", [
+        (("result",), (result,), count) for result, count in (
+            ("hit", cache.hits), ("miss", cache.misses), ("revalidated", cache.revalidated), ("bypass", cache.bypass)
+        )
+    ])
+    yield ("gateway_coalesce_total", "counter", "Single-flight requests by role.", [
+        (("role",), ("leader",), single_flight.counters.leaders),
+        (("role",), ("follower",), single_flight.counters.followers),
+    ])
+    auth = session_validator.counters
+    yield ("gateway_auth_total", "counter", "Edge session validation results.", [
+        (("result",), (result,), count) for result, count in (
+            ("valid", auth.valid), ("invalid", auth.invalid), ("missing", auth.missing),
+            ("revoked", auth.revoked), ("store_error", auth.store_errors),
+        )
+    ])
+    yield ("gateway_ratelimit_rejected_total", "counter", "Requests rejected by token-bucket rate limits.", [
+        (("upstream", "key"), (route, dimension), count)
+        for (route, dimension), count in rate_limiter.rejected.items()
+    ])
+
+metrics_registry.register_collector(_collect_gateway_metrics)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 텍스트 포맷 메트릭"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/gateway/auth")
+async def auth_stats():
+    """엣지 세션 검증 결과/캐시 카운터"""
+    return session_validator.stats()
+
+@app.get("/gateway/ratelimit")
+async def ratelimit_stats():
+    """요청 수 제한 통과/거절(라우트·기준별) 카운터"""
+    return rate_limiter.stats()
+
+@app.get("/gateway/cache")
+async def cache_stats():
+    """응답 캐시 히트/미스 카운터"""
+    return response_cache.stats()
+
+@app.get("/gateway/coalesce")
+async def coalesce_stats():
+    """동일 요청 병합 카운터 (followers = 절약된 업스트림 호출 수)"""
+    return single_flight.stats()
+
 @app.options("/{path:path}")
 async def options_handler(path: str, request: Request):
     """CORS preflight 직접 처리(필요 시)."""
     return Response(status_code=204, headers=cors_headers_for(request))
 
 # ---- 단일 프록시 유틸 ----
-async def _proxy(request: Request, upstream_base: str, rest: str):
-    url = upstream_base.rstrip("/") + "/" + rest.lstrip("/")
-    logger.info(f"🔗 프록시 요청: {request.method} {request.url.path} -> {url}")
+def _passthrough_headers(request: Request, upstream: httpx.Response) -> dict:
+    """업스트림 응답 헤더 중 전달할 것만 고르고 CORS 헤더를 덮어쓴다"""
+    passthrough = {}
+    for k, v in upstream.headers.items():
+        lk = k.lower()
+        if lk in ("content-type", "set-cookie", "cache-control", "etag", "last-modified", "retry-after"):
+            passthrough[k] = v
+
+    # CORS 헤더를 명시적으로 덮어쓴다(항상 부착)
+    passthrough.update(cors_headers_for(request))
+    return passthrough
+
+def _strip_weak(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+def _cached_response(request: Request, entry, state: str) -> Response:
+    """캐시 항목으로 응답 (If-None-Match가 맞으면 304)"""
+    headers = {k: v for k, v in entry.headers.items() if k != "vary"}
+    headers["age"] = str(entry.age(time.time()))
+    headers["x-cache"] = state
+    headers.update(cors_headers_for(request))
+    # 응답의 CORS 헤더가 Origin에 따라 달라지므로 Vary: Origin은 항상 유지
+    headers["Vary"] = merge_vary(entry.headers.get("vary"), "Origin")
+
+    # 압축 응답에는 약한 ETag(W/)가 나가므로 약한 비교로 맞춘다
+    inm = request.headers.get("if-none-match")
+    if inm and entry.etag and (inm.strip() == "*" or _strip_weak(entry.etag) in
+                               [_strip_weak(t.strip()) for t in inm.split(",")]):
+        response_cache.counters.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=entry.body,
+        status_code=entry.status,
+        headers=headers,
+        media_type=entry.headers.get("content-type"),
+    )
+
+async def _cache_upstream_response(request: Request, key: str, entry, upstream: httpx.Response, policy: CachePolicy):
+    """업스트림 응답을 캐시에 반영. 캐시 항목으로 응답할 수 있으면 Response, 아니면 None"""
+    if upstream.status_code == 304 and entry is not None:
+        # 재검증 성공: 본문은 그대로 두고 수명만 갱신
+        ttl, must_revalidate = freshness(upstream.headers, policy) or (policy.ttl, entry.must_revalidate)
+        for k in ("cache-control", "etag", "last-modified"):
+            if k in upstream.headers:
+                entry.headers[k] = upstream.headers[k]
+        entry.stored_at = time.time()
+        entry.expires_at = entry.stored_at + ttl
+        entry.must_revalidate = must_revalidate
+        await response_cache.store(key, entry, policy)
+        response_cache.counters.revalidated += 1
+        return _cached_response(request, entry, "REVALIDATED")
+
+    response_cache.counters.misses += 1
+    fresh = freshness(upstream.headers, policy) if upstream.status_code == 200 else None
+    if fresh is not None:
+        ttl, must_revalidate = fresh
+        await response_cache.store(key, build_entry(200, upstream.headers, upstream.content, ttl, must_revalidate), policy)
+    return None
+
+async def _send_upstream(route: Route, replica, method: str, rest: str, params: dict, headers: dict,
+                         deadline: float, content=None, stream: bool = False):
+    """지정한 레플리카로 요청 전송. (응답, 스트림 종료 시 호출할 release 또는 None)
+    deadline은 들어온 요청 하나의 마감 시각(monotonic). 적응형 타임아웃은 본문 없는 요청의 응답 헤더 도착까지에만 쓰고,
+    본문이 있는 요청은 업로드 시간이 요청마다 다르므로 남은 시간 전체를 기다린다"""
+    balancer = route.upstream
+    url = replica.url + "/" + rest.lstrip("/")
+    client = upstream_clients.get(route.name)
+    remaining = deadline - time.monotonic()
+    timeout = remaining if content is not None else min(route.resilience.timeout(), remaining)
+    if timeout <= 0:
+        raise httpx.ReadTimeout("request deadline exceeded before sending upstream")
+    # 게이트웨이가 이 시도를 기다리는 시간만큼을 업스트림 마감 시간으로 알린다
+    headers = {**headers, DEADLINE_HEADER: str(max(1, int(timeout * 1000)))}
+    # 응답 본문 읽기는 라우트 타임아웃(청크 간 대기), 스트리밍 응답은 relay_response의 idle timeout이 맡는다
+    upstream_request = client.build_request(
+        method, url, params=params, content=content, headers=headers,
+        timeout=httpx.Timeout(route.timeout, read=None) if stream else route.timeout,
+    )
+    balancer.acquire(replica)
+    started = time.perf_counter()
+    try:
+        upstream = await asyncio.wait_for(client.send(upstream_request, stream=True), timeout)
+    except asyncio.TimeoutError:
+        balancer.release(replica, ok=False)
+        upstream_latency.observe((route.name, replica.url, ERROR_CLASS), time.perf_counter() - started)
+        raise httpx.ReadTimeout(f"upstream did not respond within {timeout:.2f}s", request=upstream_request)
+    except BaseException as e:
+        # 연결 오류/타임아웃만 레플리카 실패로 본다 (본문 초과·취소는 제외)
+        balancer.release(replica, ok=not isinstance(e, httpx.TransportError))
+        if isinstance(e, httpx.TransportError):
+            upstream_latency.observe((route.name, replica.url, ERROR_CLASS), time.perf_counter() - started)
+        raise
+    elapsed = time.perf_counter() - started
+    ok = not is_failure(upstream)
+    if ok and content is None:
+        # 적응형 타임아웃과 헤지 지연의 기준이 되는 응답 헤더 도착 시간 (업로드가 섞이지 않도록 본문 없는 요청만)
+        route.resilience.latency.record(elapsed)
+    upstream_latency.observe((route.name, replica.url, status_class(upstream.status_code)), elapsed)
+    logger.info(f"✅ 프록시 응답: {upstream.status_code} {url}")
+    if stream:
+        return upstream, lambda: balancer.release(replica, ok)
+    try:
+        await upstream.aread()
+    except BaseException as e:
+        balancer.release(replica, ok=not isinstance(e, httpx.TransportError))
+        raise
+    finally:
+        await upstream.aclose()
+    balancer.release(replica, ok)
+    return upstream, None
+
+async def _discard(upstream: httpx.Response, release):
+    """사용하지 않을 응답(재시도 전 실패 응답, 헤지 패자)을 정리"""
+    if release is not None:
+        await upstream.aclose()
+        release()
+
+def _discard_late(task: asyncio.Future):
+    """취소 직전에 끝나버린 헤지 요청의 응답도 정리"""
+    if task.cancelled() or task.exception() is not None:
+        return
+    asyncio.ensure_future(_discard(*task.result()))
+
+async def _hedged(route: Route, method: str, rest: str, params: dict, headers: dict, stream: bool, tried: list,
+                  deadline: float):
+    """첫 요청이 지연 백분위를 넘기면 다른 레플리카로 한 번 더 보내고 먼저 성공한 응답을 쓴다
+    (헤지 요청도 같은 마감 시각 안에서 남은 시간만 쓴다)"""
+    resilience = route.resilience
+    replica = route.upstream.pick(exclude=tried)
+    tried.append(replica)
+    pending = {asyncio.ensure_future(
+        _send_upstream(route, replica, method, rest, params, headers, deadline, stream=stream)
+    )}
+    failed, error = [], None
+    try:
+        delay = resilience.hedge_delay()
+        if delay is not None:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done and resilience.budget.withdraw():
+                resilience.budget.hedges += 1
+                replica = route.upstream.pick(exclude=tried)
+                tried.append(replica)
+                pending.add(asyncio.ensure_future(
+                    _send_upstream(route, replica, method, rest, params, headers, deadline, stream=stream)
+                ))
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                upstream, release = task.result()
+                if not is_failure(upstream):
+                    for result in failed:
+                        await _discard(*result)
+                    return upstream, release
+                failed.append((upstream, release))
+        if failed:
+            for result in failed[1:]:
+                await _discard(*result)
+            return failed[0]
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+            task.add_done_callback(_discard_late)
+
+async def _forward(route: Route, method: str, rest: str, params: dict, headers: dict,
+                   content=None, stream: bool = False, replayable: bool = True):
+    """재시도(멱등 메서드, 지터 백오프, 다른 레플리카)와 헤지를 적용한 업스트림 호출.
+    재시도·헤지를 모두 합쳐 라우트 타임아웃 예산 하나를 쓴다: 남은 시간이 TIMEOUT_MIN보다 적으면 재시도하지 않는다"""
+    resilience = route.resilience
+    policy = resilience.policy
+    deadline = time.monotonic() + resilience.budget_timeout
+
+    def time_left() -> bool:
+        return deadline - time.monotonic() >= policy.timeout_min
+
+    resilience.budget.deposit()
+    retries = policy.max_retries if method in IDEMPOTENT_METHODS and replayable else 0
+    # 헤지 요청은 본문을 다시 보낼 수 없으므로 본문 없는 GET만
+    hedge = policy.hedge and method == "GET" and content is None and len(route.upstream.replicas) > 1
+    tried = []
+    attempt = 0
+    while True:
+        try:
+            if hedge:
+                upstream, release = await _hedged(route, method, rest, params, headers, stream, tried, deadline)
+            else:
+                replica = route.upstream.pick(exclude=tried)
+                tried.append(replica)
+                upstream, release = await _send_upstream(
+                    route, replica, method, rest, params, headers, deadline, content=content, stream=stream
+                )
+        except httpx.TransportError:
+            if attempt >= retries or not time_left() or not resilience.budget.withdraw():
+                raise
+        else:
+            if (not is_failure(upstream) or attempt >= retries
+                    or not time_left() or not resilience.budget.withdraw()):
+                return upstream, release
+            await _discard(upstream, release)
+        attempt += 1
+        resilience.budget.retries += 1
+        # 백오프 뒤에도 TIMEOUT_MIN만큼은 남도록
+        await asyncio.sleep(max(0.0, min(policy.backoff(attempt), deadline - time.monotonic() - policy.timeout_min)))
+
+def _once(*callbacks):
+    """여러 번 호출돼도 callbacks를 한 번만 실행하는 함수"""
+    called = False
+
+    def run():
+        nonlocal called
+        if called:
+            return
+        called = True
+        for callback in callbacks:
+            if callback is not None:
+                callback()
+    return run
+
+async def _close_stream(upstream: httpx.Response, closer):
+    """스트림 응답 정리 (본문 전송 전에 클라이언트가 끊긴 경우 대비)"""
+    await upstream.aclose()
+    closer()
+
+def _choose_encoding(request: Request, policy: CompressionPolicy, headers, status: int,
+                     size: Optional[int]) -> Optional[str]:
+    """응답에 쓸 압축 인코딩 (압축하지 않으면 None). size가 None이면 크기를 모르는 스트림"""
+    if not policy.enabled or request.method == "HEAD" or not compressible(headers, status):
+        return None
+    if size is not None and size < policy.min_size:
+        return None
+    return negotiate(request.headers.get("accept-encoding"))
+
+def _record_compression(name: str, encoder: Encoder):
+    ratio = encoder.ratio()
+    if ratio is not None:
+        labels = (name, encoder.encoding)
+        compression_ratio.observe(labels, ratio)
+        compression_cpu.observe(labels, encoder.cpu_seconds)
+
+def _compress_response(request: Request, name: str, policy: CompressionPolicy, response: Response) -> Response:
+    """버퍼링된 응답 본문 압축 (임계값 미만·이미 인코딩됨·압축 효과 없음이면 그대로)"""
+    headers = response.headers
+    if not policy.enabled or not compressible(headers, response.status_code):
+        return response
+    if len(response.body) < policy.min_size:
+        return response
+    headers["vary"] = merge_vary(headers.get("vary"), "Accept-Encoding")
+    encoding = _choose_encoding(request, policy, headers, response.status_code, len(response.body))
+    if encoding is None:
+        return response
+    body, encoder = compress_body(response.body, encoding, policy)
+    _record_compression(name, encoder)
+    if len(body) >= len(response.body):
+        return response
+    response.body = body
+    headers["content-length"] = str(len(body))
+    headers["content-encoding"] = encoding
+    if "etag" in headers:
+        headers["etag"] = weak_etag(headers["etag"])
+    return response
 
-    # 원본 요청 복제
+# 클라이언트가 보낸 값은 믿지 않고 업스트림에 넘기지 않는 헤더 (HTTP·WebSocket 공통): 신뢰 헤더, 마감 시간
+CLIENT_STRIPPED_HEADERS = TRUSTED_HEADERS + (DEADLINE_HEADER,)
+AUTH_PUBLIC_PATHS = tuple(p.strip().rstrip("/") for p in settings.AUTH_PUBLIC_PATHS.split(",") if p.strip())
+
+def _is_public(path: str) -> bool:
+    return any(path == p or path.startswith(p + "/") for p in AUTH_PUBLIC_PATHS)
+
+async def _identify(conn: HTTPConnection, route: Route) -> Tuple[Optional[Identity], Optional[int]]:
+    """(검증된 사용자 또는 None, 거절할 상태 코드 401/503 또는 None)"""
+    try:
+        identity = await session_validator.authenticate(conn)
+    except SessionStoreUnavailable as e:
+        logger.error(f"❌ 세션 저장소 조회 실패: {e}")
+        identity, unavailable = None, True
+    else:
+        unavailable = False
+    if identity is None and route.auth_required and not _is_public(conn.url.path):
+        return None, 503 if unavailable else 401
+    return identity, None
+
+def _shed_response(request: Request, route: Route, rejection: Rejection) -> Response:
+    """브레이커 OPEN/과부하로 거절: 503 + Retry-After (CORS 헤더 유지)"""
+    logger.warning(f"🛑 요청 거절({rejection.reason}): {request.method} {request.url.path} -> {route.name}")
+    headers = cors_headers_for(request)
+    headers["Retry-After"] = rejection.retry_after_header()
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Service Unavailable", "detail": f"{route.name}: {rejection.reason}"},
+        headers=headers,
+    )
+
+def _rate_limited_response(request: Request, route: Route, rejection: Rejection) -> Response:
+    """토큰 버킷 한도 초과: 429 + Retry-After (CORS 헤더 유지)"""
+    logger.warning(f"🪣 요청 제한({rejection.reason}): {request.method} {request.url.path} -> {route.name}")
+    headers = cors_headers_for(request)
+    headers["Retry-After"] = rejection.retry_after_header()
+    return JSONResponse(
+        status_code=429,
+        content={"error": "Too Many Requests", "detail": f"{route.name}: {rejection.reason}"},
+        headers=headers,
+    )
+
+def _check_rate_limit(conn: HTTPConnection, route: Route, identity: Optional[Identity]) -> Optional[Rejection]:
+    if identity is None:
+        return rate_limiter.check(route.name, route.rate_limit, conn)
+    return rate_limiter.check(route.name, route.rate_limit, conn, identity.user_id, identity.company_id)
+
+async def _proxy(request: Request, route: Route, rest: str, buffered: bool = False):
+    """라우트 하나로 프록시. buffered=True면 스트리밍 라우트도 본문 전체를 받아 Response로 돌려준다"""
+    streaming = route.streaming and not buffered
+    max_body = route.max_body_size
+    target = f"{route.name}:/{rest.lstrip('/')}"
+    logger.info(f"🔗 프록시 요청: {request.method} {request.url.path} -> {target}")
+
+    # 원본 요청 복제 (본문 프레이밍은 httpx가 다시 정한다)
     headers = dict(request.headers)
     headers.pop("host", None)
-    body = await request.body()
+    headers.pop("transfer-encoding", None)
+    # 업스트림에는 게이트웨이가 풀 수 있는 인코딩만 요청 (클라이언트 쪽 압축은 게이트웨이가 다시 정한다)
+    headers["accept-encoding"] = UPSTREAM_ACCEPT_ENCODING
     params = dict(request.query_params)
 
-    try:
-        async with httpx.AsyncClient(timeout=TIMEOUT, follow_redirects=True) as client:
-            upstream = await client.request(
-                request.method, url, params=params, content=body, headers=headers
-            )
-            logger.info(f"✅ 프록시 응답: {upstream.status_code} {url}")
-    except httpx.HTTPError as e:
-        logger.error(f"❌ 프록시 HTTP 오류: {e} {url}")
-        # 예외가 나도 CORS 헤더는 항상 달아준다
+    # 엣지 세션 검증: 클라이언트가 보낸 신뢰 헤더는 버리고 검증된 사용자 정보만 업스트림에 전달
+    for name in CLIENT_STRIPPED_HEADERS:
+        headers.pop(name, None)
+    identity, denied = await _identify(request, route)
+    if denied is not None:
+        logger.warning(f"🔒 인증 거절({denied}): {request.method} {request.url.path}")
         return JSONResponse(
-            status_code=502,
-            content={"error": "Bad Gateway", "detail": str(e)},
+            status_code=denied,
+            content={"error": "Unauthorized" if denied == 401 else "Service Unavailable",
+                     "detail": "valid session required" if denied == 401 else "session store unavailable"},
             headers=cors_headers_for(request),
         )
-    except Exception as e:
-        logger.error(f"❌ 프록시 일반 오류: {e} {url}")
-        return JSONResponse(
-            status_code=500,
-            content={"error": "Gateway Error", "detail": str(e)},
-            headers=cors_headers_for(request),
+    if identity is not None:
+        headers.update(identity.headers())
+
+    # 토큰 버킷: IP/사용자/회사별 한도를 넘으면 업스트림에 보내지 않고 바로 429
+    limited = _check_rate_limit(request, route, identity)
+    if limited is not None:
+        return _rate_limited_response(request, route, limited)
+
+    # SSE 요청은 캐시/병합 없이 항상 스트리밍으로 흘려보낸다
+    event_stream = wants_event_stream(request) and not buffered
+    if event_stream:
+        streaming = True
+
+    # GET 캐시: 신선하면 바로 응답, 만료됐으면 조건부 요청으로 재검증
+    cache_policy = route.cache
+    cacheable = cache_policy.enabled and request.method == "GET" and not event_stream
+    entry, key = None, None
+    if cacheable:
+        key = cache_key(request, route.name)
+        if request_bypasses_cache(request):
+            response_cache.counters.bypass += 1
+        else:
+            entry, source = await response_cache.lookup(key)
+            if entry is not None and entry.is_fresh(time.time()):
+                response_cache.record_hit(source)
+                return _cached_response(request, entry, "HIT")
+        if entry is not None:
+            for k in ("if-none-match", "if-modified-since"):
+                headers.pop(k, None)
+            if entry.etag:
+                headers["if-none-match"] = entry.etag
+            if entry.last_modified:
+                headers["if-modified-since"] = entry.last_modified
+        # 캐시에 저장하려면 본문 전체가 필요
+        streaming = False
+
+    # 동일한 멱등 요청은 업스트림 호출 하나를 공유 (응답을 나눠 쓰므로 버퍼링 모드)
+    coalesce = route.coalesce and request.method in COALESCE_METHODS and not event_stream
+    if coalesce:
+        streaming = False
+
+    # 서킷 브레이커 / 동시 처리 상한: 넘치면 업스트림에 보내지 않고 바로 503
+    admitted = route.guard.admit()
+    if isinstance(admitted, Rejection):
+        return _shed_response(request, route, admitted)
+    ticket = admitted
+    handed_off = False
+    try:
+        release = None
+        upstream_started = time.perf_counter()
+        try:
+            check_declared_length(request, max_body)
+            if streaming:
+                # 본문은 청크 단위로 흘려보내고 응답도 헤더만 받은 뒤 바로 전달
+                content = iter_request_body(request, max_body) if has_body(request) else None
+                upstream, release = await _forward(
+                    route, request.method, rest, params, headers, content=content, stream=True,
+                    replayable=content is None,
+                )
+            elif coalesce:
+                upstream, _ = await single_flight.do(
+                    single_flight.key(request, route.name),
+                    lambda: _forward(route, request.method, rest, params, headers),
+                )
+            else:
+                body = await read_request_body(request, max_body) if has_body(request) else b""
+                upstream, _ = await _forward(route, request.method, rest, params, headers, content=body or None)
+        except BodyTooLarge as e:
+            logger.warning(f"⛔ 요청 본문 초과: {e} {target}")
+            return JSONResponse(
+                status_code=413,
+                content={"error": "Payload Too Large", "detail": str(e)},
+                headers=cors_headers_for(request),
+            )
+        except httpx.TimeoutException as e:
+            logger.error(f"⏱️ 프록시 타임아웃: {e} {target}")
+            ticket.ok = False
+            return JSONResponse(
+                status_code=504,
+                content={"error": "Gateway Timeout", "detail": str(e)},
+                headers=cors_headers_for(request),
+            )
+        except httpx.HTTPError as e:
+            logger.error(f"❌ 프록시 HTTP 오류: {e} {target}")
+            ticket.ok = False
+            # 예외가 나도 CORS 헤더는 항상 달아준다
+            return JSONResponse(
+                status_code=502,
+                content={"error": "Bad Gateway", "detail": str(e)},
+                headers=cors_headers_for(request),
+            )
+        except Exception as e:
+            logger.error(f"❌ 프록시 일반 오류: {e} {target}")
+            ticket.ok = False
+            return JSONResponse(
+                status_code=500,
+                content={"error": "Gateway Error", "detail": str(e)},
+                headers=cors_headers_for(request),
+            )
+        finally:
+            # 게이트웨이 오버헤드 계산용 업스트림(및 본문 수신) 대기 시간
+            request.state.upstream_seconds = time.perf_counter() - upstream_started
+
+        if is_failure(upstream):
+            ticket.ok = False
+
+        if cacheable:
+            cached = await _cache_upstream_response(request, key, entry, upstream, cache_policy)
+            if cached is not None:
+                return cached
+
+        # 업스트림 응답 전달
+        passthrough = _passthrough_headers(request, upstream)
+        if cacheable:
+            passthrough["x-cache"] = "MISS"
+            passthrough["Vary"] = merge_vary(upstream.headers.get("vary"), "Origin")
+
+        if streaming:
+            # 스트림이 끝나거나 클라이언트가 끊길 때 레플리카/브레이커 슬롯을 반납
+            closer = _once(release, ticket.close)
+            handed_off = True
+            # 업스트림이 이미 클라이언트가 받을 수 있는 인코딩으로 압축했으면 그대로 전달
+            upstream_encoding = upstream.headers.get("content-encoding", "identity").lower()
+            raw = upstream_encoding != "identity" and accepts(request.headers.get("accept-encoding"), upstream_encoding)
+            encoder = None
+            if raw:
+                passthrough["content-encoding"] = upstream_encoding
+            else:
+                declared = upstream.headers.get("content-length")
+                size = int(declared) if declared and declared.isdigit() and upstream_encoding == "identity" else None
+                encoding = _choose_encoding(request, route.compression, passthrough, upstream.status_code, size)
+                if encoding is not None:
+                    encoder = Encoder(encoding, route.compression)
+                    passthrough["content-encoding"] = encoding
+                    if "etag" in passthrough:
+                        passthrough["etag"] = weak_etag(passthrough["etag"])
+            if raw or encoder is not None or compressible(passthrough, upstream.status_code):
+                passthrough["Vary"] = merge_vary(passthrough.get("Vary"), "Accept-Encoding")
+            idle_timeout = route.timeout
+            if is_event_stream(upstream.headers):
+                # 중간 프록시(nginx 등)가 이벤트를 모아 보내지 않도록
+                passthrough.setdefault("cache-control", "no-cache")
+                passthrough["X-Accel-Buffering"] = "no"
+                idle_timeout = route.idle_timeout
+            size_labels = (route.name, status_class(upstream.status_code))
+
+            def on_size(sent: int):
+                response_size.observe(size_labels, sent)
+                if encoder is not None:
+                    _record_compression(route.name, encoder)
+
+            return StreamingResponse(
+                relay_response(upstream, on_close=closer, on_size=on_size, encoder=encoder, raw=raw,
+                               idle_timeout=idle_timeout),
+                status_code=upstream.status_code,
+                headers=passthrough,
+                media_type=upstream.headers.get("content-type"),
+                background=BackgroundTask(_close_stream, upstream, closer),
+            )
+
+        return Response(
+            content=upstream.content,
+            status_code=upstream.status_code,
+            headers=passthrough,
+            media_type=upstream.headers.get("content-type"),
         )
+    finally:
+        if not handed_off:
+            ticket.close()
 
-    # 업스트림 응답 전달
-    passthrough = {}
-    for k, v in upstream.headers.items():
-        lk = k.lower()
-        if lk in ("content-type", "set-cookie", "cache-control"):
-            passthrough[k] = v
+# ---- 배치 (여러 하위 요청을 한 번의 왕복으로) ----
+BATCH_COMPRESSION = CompressionPolicy.for_service("batch")
 
-    # CORS 헤더를 명시적으로 덮어쓴다(항상 부착)
-    passthrough.update(cors_headers_for(request))
+async def _batch_item(request: Request, item: BatchItem) -> dict:
+    """하위 요청 하나를 일반 프록시 경로로 처리"""
+    matched = route_table.match(item.path)
+    if matched is None:
+        return error_result(item, 404, "Not Found", f"no route for {item.path}")
+    route, rest = matched
+    started = time.perf_counter()
+    response = await _proxy(sub_request(request, item), route, rest, buffered=True)
+    return item_result(item, response, time.perf_counter() - started)
 
-    return Response(
-        content=upstream.content,
-        status_code=upstream.status_code,
-        headers=passthrough,
-        media_type=upstream.headers.get("content-type"),
+@app.post("/api/batch")
+async def api_batch(request: Request):
+    """하위 요청을 업스트림에 동시에 보내고 항목별 상태/본문을 모아 응답.
+    전체 마감 시간(timeout)을 넘긴 항목은 504, 실패한 항목은 해당 상태로 채워 부분 결과를 돌려준다."""
+    started = time.perf_counter()
+    try:
+        payload = json.loads(await read_request_body(request, settings.MAX_BODY_SIZE) or b"null")
+        items = parse_batch(payload, settings.BATCH_MAX_ITEMS)
+        timeout = float(payload.get("timeout", settings.BATCH_TIMEOUT))
+    except BodyTooLarge as e:
+        return JSONResponse(status_code=413, content={"error": "Payload Too Large", "detail": str(e)},
+                            headers=cors_headers_for(request))
+    except (ValueError, TypeError, BatchError) as e:
+        return JSONResponse(status_code=400, content={"error": "Bad Request", "detail": str(e)},
+                            headers=cors_headers_for(request))
+    timeout = max(0.0, min(timeout, settings.BATCH_TIMEOUT))
+
+    tasks = [asyncio.ensure_future(_batch_item(request, item)) for item in items]
+    try:
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+    finally:
+        # 마감 초과 또는 클라이언트 연결 종료: 남은 하위 요청은 취소 (슬롯/커넥션 반납)
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    results = []
+    for item, task in zip(items, tasks):
+        if task in pending:
+            results.append(error_result(item, 504, "Gateway Timeout", f"batch deadline {timeout:.2f}s exceeded"))
+        elif task.exception() is not None:
+            logger.error(f"❌ 배치 항목 오류: {item.id} {item.method} {item.path}: {task.exception()}")
+            results.append(error_result(item, 500, "Gateway Error", str(task.exception())))
+        else:
+            results.append(task.result())
+    logger.info(f"📦 배치: {len(items)}건, 마감 초과 {len(pending)}건, {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    response = JSONResponse(
+        content={"responses": results, "complete": not pending,
+                 "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)},
+        headers=cors_headers_for(request),
     )
+    return _compress_response(request, "batch", BATCH_COMPRESSION, response)
 
-# ---- account-service 프록시 ----
-@app.api_route("/api/account", methods=["GET","POST","PUT","PATCH","DELETE"])
-async def account_root(request: Request):
-    return await _proxy(request, ACCOUNT_SERVICE_URL, "/")
+# ---- 서비스 프록시 (라우트 테이블 기반) ----
+async def _wait_disconnect(request: Request):
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
 
-@app.api_route("/api/account/{path:path}", methods=["GET","POST","PUT","PATCH","DELETE"])
-async def account_any(path: str, request: Request):
-    return await _proxy(request, ACCOUNT_SERVICE_URL, path)
+async def _cancel_on_disconnect(request: Request, coro) -> Response:
+    """응답 전에 클라이언트가 끊기면 업스트림 호출을 취소 (연결이 닫히면 업스트림도 처리를 멈춘다).
+    본문을 읽는 요청은 receive를 본문 읽기와 나눠 쓸 수 없으므로 본문 없는 요청에만 쓴다"""
+    task = asyncio.ensure_future(coro)
+    watcher = asyncio.ensure_future(_wait_disconnect(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        watcher.cancel()
+    if not task.done():
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        logger.info(f"🔌 클라이언트 연결 종료, 업스트림 요청 취소: {request.method} {request.url.path}")
+        # 닫힌 연결로는 전송되지 않지만 메트릭 기록용 (nginx의 499 Client Closed Request)
+        return Response(status_code=499)
+    return task.result()
 
-# ---- chatbot-service 프록시 ----
-@app.api_route("/api/chatbot", methods=["GET","POST","PUT","PATCH","DELETE"])
-async def chatbot_root(request: Request):
-    return await _proxy(request, CHATBOT_SERVICE_URL, "/")
+@app.api_route("/api/{path:path}", methods=["GET","POST","PUT","PATCH","DELETE","HEAD"])
+async def api_proxy(path: str, request: Request):
+    matched = route_table.match(request.url.path)
+    if matched is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Not Found", "detail": f"no route for {request.url.path}"},
+            headers=cors_headers_for(request),
+        )
+    route, rest = matched
+    started = time.perf_counter()
+    request.state.upstream_seconds = 0.0
+    if has_body(request):
+        response = await _proxy(request, route, rest)
+    else:
+        response = await _cancel_on_disconnect(request, _proxy(request, route, rest))
+    if not isinstance(response, StreamingResponse):
+        response = _compress_response(request, route.name, route.compression, response)
+    labels = (route.name, status_class(response.status_code))
+    gateway_overhead.observe(labels, max(0.0, time.perf_counter() - started - request.state.upstream_seconds))
+    if not isinstance(response, StreamingResponse):
+        # 스트리밍 응답 크기는 전송이 끝날 때 relay_response에서 기록
+        response_size.observe(labels, len(response.body))
+    return response
 
-@app.api_route("/api/chatbot/{path:path}", methods=["GET","POST","PUT","PATCH","DELETE"])
-async def chatbot_any(path: str, request: Request):
-    return await _proxy(request, CHATBOT_SERVICE_URL, path)
+# ---- WebSocket 패스스루 (chatbot / monitoring 등 websocket 라우트) ----
+@app.websocket("/api/{path:path}")
+async def ws_proxy(websocket: WebSocket, path: str):
+    matched = route_table.match(websocket.url.path)
+    if matched is None or not matched[0].websocket:
+        # accept 전에 닫으면 클라이언트는 403 핸드셰이크 실패로 받는다
+        await websocket.close(code=1008)
+        return
+    route, rest = matched
+    identity, denied = await _identify(websocket, route)
+    if denied is not None:
+        logger.warning(f"🔒 WebSocket 인증 거절({denied}): {websocket.url.path}")
+        await websocket.close(code=1008 if denied == 401 else 1013)
+        return
+    limited = _check_rate_limit(websocket, route, identity)
+    if limited is not None:
+        logger.warning(f"🪣 WebSocket 요청 제한({limited.reason}): {websocket.url.path} -> {route.name}")
+        await websocket.close(code=1013)  # try again later
+        return
+    headers = [(k, v) for k, v in forward_headers(websocket) if k.lower() not in CLIENT_STRIPPED_HEADERS]
+    if identity is not None:
+        headers += list(identity.headers().items())
+    admitted = route.guard.admit()
+    if isinstance(admitted, Rejection):
+        logger.warning(f"🛑 WebSocket 거절({admitted.reason}): {websocket.url.path} -> {route.name}")
+        await websocket.close(code=1013)  # try again later
+        return
+    ticket = admitted
+    replica = route.upstream.pick()
+    url = upstream_ws_url(replica.url, rest, websocket.url.query)
+    route.upstream.acquire(replica)
+    ok = True
+    logger.info(f"🔌 WebSocket 연결: {websocket.url.path} -> {url}")
+    try:
+        reason = await relay_websocket(
+            websocket, url, headers, requested_subprotocols(websocket),
+            open_timeout=route.timeout, idle_timeout=route.idle_timeout,
+        )
+        logger.info(f"🔌 WebSocket 종료({reason}): {url}")
+    except (OSError, asyncio.TimeoutError, websockets.InvalidHandshake) as e:
+        # 업스트림 연결 실패: 아직 accept 전이므로 핸드셰이크를 거절
+        logger.error(f"❌ WebSocket 업스트림 연결 실패: {e} {url}")
+        ok = ticket.ok = False
+        await websocket.close(code=1011)
+    finally:
+        route.upstream.release(replica, ok)
+        ticket.close()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "8080")))
+    uvicorn.run(app, host="0.0.0.0", port=settings.PORT)
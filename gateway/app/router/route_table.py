@@ -0,0 +1,157 @@
+"""
+Gateway Route Table - 선언적 라우트 레지스트리
+
+기본 라우트는 docker-compose의 9개 서비스이며, 서비스별 URL 환경변수
+({SERVICE}_SERVICE_URL)에 콤마로 여러 레플리카를 적을 수 있다.
+ROUTES_FILE(JSON)을 지정하면 해당 파일의 라우트로 대체한다.
+
+ROUTES_FILE 예시:
+[
+  {"name": "account", "prefix": "/api/account",
+   "upstreams": ["http://account-1:8001", "http://account-2:8001"],
+   "timeout": 5, "cache": {"enabled": true, "ttl": 10},
+   "retry": {"max_retries": 1, "hedge": true}, "breaker": {"max_inflight": 50},
+   "compression": {"min_size": 2048}, "rate_limit": {"user_rate": 2, "user_burst": 5}}
+]
+"""
+import json
+import logging
+import os
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from ..common.balancer import Upstream, parse_urls
+from ..common.breaker import BreakerConfig, UpstreamGuard
+from ..common.cache import CachePolicy
+from ..common.compression import CompressionPolicy
+from ..common.config import settings, service_env, service_env_bool
+from ..common.ratelimit import RateLimitPolicy
+from ..common.resilience import RetryPolicy, RouteResilience
+
+logger = logging.getLogger("gateway.routes")
+
+# (이름, 프리픽스, 기본 URL)
+DEFAULT_ROUTES = [
+    ("account", "/api/account", "http://localhost:8001"),
+    ("assessment", "/api/assessment", "http://localhost:8002"),
+    ("chatbot", "/api/chatbot", "http://localhost:8003"),
+    ("monitoring", "/api/monitoring", "http://localhost:8004"),
+    ("normal", "/api/normal", "http://localhost:8005"),
+    ("regulation", "/api/regulation", "http://localhost:8006"),
+    ("report", "/api/report", "http://localhost:8007"),
+    ("sharing", "/api/sharing", "http://localhost:8008"),
+    ("solution", "/api/solution", "http://localhost:8009"),
+]
+# 기본으로 WebSocket 업그레이드를 받는 서비스 (토큰 스트리밍 / 실시간 모니터링)
+WEBSOCKET_ROUTES = ("chatbot", "monitoring")
+
+
+@dataclass
+class Route:
+    name: str
+    prefix: str
+    upstream: Upstream
+    timeout: float
+    streaming: bool
+    max_body_size: int
+    cache: CachePolicy
+    coalesce: bool
+    resilience: RouteResilience
+    guard: UpstreamGuard
+    compression: CompressionPolicy
+    websocket: bool
+    idle_timeout: float
+    auth_required: bool
+    rate_limit: RateLimitPolicy
+
+
+def build_route(name: str, prefix: str, urls: List[str], spec: Optional[dict] = None) -> Route:
+    """라우트 생성. spec에 없는 값은 서비스별 환경변수 → 전역 기본값 순으로 채운다"""
+    spec = spec or {}
+    cache = CachePolicy.for_service(name)
+    if "cache" in spec:
+        cache = replace(cache, **spec["cache"])
+    retry = RetryPolicy.for_service(name)
+    if "retry" in spec:
+        retry = replace(retry, **spec["retry"])
+    breaker = BreakerConfig.for_service(name)
+    if "breaker" in spec:
+        breaker = replace(breaker, **spec["breaker"])
+    compression = CompressionPolicy.for_service(name)
+    if "compression" in spec:
+        compression = replace(compression, **spec["compression"])
+    rate_limit = RateLimitPolicy.for_service(name)
+    if "rate_limit" in spec:
+        rate_limit = replace(rate_limit, **spec["rate_limit"])
+    timeout = float(spec.get("timeout", service_env(name, "UPSTREAM_TIMEOUT", str(settings.UPSTREAM_TIMEOUT))))
+    upstream = Upstream(
+        name,
+        urls,
+        eject_failures=int(spec.get("eject_failures", service_env(name, "EJECT_FAILURES", str(settings.EJECT_FAILURES)))),
+        eject_seconds=float(spec.get("eject_seconds", service_env(name, "EJECT_SECONDS", str(settings.EJECT_SECONDS)))),
+    )
+    return Route(
+        name=name,
+        prefix="/" + prefix.strip("/"),
+        upstream=upstream,
+        timeout=timeout,
+        streaming=bool(spec.get("streaming", service_env_bool(name, "PROXY_STREAMING", settings.PROXY_STREAMING))),
+        max_body_size=int(spec.get("max_body_size", service_env(name, "MAX_BODY_SIZE", str(settings.MAX_BODY_SIZE)))),
+        cache=cache,
+        coalesce=bool(spec.get("coalesce", service_env_bool(name, "COALESCE_ENABLED", settings.COALESCE_ENABLED))),
+        resilience=RouteResilience(retry, timeout),
+        guard=UpstreamGuard(name, breaker),
+        compression=compression,
+        websocket=bool(spec.get("websocket", service_env_bool(name, "WEBSOCKET_ENABLED", name in WEBSOCKET_ROUTES))),
+        idle_timeout=float(spec.get("idle_timeout", service_env(name, "STREAM_IDLE_TIMEOUT", str(settings.STREAM_IDLE_TIMEOUT)))),
+        auth_required=bool(spec.get("auth_required", service_env_bool(name, "AUTH_REQUIRED", settings.AUTH_REQUIRED))),
+        rate_limit=rate_limit,
+    )
+
+
+class RouteTable:
+    """프리픽스 → 라우트. 경로 세그먼트 단위 최장 일치를 dict 조회로 찾는다"""
+
+    def __init__(self, routes: List[Route]):
+        self.routes = routes
+        self._by_prefix: Dict[str, Route] = {}
+        for route in routes:
+            if route.prefix in self._by_prefix:
+                raise ValueError(f"duplicate route prefix: {route.prefix}")
+            self._by_prefix[route.prefix] = route
+        self._max_depth = max((r.prefix.count("/") for r in routes), default=0)
+
+    def match(self, path: str) -> Optional[Tuple[Route, str]]:
+        """(라우트, 프리픽스 뒤 나머지 경로). 일치하는 라우트가 없으면 None"""
+        segments = path.split("/")
+        for depth in range(min(self._max_depth, len(segments) - 1), 0, -1):
+            route = self._by_prefix.get("/".join(segments[:depth + 1]))
+            if route is not None:
+                rest = "/".join(segments[depth + 1:])
+                return route, rest or "/"
+        return None
+
+    def get(self, name: str) -> Optional[Route]:
+        for route in self.routes:
+            if route.name == name:
+                return route
+        return None
+
+
+def load_routes() -> RouteTable:
+    """ROUTES_FILE이 있으면 JSON에서, 없으면 기본 9개 서비스 라우트"""
+    if settings.ROUTES_FILE:
+        with open(settings.ROUTES_FILE, encoding="utf-8") as f:
+            specs = json.load(f)
+        routes = [build_route(s["name"], s["prefix"], s["upstreams"], s) for s in specs]
+    else:
+        routes = []
+        for name, prefix, default_url in DEFAULT_ROUTES:
+            urls = parse_urls(os.getenv(f"{name.upper()}_SERVICE_URL", default_url))
+            routes.append(build_route(name, prefix, urls))
+    for route in routes:
+        logger.info(f"🧭 라우트: {route.prefix} -> {[r.url for r in route.upstream.replicas]}")
+    return RouteTable(routes)
+
+
+route_table = load_routes()
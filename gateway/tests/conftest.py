@@ -0,0 +1,86 @@
+"""
+게이트웨이 테스트 공용 설정
+
+- account 라우트에 응답 캐시를 켜고, 업스트림은 프로세스 내 ASGI 앱(stub)으로 바꾼다
+- Redis는 fakeredis로 대체한다 (set_redis)
+gateway 디렉터리에서 실행: python -m pytest -q tests
+"""
+import os
+
+os.environ.setdefault("ACCOUNT_CACHE_ENABLED", "true")
+os.environ["REDIS_URL"] = ""
+
+import fakeredis.aioredis
+import httpx
+import pytest
+from fastapi import FastAPI, Request, Response
+
+from app.common.cache import CacheStats
+from app.common.redis_client import set_redis
+from app.common.upstream import upstream_clients
+from app.main import app, response_cache
+
+
+def build_upstream() -> FastAPI:
+    """캐시 헤더를 돌려주는 가짜 account 서비스. app.state.calls에 경로별 호출 수를 센다"""
+    upstream = FastAPI()
+    upstream.state.calls = {}
+
+    def count(path: str):
+        upstream.state.calls[path] = upstream.state.calls.get(path, 0) + 1
+
+    @upstream.get("/items")
+    async def items():
+        count("/items")
+        return Response('{"items": [1, 2]}', media_type="application/json",
+                        headers={"Cache-Control": "max-age=60", "ETag": '"items-v1"'})
+
+    @upstream.get("/no-store")
+    async def no_store():
+        count("/no-store")
+        return Response("{}", media_type="application/json", headers={"Cache-Control": "no-store"})
+
+    @upstream.get("/vary")
+    async def vary():
+        count("/vary")
+        return Response("{}", media_type="application/json",
+                        headers={"Cache-Control": "max-age=60", "Vary": "X-Tenant"})
+
+    @upstream.get("/revalidate")
+    async def revalidate(request: Request):
+        count("/revalidate")
+        headers = {"Cache-Control": "no-cache", "ETag": '"doc-v1"'}
+        if request.headers.get("if-none-match") == '"doc-v1"':
+            return Response(status_code=304, headers=headers)
+        return Response('{"doc": 1}', media_type="application/json", headers=headers)
+
+    return upstream
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def redis():
+    client = fakeredis.aioredis.FakeRedis()
+    set_redis(client)
+    yield client
+    set_redis(None)
+
+
+@pytest.fixture
+def upstream():
+    stub = build_upstream()
+    upstream_clients._clients["account"] = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub))
+    yield stub
+    upstream_clients._clients.pop("account", None)
+
+
+@pytest.fixture
+async def gateway(redis, upstream):
+    response_cache.l1.clear()
+    response_cache.counters = CacheStats()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://gateway") as client:
+        yield client
@@ -0,0 +1,22 @@
+"""레플리카 제외가 정상 레플리카를 하나는 남겨 두는지"""
+from app.common.balancer import Upstream
+
+
+def fail(upstream: Upstream, replica, times: int):
+    for _ in range(times):
+        upstream.acquire(replica)
+        upstream.release(replica, ok=False)
+
+
+def test_last_available_replica_is_not_ejected():
+    upstream = Upstream("svc", ["http://a", "http://b", "http://c"], eject_failures=2, eject_seconds=30)
+    a, b, c = upstream.replicas
+
+    fail(upstream, a, 2)
+    fail(upstream, b, 2)
+    assert [r.ejections for r in upstream.replicas] == [1, 1, 0]
+
+    # 남은 정상 레플리카가 c 하나뿐이면 실패가 쌓여도 제외하지 않는다
+    fail(upstream, c, 4)
+    assert c.ejections == 0
+    assert upstream.pick() is c
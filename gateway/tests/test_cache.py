@@ -0,0 +1,85 @@
+"""GET 응답 캐시: MISS/HIT, Cache-Control, Vary, ETag 304 재검증 (L2는 fakeredis)"""
+import pytest
+
+from app.main import response_cache
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_miss_then_hit(gateway, upstream):
+    first = await gateway.get("/api/account/items")
+    assert first.status_code == 200
+    assert first.headers["x-cache"] == "MISS"
+
+    second = await gateway.get("/api/account/items")
+    assert second.status_code == 200
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == {"items": [1, 2]}
+    assert upstream.state.calls["/items"] == 1
+    assert response_cache.counters.l1_hits == 1
+
+
+async def test_hit_from_redis_after_local_eviction(gateway, upstream, redis):
+    await gateway.get("/api/account/items")
+    assert await redis.keys("gw:cache:*")
+    response_cache.l1.clear()
+
+    response = await gateway.get("/api/account/items")
+    assert response.headers["x-cache"] == "HIT"
+    assert upstream.state.calls["/items"] == 1
+    assert response_cache.counters.l2_hits == 1
+
+
+async def test_max_age_bounds_freshness(gateway, upstream):
+    await gateway.get("/api/account/items")
+    entry = next(iter(response_cache.l1._data.values()))
+    assert entry.expires_at - entry.stored_at == pytest.approx(60)
+
+
+async def test_no_store_is_not_cached(gateway, upstream, redis):
+    for _ in range(2):
+        response = await gateway.get("/api/account/no-store")
+        assert response.headers["x-cache"] == "MISS"
+    assert upstream.state.calls["/no-store"] == 2
+    assert len(response_cache.l1) == 0
+    assert await redis.keys("gw:cache:*") == []
+
+
+async def test_unkeyed_vary_is_not_cached(gateway, upstream):
+    for _ in range(2):
+        response = await gateway.get("/api/account/vary", headers={"X-Tenant": "a"})
+        assert response.headers["x-cache"] == "MISS"
+        assert "Origin" in response.headers["vary"]
+    assert upstream.state.calls["/vary"] == 2
+
+
+async def test_client_cache_bypass(gateway, upstream):
+    await gateway.get("/api/account/items")
+    response = await gateway.get("/api/account/items", headers={"Cache-Control": "no-cache"})
+    assert response.headers["x-cache"] == "MISS"
+    assert upstream.state.calls["/items"] == 2
+    assert response_cache.counters.bypass == 1
+
+
+async def test_if_none_match_served_from_cache(gateway, upstream):
+    await gateway.get("/api/account/items")
+    response = await gateway.get("/api/account/items", headers={"If-None-Match": '"items-v1"'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert upstream.state.calls["/items"] == 1
+    assert response_cache.counters.not_modified == 1
+
+
+async def test_no_cache_revalidates_with_etag(gateway, upstream):
+    first = await gateway.get("/api/account/revalidate")
+    assert first.headers["x-cache"] == "MISS"
+
+    second = await gateway.get("/api/account/revalidate")
+    assert second.status_code == 200
+    assert second.headers["x-cache"] == "REVALIDATED"
+    assert second.json() == {"doc": 1}
+    assert upstream.state.calls["/revalidate"] == 2
+    assert response_cache.counters.revalidated == 1
+
+    conditional = await gateway.get("/api/account/revalidate", headers={"If-None-Match": '"doc-v1"'})
+    assert conditional.status_code == 304
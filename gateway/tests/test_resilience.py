@@ -0,0 +1,115 @@
+"""재시도/헤지가 들어온 요청 하나의 마감 시간 안에서만 동작하는지"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request, Response
+
+from app.common.balancer import is_failure
+from app.common.upstream import upstream_clients
+from app.main import _forward
+from app.router.route_table import build_route
+
+pytestmark = pytest.mark.anyio
+
+BUDGET = 0.6
+RETRY = {"max_retries": 2, "backoff_base": 0.01, "timeout_min": 0.15, "adaptive_timeout": False}
+
+
+@pytest.fixture
+def flaky():
+    """/fail은 0.25초 뒤 502, /hang은 응답하지 않고, /busy는 503 + Retry-After. 받은 마감 헤더(ms)를 기록"""
+    upstream = FastAPI()
+    upstream.state.deadlines = []
+
+    @upstream.get("/fail")
+    async def fail(request: Request):
+        upstream.state.deadlines.append(int(request.headers["x-request-timeout-ms"]))
+        await asyncio.sleep(0.25)
+        return Response(status_code=502)
+
+    @upstream.get("/hang")
+    async def hang(request: Request):
+        upstream.state.deadlines.append(int(request.headers["x-request-timeout-ms"]))
+        await asyncio.sleep(5)
+        return Response()
+
+    @upstream.get("/busy")
+    async def busy(request: Request):
+        upstream.state.deadlines.append(int(request.headers["x-request-timeout-ms"]))
+        return Response(status_code=503, headers={"Retry-After": "2"})
+
+    @upstream.post("/upload")
+    async def upload(request: Request):
+        upstream.state.deadlines.append(int(request.headers["x-request-timeout-ms"]))
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return {"size": size}
+
+    route = build_route("flaky", "/api/flaky", ["http://flaky-1", "http://flaky-2"],
+                        {"timeout": BUDGET, "retry": RETRY})
+    upstream_clients._clients[route.name] = httpx.AsyncClient(transport=httpx.ASGITransport(app=upstream))
+    yield route, upstream
+    upstream_clients._clients.pop(route.name, None)
+
+
+async def test_retries_share_one_deadline(flaky):
+    route, upstream = flaky
+    started = time.monotonic()
+    response, _ = await _forward(route, "GET", "/fail", {}, {})
+    elapsed = time.monotonic() - started
+
+    assert response.status_code == 502
+    assert elapsed < BUDGET
+    # 두 번째 시도는 남은 시간만 받고, 남은 시간이 timeout_min보다 적어 세 번째 시도는 없다
+    first, second = upstream.state.deadlines
+    assert BUDGET * 1000 - 20 <= first <= BUDGET * 1000
+    assert second <= first - 250
+
+
+async def test_no_retry_after_budget_spent(flaky):
+    route, upstream = flaky
+    started = time.monotonic()
+    with pytest.raises(httpx.TimeoutException):
+        await _forward(route, "GET", "/hang", {}, {})
+    assert time.monotonic() - started < BUDGET + 0.1
+    assert len(upstream.state.deadlines) == 1
+
+
+async def test_load_shedding_503_is_not_a_failure(flaky):
+    route, upstream = flaky
+    response, _ = await _forward(route, "GET", "/busy", {}, {})
+
+    # 서비스가 Retry-After로 부하를 덜어낸 503은 재시도하지 않고 레플리카 실패로도 세지 않는다
+    assert response.status_code == 503
+    assert not is_failure(response)
+    assert len(upstream.state.deadlines) == 1
+    assert all(replica.failures == 0 for replica in route.upstream.replicas)
+    assert is_failure(httpx.Response(503))
+
+
+async def test_slow_upload_is_not_cut_by_adaptive_timeout(flaky):
+    route, upstream = flaky
+    route.resilience.policy.adaptive_timeout = True
+    route.resilience.policy.timeout_min = 0.05
+    # 작은 요청으로 학습된 p99 (적응형 타임아웃 0.05초)
+    for _ in range(100):
+        route.resilience.latency.record(0.001)
+    assert route.resilience.timeout() == 0.05
+
+    async def body():
+        for _ in range(4):
+            await asyncio.sleep(0.1)
+            yield b"x" * 1024
+
+    response, release = await _forward(route, "POST", "/upload", {}, {}, content=body(), stream=True,
+                                       replayable=False)
+    await response.aread()
+    release()
+
+    assert response.status_code == 200
+    assert response.json() == {"size": 4096}
+    # 업로드가 있는 요청은 적응형 타임아웃이 아니라 남은 예산 전체를 업스트림 마감으로 받는다
+    assert upstream.state.deadlines[0] >= BUDGET * 1000 - 20
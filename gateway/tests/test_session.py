@@ -0,0 +1,39 @@
+"""폐기된 세션 기록이 서명 토큰 최대 수명 동안만 유지되는지"""
+import time
+
+import pytest
+from starlette.requests import HTTPConnection
+
+from app.common.config import settings
+from app.common.session import SessionValidator, sign_token
+
+pytestmark = pytest.mark.anyio
+
+SECRET = "test-secret"
+
+
+def connection(token: str) -> HTTPConnection:
+    cookie = f"{settings.SESSION_COOKIE}={token}".encode()
+    return HTTPConnection({"type": "http", "headers": [(b"cookie", cookie)]})
+
+
+async def test_revoked_session_expires_on_read(redis):
+    validator = SessionValidator("signed", SECRET)
+    token = sign_token({"sid": "s-1", "uid": "u-1", "cid": "c-1", "exp": time.time() + 3600}, SECRET)
+    assert (await validator.authenticate(connection(token))).user_id == "u-1"
+
+    validator.revoke("s-1")
+    assert await validator.authenticate(connection(token)) is None
+
+    # SESSION_MAX_AGE가 지난 기록은 읽을 때 지워지고 더 이상 거절하지 않는다
+    validator._revoked["s-1"] = time.time() - 1
+    assert (await validator.authenticate(connection(token))).user_id == "u-1"
+    assert validator.stats()["revoked_sessions"] == 0
+
+
+async def test_revoke_prunes_expired_records(redis):
+    validator = SessionValidator("signed", SECRET)
+    validator.revoke("old")
+    validator._revoked["old"] = time.time() - 1
+    validator.revoke("new")
+    assert list(validator._revoked) == ["new"]
@@ -7,12 +7,48 @@ if os.getenv("RAILWAY_ENVIRONMENT") != "true":
 
 class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    # ---- DB 커넥션 풀 (프로세스당 엔진 1개) ----
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))      # 커넥션 획득 대기 상한(초)
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))      # 이보다 오래된 커넥션은 다시 연결(초)
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("true", "1", "yes", "on")
+    DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "2"))          # 시작 시 미리 열어 둘 커넥션 수
+    DB_ASYNC = os.getenv("DB_ASYNC", "true").lower() in ("true", "1", "yes", "on")  # async 라우트에서 AsyncEngine(asyncpg) 사용
     ALLOW_ORIGINS = [
         "https://eripotter.com",
         "https://www.eripotter.com",
         "http://localhost:3000",
         "http://localhost:8080",
     ]
+    # ---- bcrypt 해시 풀 (이벤트 루프 밖에서 해시/검증) ----
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+    HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "32"))  # 넘치면 503
+    # ---- bcrypt cost (0이면 시작 시 BCRYPT_TARGET_MS에 맞춰 보정) ----
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "0"))
+    BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "250"))
+    BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))  # 보안 하한
+    BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", "14"))
+    BCRYPT_ROUNDS_SLACK = int(os.getenv("BCRYPT_ROUNDS_SLACK", "1"))  # 보정값 ± slack 안의 해시는 다시 해시하지 않음
+    # ---- 일괄 가입 (/users/import) ----
+    BULK_SIGNUP_MAX_ROWS = int(os.getenv("BULK_SIGNUP_MAX_ROWS", "1000"))
+    BULK_SIGNUP_MAX_BYTES = int(os.getenv("BULK_SIGNUP_MAX_BYTES", str(1024 * 1024)))  # 본문 크기 상한, 넘으면 413
+    # 일괄 가입을 호출할 수 있는 관리자 user_id (콤마 구분). 비어 있으면 아무도 호출할 수 없다
+    BULK_SIGNUP_ADMINS = {u.strip() for u in os.getenv("BULK_SIGNUP_ADMINS", "").split(",") if u.strip()}
+    # ---- 세션 (게이트웨이 AUTH_MODE=redis와 같은 키/채널을 쓴다) ----
+    REDIS_URL = os.getenv("REDIS_URL", "")
+    REDIS_TIMEOUT = float(os.getenv("REDIS_TIMEOUT", "0.2"))
+    SESSION_COOKIE = os.getenv("SESSION_COOKIE", "session_token")
+    SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "true").lower() in ("true", "1", "yes", "on")
+    SESSION_COOKIE_SAMESITE = os.getenv("SESSION_COOKIE_SAMESITE", "lax")  # 프론트와 API가 다른 사이트면 none
+    SESSION_COOKIE_DOMAIN = os.getenv("SESSION_COOKIE_DOMAIN", "") or None
+    SESSION_TTL = int(os.getenv("SESSION_TTL", str(2 * 3600)))            # 유휴 만료(초), 사용할 때마다 연장
+    SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", str(24 * 3600)))   # 절대 만료(초)
+    SESSION_REFRESH_INTERVAL = float(os.getenv("SESSION_REFRESH_INTERVAL", "300"))  # TTL 연장 최소 간격(초)
+    SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "30"))
+    SESSION_CACHE_MAX = int(os.getenv("SESSION_CACHE_MAX", "10000"))
+    SESSION_REDIS_PREFIX = os.getenv("SESSION_REDIS_PREFIX", "session:")
+    SESSION_REVOKE_CHANNEL = os.getenv("SESSION_REVOKE_CHANNEL", "session:revoked")
     SERVICE_NAME = "account-service"
     PORT = int(os.getenv("PORT", "8001"))
 
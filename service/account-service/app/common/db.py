@@ -1,29 +1,246 @@
 """
 데이터베이스 연결 및 엔진 생성 유틸리티
+
+엔진(커넥션 풀)은 프로세스당 하나만 만든다.
+- init_db_engine(): 시작 시 엔진 생성 + 커넥션 미리 열기 (첫 요청이 연결 수립 비용을 내지 않도록)
+- get_db_engine(): 공유 엔진 반환 (없으면 생성)
+- dispose_db_engine(): 종료 시 풀 정리
+풀 크기/오버플로/재활용/pre-ping은 Settings(DB_POOL_*)로 조정하고,
+pool_stats()로 커넥션 획득 대기 시간과 포화 상태(사용 중/상한)를 확인한다.
+
+비동기 경로: get_async_db_engine()은 같은 DATABASE_URL로 AsyncEngine(postgresql+asyncpg)을 만든다.
+async 라우트에서는 비동기 엔진을 쓰고, 동기 엔진은 alembic/스크립트용으로 남겨 둔다.
+DB_ASYNC=false이거나 드라이버(asyncpg)가 없으면 async_db_enabled()가 False다.
 """
+from importlib.util import find_spec
 from urllib.parse import urlparse
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from .config import settings
 import logging
+import threading
+import time
 
 logger = logging.getLogger("db")
 
+# 동기 URL 백엔드 → 비동기 드라이버
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+_engine = None
+_async_engine = None
+_engine_lock = threading.Lock()
+
+
+class PoolCounters:
+    """커넥션 획득 통계 (스레드풀에서 동시에 갱신되므로 근사값)"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.connects = 0
+
+    def record(self, seconds: float):
+        self.checkouts += 1
+        self.wait_total += seconds
+        if seconds > self.wait_max:
+            self.wait_max = seconds
+
+
+pool_counters = PoolCounters()
+async_pool_counters = PoolCounters()
+
+
+class _TimedPool:
+    """풀에서 커넥션을 꺼내는 데 걸린 시간(대기 + 새 연결 수립)을 기록"""
+
+    counters: PoolCounters
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.counters.timeouts += 1
+            raise
+        self.counters.record(time.perf_counter() - started)
+        return conn
+
+    def _create_connection(self):
+        self.counters.connects += 1
+        return super()._create_connection()
+
+
+class TimedQueuePool(_TimedPool, QueuePool):
+    counters = pool_counters
+
+
+class TimedAsyncQueuePool(_TimedPool, AsyncAdaptedQueuePool):
+    counters = async_pool_counters
+
+
+def _pool_args() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        # 최근에 쓴 커넥션부터 재사용 → 남는 커넥션은 쉬다가 recycle로 정리됨
+        "pool_use_lifo": True,
+    }
+
+def _is_railway(hostname) -> bool:
+    return (hostname or "").endswith("proxy.rlwy.net") or (hostname or "").endswith("railway.app")
+
 def get_database_url() -> str:
     """데이터베이스 URL 반환"""
     if not settings.DATABASE_URL:
         raise RuntimeError("DATABASE_URL is not set")
     return settings.DATABASE_URL
 
-def get_db_engine():
-    """데이터베이스 엔진 생성"""
+def get_async_database_url():
+    """비동기 드라이버 URL과 connect_args. asyncpg는 sslmode 대신 ssl 인자를 받는다"""
+    url = make_url(get_database_url())
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"no async driver for {url.get_backend_name()}")
+    connect_args = {}
+    query = dict(url.query)
+    if driver == "asyncpg":
+        sslmode = query.pop("sslmode", None)
+        # Railway Postgres일 때 ssl=require 자동 부여 (동기 엔진과 동일)
+        if sslmode is None and _is_railway(url.host):
+            sslmode = "require"
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = sslmode
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}", query=query), connect_args
+
+def async_db_enabled() -> bool:
+    """비동기 엔진을 쓸 수 있는지 (DB_ASYNC 설정 + 드라이버 설치 여부)"""
+    if not settings.DB_ASYNC or not settings.DATABASE_URL:
+        return False
+    driver = ASYNC_DRIVERS.get(make_url(settings.DATABASE_URL).get_backend_name())
+    return driver is not None and find_spec(driver) is not None
+
+def _create_engine():
     url = get_database_url()
     parsed = urlparse(url)
     logger.info(f"DB → {parsed.scheme}://{parsed.hostname}:{parsed.port}/{parsed.path.lstrip('/')}")
     connect_args = {}
     # Railway Postgres일 때 sslmode=require 자동 부여(이미 붙어있으면 생략)
-    if "sslmode=" not in url and (
-        (parsed.hostname or "").endswith("proxy.rlwy.net")
-        or (parsed.hostname or "").endswith("railway.app")
-    ):
+    if "sslmode=" not in url and _is_railway(parsed.hostname):
         connect_args["sslmode"] = "require"
-    return create_engine(url, pool_pre_ping=True, connect_args=connect_args)
+    return create_engine(url, poolclass=TimedQueuePool, connect_args=connect_args, **_pool_args())
+
+def _create_async_engine():
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url, connect_args = get_async_database_url()
+    logger.info(f"DB(async) → {url.drivername}://{url.host}:{url.port}/{url.database}")
+    return create_async_engine(url, poolclass=TimedAsyncQueuePool, connect_args=connect_args, **_pool_args())
+
+def get_db_engine():
+    """프로세스 공용 데이터베이스 엔진 (처음 호출 시 생성)"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine()
+    return _engine
+
+def get_async_db_engine():
+    """프로세스 공용 AsyncEngine (처음 호출 시 생성, 이벤트 루프 안에서 호출)"""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = _create_async_engine()
+    return _async_engine
+
+def init_db_engine(warmup: int = None):
+    """시작 시 엔진 생성 후 커넥션 warmup개를 미리 연다. DATABASE_URL이 없거나 연결에 실패해도 서비스는 뜬다"""
+    if not settings.DATABASE_URL:
+        logger.warning("DATABASE_URL이 없어 DB 엔진을 만들지 않습니다.")
+        return None
+    engine = get_db_engine()
+    warmup = settings.DB_POOL_WARMUP if warmup is None else warmup
+    warmup = min(warmup, settings.DB_POOL_SIZE)
+    conns = []
+    try:
+        for _ in range(warmup):
+            conns.append(engine.connect())
+        logger.info(f"🗄️ DB 커넥션 풀 준비: {len(conns)}개 연결 (pool_size={settings.DB_POOL_SIZE}, "
+                    f"max_overflow={settings.DB_MAX_OVERFLOW})")
+    except SQLAlchemyError as e:
+        logger.error(f"❌ DB 커넥션 미리 열기 실패: {e}")
+    finally:
+        for conn in conns:
+            conn.close()
+    return engine
+
+async def init_async_db_engine(warmup: int = None):
+    """init_db_engine의 비동기 버전"""
+    if not settings.DATABASE_URL:
+        logger.warning("DATABASE_URL이 없어 DB 엔진을 만들지 않습니다.")
+        return None
+    engine = get_async_db_engine()
+    warmup = settings.DB_POOL_WARMUP if warmup is None else warmup
+    warmup = min(warmup, settings.DB_POOL_SIZE)
+    conns = []
+    try:
+        for _ in range(warmup):
+            conns.append(await engine.connect())
+        logger.info(f"🗄️ DB(async) 커넥션 풀 준비: {len(conns)}개 연결 (pool_size={settings.DB_POOL_SIZE}, "
+                    f"max_overflow={settings.DB_MAX_OVERFLOW})")
+    except (SQLAlchemyError, OSError) as e:
+        logger.error(f"❌ DB(async) 커넥션 미리 열기 실패: {e}")
+    finally:
+        for conn in conns:
+            await conn.close()
+    return engine
+
+def dispose_db_engine():
+    """종료 시 풀의 커넥션을 모두 닫는다"""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+async def dispose_async_db_engine():
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+def _pool_info(engine, counters: PoolCounters) -> dict:
+    stats = {
+        "checkouts": counters.checkouts,
+        "wait_avg_ms": round(counters.wait_total / counters.checkouts * 1000, 2) if counters.checkouts else None,
+        "wait_max_ms": round(counters.wait_max * 1000, 2),
+        "timeouts": counters.timeouts,
+        "connects": counters.connects,
+    }
+    if engine is None:
+        return {"initialized": False, **stats}
+    pool = engine.pool
+    limit = settings.DB_POOL_SIZE + max(settings.DB_MAX_OVERFLOW, 0)
+    return {
+        "initialized": True,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "limit": limit,
+        "saturation": round(pool.checkedout() / limit, 3) if limit else None,
+        **stats,
+    }
+
+def pool_stats() -> dict:
+    """동기/비동기 커넥션 풀 상태와 획득 대기 통계"""
+    return {
+        "sync": _pool_info(_engine, pool_counters),
+        "async": _pool_info(_async_engine, async_pool_counters),
+    }
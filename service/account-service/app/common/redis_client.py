@@ -0,0 +1,51 @@
+"""
+account-service 공용 Redis 클라이언트 (docker-compose의 redis 서비스)
+
+REDIS_URL이 비어 있거나 redis 패키지가 없으면 None을 반환하고,
+호출 측은 프로세스 내 상태만으로 동작한다.
+set_redis()로 로컬 Redis 대체 구현(fakeredis 등)을 주입해 테스트할 수 있다.
+"""
+import logging
+from typing import Optional
+
+from .config import settings
+
+logger = logging.getLogger("redis")
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis 미설치 시 비활성
+    aioredis = None
+
+_client = None
+
+
+def get_redis():
+    """REDIS_URL 기반 공유 클라이언트 (없으면 None)"""
+    global _client
+    if _client is None and settings.REDIS_URL:
+        if aioredis is None:
+            logger.warning("redis 패키지가 없어 Redis 연동을 사용하지 않습니다.")
+            return None
+        _client = aioredis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_TIMEOUT,
+        )
+    return _client
+
+
+def set_redis(client: Optional[object]):
+    """클라이언트 교체 (로컬 Redis 대체 구현 주입용)"""
+    global _client
+    _client = client
+
+
+async def close_redis():
+    global _client
+    if _client is not None:
+        try:
+            await _client.aclose()
+        except Exception as e:
+            logger.warning(f"Redis 종료 실패: {e}")
+        _client = None
@@ -1,15 +1,203 @@
 """
 보안 관련 유틸리티 함수들
+
+bcrypt 해시/검증은 CPU를 수십~수백 ms 쓰므로 이벤트 루프가 아닌 전용 스레드 풀(HASH_WORKERS)에서 실행한다.
+bcrypt는 해시 중 GIL을 놓기 때문에 스레드로도 코어 수만큼 병렬 처리된다.
+실행 중 + 대기 중 작업이 HASH_WORKERS + HASH_MAX_QUEUE를 넘으면 기다리지 않고 HashPoolSaturated를 올린다(→ 503).
+대기 시간(queue wait)과 해시 시간은 따로 집계한다 (hash_pool.stats()).
+일괄 가입(hash_passwords_async)은 한 번에 HASH_WORKERS개까지만 넣고, 풀이 가득 차면 거절 대신 잠시 물러나
+로그인 같은 대화형 요청이 뒤에 오래 밀리지 않게 한다.
+
+bcrypt cost(rounds)는 시작 시 BCRYPT_TARGET_MS에 맞춰 보정한다 (BCRYPT_ROUNDS로 고정 가능).
+해시 문자열에 cost가 들어 있으므로, 로그인 성공 시 needs_update()가 True면
+(cost가 보정값 ± BCRYPT_ROUNDS_SLACK 밖) 새 cost로 다시 해시해 저장한다.
 """
+from concurrent.futures import Future, ThreadPoolExecutor
+from passlib.context import CryptContext
 from passlib.hash import bcrypt
+from typing import Dict, List, Optional
+from .config import settings
+import asyncio
 import logging
+import threading
+import time
 
 logger = logging.getLogger("security")
 
+# 대기 모드(wait=True)에서 풀이 가득 찼을 때 다시 시도하기까지의 간격(초)
+SATURATED_BACKOFF = 0.05
+
+
+class HashPoolSaturated(Exception):
+    """해시 풀 대기열이 가득 참 (잠시 후 재시도)"""
+
+
+class HashTimings:
+    """작업 종류(hash/verify)별 대기/실행 시간 (워커 스레드에서 갱신, 락으로 보호)"""
+
+    def __init__(self):
+        self.count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+        self.run_max = 0.0
+
+    def record(self, wait: float, run: float):
+        self.count += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.run_total += run
+        self.run_max = max(self.run_max, run)
+
+    def summary(self) -> dict:
+        n = self.count
+        return {
+            "count": n,
+            "wait_avg_ms": round(self.wait_total / n * 1000, 2) if n else None,
+            "wait_max_ms": round(self.wait_max * 1000, 2),
+            "run_avg_ms": round(self.run_total / n * 1000, 2) if n else None,
+            "run_max_ms": round(self.run_max * 1000, 2),
+        }
+
+
+class HashPool:
+    """크기와 대기열 길이가 제한된 bcrypt 전용 스레드 풀"""
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.pending = 0          # 실행 중 + 대기 중
+        self.rejected = 0
+        self._timings: Dict[str, HashTimings] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def _run(self, op: str, fn, args, submitted: float):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._timings.setdefault(op, HashTimings()).record(started - submitted, finished - started)
+
+    def _finished(self, future: Future):
+        # 실행이 끝났거나, 시작 전에 취소된 경우(요청 취소) 모두 여기서 반납
+        with self._lock:
+            self.pending -= 1
+
+    async def run(self, op: str, fn, *args, wait: bool = False):
+        """fn(*args)를 풀에서 실행. 가득 차 있으면 HashPoolSaturated, wait=True면 자리가 날 때까지 기다린다"""
+        while True:
+            with self._lock:
+                if self.pending < self.workers + self.max_queue:
+                    self.pending += 1
+                    break
+                if not wait:
+                    self.rejected += 1
+                    raise HashPoolSaturated(f"hash pool saturated ({self.pending} pending)")
+            await asyncio.sleep(SATURATED_BACKOFF)
+        try:
+            future = self._get_executor().submit(self._run, op, fn, args, time.perf_counter())
+        except RuntimeError:
+            with self._lock:
+                self.pending -= 1
+            raise
+        future.add_done_callback(self._finished)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "pending": self.pending,
+                "rejected": self.rejected,
+                **{op: t.summary() for op, t in self._timings.items()},
+            }
+
+
+hash_pool = HashPool(settings.HASH_WORKERS, settings.HASH_MAX_QUEUE)
+
+# cost는 configure_bcrypt()/init_bcrypt()로 정한다 (그 전에는 passlib 기본값)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+bcrypt_policy: Dict[str, Optional[float]] = {"rounds": None, "hash_ms": None, "target_ms": settings.BCRYPT_TARGET_MS}
+
+def configure_bcrypt(rounds: int, slack: int = 0):
+    """새 해시의 cost를 rounds로 정하고, rounds ± slack 밖의 해시는 needs_update 대상으로 만든다"""
+    pwd_context.update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=min(rounds, max(settings.BCRYPT_MIN_ROUNDS, rounds - slack)),
+        bcrypt__max_rounds=rounds + slack,
+    )
+    bcrypt_policy["rounds"] = rounds
+
+def _time_hash(rounds: int) -> float:
+    started = time.perf_counter()
+    bcrypt.using(rounds=rounds).hash("cost-calibration")
+    return time.perf_counter() - started
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int, max_rounds: int):
+    """해시 한 번이 target_ms를 넘지 않는 가장 큰 cost. (rounds, 그 cost의 실측 ms).
+    cost가 1 오를 때마다 시간이 2배이므로 min_rounds에서 한 번 재고 외삽한 뒤 결과 cost를 다시 잰다"""
+    base = min(_time_hash(min_rounds) for _ in range(2))
+    rounds = min_rounds
+    while rounds < max_rounds and base * 2 ** (rounds + 1 - min_rounds) * 1000 <= target_ms:
+        rounds += 1
+    measured = base if rounds == min_rounds else _time_hash(rounds)
+    return rounds, measured * 1000
+
+async def init_bcrypt():
+    """시작 시 cost 결정 (BCRYPT_ROUNDS가 있으면 그대로, 없으면 해시 풀에서 보정)"""
+    if settings.BCRYPT_ROUNDS:
+        configure_bcrypt(settings.BCRYPT_ROUNDS, settings.BCRYPT_ROUNDS_SLACK)
+        logger.info(f"🔐 bcrypt cost 고정: {settings.BCRYPT_ROUNDS}")
+        return
+    rounds, hash_ms = await hash_pool.run(
+        "calibrate", calibrate_bcrypt_rounds,
+        settings.BCRYPT_TARGET_MS, settings.BCRYPT_MIN_ROUNDS, settings.BCRYPT_MAX_ROUNDS,
+    )
+    configure_bcrypt(rounds, settings.BCRYPT_ROUNDS_SLACK)
+    bcrypt_policy["hash_ms"] = round(hash_ms, 1)
+    logger.info(f"🔐 bcrypt cost 보정: {rounds} ({hash_ms:.0f}ms, 목표 {settings.BCRYPT_TARGET_MS:.0f}ms)")
+
 def hash_password(plain_password: str) -> str:
-    """비밀번호 해시화"""
-    return bcrypt.hash(plain_password)
+    """비밀번호 해시화 (동기, 스크립트용)"""
+    return pwd_context.hash(plain_password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """비밀번호 검증"""
-    return bcrypt.verify(plain_password, hashed_password)
+    """비밀번호 검증 (동기, 스크립트용)"""
+    return pwd_context.verify(plain_password, hashed_password)
+
+def needs_rehash(hashed_password: str) -> bool:
+    """현재 cost 정책과 다른 해시인지 (해시 문자열만 보므로 가볍다)"""
+    return pwd_context.needs_update(hashed_password)
+
+async def hash_password_async(plain_password: str) -> str:
+    """비밀번호 해시화 (해시 풀에서 실행, 포화 시 HashPoolSaturated)"""
+    return await hash_pool.run("hash", hash_password, plain_password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """비밀번호 검증 (해시 풀에서 실행, 포화 시 HashPoolSaturated)"""
+    return await hash_pool.run("verify", verify_password, plain_password, hashed_password)
+
+async def hash_passwords_async(plain_passwords: List[str]) -> List[str]:
+    """여러 비밀번호를 해시 풀에서 병렬로 해시 (일괄 가입용, 입력 순서대로 반환).
+    동시에 HASH_WORKERS개까지만 넣으므로 그 사이 들어온 로그인은 해시 하나만큼만 기다린다"""
+    semaphore = asyncio.Semaphore(hash_pool.workers)
+
+    async def one(plain_password: str) -> str:
+        async with semaphore:
+            return await hash_pool.run("bulk_hash", hash_password, plain_password, wait=True)
+
+    return list(await asyncio.gather(*(one(p) for p in plain_passwords)))
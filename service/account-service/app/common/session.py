@@ -0,0 +1,244 @@
+"""
+세션 저장소
+
+로그인 시 불투명 토큰(secrets.token_urlsafe)을 발급해 session_token 쿠키로 내려주고,
+Redis의 {SESSION_REDIS_PREFIX}{token}에 JSON(user_id, company_id, created_at, expires_at)으로 저장한다.
+게이트웨이 AUTH_MODE=redis 가 같은 키를 읽어 엣지에서 검증한다.
+
+- 유휴 만료(sliding): Redis TTL은 SESSION_TTL이고, 조회될 때 SESSION_REFRESH_INTERVAL마다 TTL을 다시 늘린다
+- 절대 만료: created_at + SESSION_MAX_AGE (expires_at)를 넘으면 연장하지 않는다
+- 조회 결과(무효 포함)는 SESSION_CACHE_TTL 동안 프로세스 내 LRU에 두어 /profile 등 반복 확인에 네트워크 왕복이 없다
+- 로그아웃: 키 삭제 + SESSION_REVOKE_CHANNEL로 토큰 publish → 게이트웨이/다른 레플리카가 로컬 캐시에서 즉시 제거
+REDIS_URL이 없으면 프로세스 메모리에만 저장한다 (단일 레플리카 개발용).
+"""
+import asyncio
+import json
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, Tuple
+
+from .config import settings
+from .redis_client import get_redis
+
+logger = logging.getLogger("session")
+
+
+class SessionStoreUnavailable(Exception):
+    """Redis 세션 저장소 조회/저장 실패"""
+
+
+@dataclass
+class Session:
+    token: str
+    user_id: str
+    company_id: Optional[str]
+    created_at: float
+    expires_at: float
+
+    def record(self) -> str:
+        return json.dumps({"user_id": self.user_id, "company_id": self.company_id,
+                           "created_at": self.created_at, "expires_at": self.expires_at})
+
+
+@dataclass
+class SessionStats:
+    created: int = 0
+    valid: int = 0
+    invalid: int = 0
+    revoked: int = 0
+    refreshed: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    store_errors: int = 0
+
+
+class SessionManager:
+    """세션 발급/검증/폐기 (이벤트 루프 단일 스레드 전제, 락 없음)"""
+
+    def __init__(self, ttl: float, max_age: float, refresh_interval: float,
+                 cache_ttl: float = 30.0, cache_max: int = 10000, prefix: str = "session:",
+                 revoke_channel: str = "session:revoked"):
+        self.ttl = ttl
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self.cache_ttl = cache_ttl
+        self.cache_max = cache_max
+        self.prefix = prefix
+        self.revoke_channel = revoke_channel
+        self.counters = SessionStats()
+        # 토큰 → (캐시 만료 시각, Session 또는 None)
+        self._cache: "OrderedDict[str, Tuple[float, Optional[Session]]]" = OrderedDict()
+        # 토큰 → 마지막으로 TTL을 늘린 시각
+        self._refreshed: Dict[str, float] = {}
+        # REDIS_URL이 없을 때의 저장소: 토큰 → (유휴 만료 시각, Session)
+        self._local: Dict[str, Tuple[float, Session]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    async def create(self, user_id: str, company_id: Optional[str]) -> Session:
+        now = time.time()
+        session = Session(secrets.token_urlsafe(32), user_id, company_id, now, now + self.max_age)
+        client = get_redis()
+        if client is None:
+            if len(self._local) >= self.cache_max:
+                self._local = {t: e for t, e in self._local.items() if e[0] > now}
+            self._local[session.token] = (now + self.ttl, session)
+        else:
+            try:
+                await client.set(self.prefix + session.token, session.record(), ex=int(self._ttl_for(session, now)))
+            except Exception as e:
+                self.counters.store_errors += 1
+                raise SessionStoreUnavailable(str(e)) from e
+        self._refreshed[session.token] = now
+        self._remember(session.token, session, now)
+        self.counters.created += 1
+        return session
+
+    async def get(self, token: Optional[str]) -> Optional[Session]:
+        """유효한 세션 또는 None. 저장소를 조회할 수 없으면 SessionStoreUnavailable"""
+        if not token:
+            return None
+        now = time.time()
+        cached = self._cache.get(token)
+        if cached is not None and cached[0] > now:
+            self.counters.cache_hits += 1
+            self._cache.move_to_end(token)
+            session = cached[1]
+        else:
+            self.counters.cache_misses += 1
+            session = await self._load(token, now)
+            self._remember(token, session, now)
+
+        if session is None or session.expires_at <= now:
+            self.counters.invalid += 1
+            return None
+        self.counters.valid += 1
+        if now - self._refreshed.get(token, 0.0) >= self.refresh_interval:
+            await self._touch(session, now)
+        return session
+
+    async def revoke(self, token: Optional[str]) -> bool:
+        """세션 폐기. 다른 레플리카와 게이트웨이에도 알린다"""
+        if not token:
+            return False
+        self._forget(token)
+        self.counters.revoked += 1
+        client = get_redis()
+        if client is None:
+            return self._local.pop(token, None) is not None
+        try:
+            deleted = await client.delete(self.prefix + token)
+            await client.publish(self.revoke_channel, token)
+        except Exception as e:
+            self.counters.store_errors += 1
+            raise SessionStoreUnavailable(str(e)) from e
+        return bool(deleted)
+
+    def _ttl_for(self, session: Session, now: float) -> float:
+        return max(1.0, min(self.ttl, session.expires_at - now))
+
+    async def _load(self, token: str, now: float) -> Optional[Session]:
+        client = get_redis()
+        if client is None:
+            entry = self._local.get(token)
+            if entry is None or entry[0] <= now:
+                self._local.pop(token, None)
+                return None
+            return entry[1]
+        try:
+            raw = await client.get(self.prefix + token)
+        except Exception as e:
+            self.counters.store_errors += 1
+            raise SessionStoreUnavailable(str(e)) from e
+        if not raw:
+            return None
+        try:
+            data = json.loads(raw)
+            return Session(token, str(data["user_id"]), data.get("company_id"),
+                           float(data.get("created_at", now)), float(data.get("expires_at", now + self.max_age)))
+        except (ValueError, KeyError, TypeError):
+            logger.warning("세션 저장소 값 형식 오류")
+            return None
+
+    async def _touch(self, session: Session, now: float):
+        """유휴 만료 연장 (절대 만료를 넘기지 않음). 실패해도 요청은 통과"""
+        self._refreshed[session.token] = now
+        ttl = self._ttl_for(session, now)
+        client = get_redis()
+        if client is None:
+            if session.token in self._local:
+                self._local[session.token] = (now + ttl, session)
+            return
+        try:
+            await client.expire(self.prefix + session.token, int(ttl))
+            self.counters.refreshed += 1
+        except Exception as e:
+            self.counters.store_errors += 1
+            logger.warning(f"세션 만료 연장 실패: {e}")
+
+    def _remember(self, token: str, session: Optional[Session], now: float):
+        expires = now + self.cache_ttl
+        if session is not None:
+            expires = min(expires, session.expires_at)
+        self._cache[token] = (expires, session)
+        self._cache.move_to_end(token)
+        while len(self._cache) > self.cache_max:
+            evicted, _ = self._cache.popitem(last=False)
+            self._refreshed.pop(evicted, None)
+
+    def _forget(self, token: str):
+        self._cache.pop(token, None)
+        self._refreshed.pop(token, None)
+
+    async def start(self):
+        """폐기 채널 구독 시작 (다른 레플리카에서 로그아웃한 세션을 로컬 캐시에서 제거)"""
+        if get_redis() is not None and self._listener is None:
+            self._listener = asyncio.ensure_future(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _listen(self):
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.subscribe(self.revoke_channel)
+                logger.info(f"🔑 세션 폐기 채널 구독: {self.revoke_channel}")
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None and message["type"] == "message":
+                        data = message["data"]
+                        self._forget(data.decode() if isinstance(data, bytes) else str(data))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"세션 폐기 채널 오류, 재구독 대기: {e}")
+                await asyncio.sleep(5)
+            finally:
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "store": "redis" if get_redis() is not None else "memory",
+            **asdict(self.counters),
+            "cached": len(self._cache),
+        }
+
+
+session_manager = SessionManager(
+    ttl=settings.SESSION_TTL,
+    max_age=settings.SESSION_MAX_AGE,
+    refresh_interval=settings.SESSION_REFRESH_INTERVAL,
+    cache_ttl=settings.SESSION_CACHE_TTL,
+    cache_max=settings.SESSION_CACHE_MAX,
+    prefix=settings.SESSION_REDIS_PREFIX,
+    revoke_channel=settings.SESSION_REVOKE_CHANNEL,
+)
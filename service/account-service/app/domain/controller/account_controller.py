@@ -2,8 +2,8 @@
 Account Controller - 순수한 비즈니스 로직 처리
 """
 import logging
-from ..model.account_model import LoginData, SignupData, AccountResponse
-from ..service.account_service import AccountService
+from ..model.account_model import LoginData, SignupData, AccountResponse, BulkSignupResponse
+from ..service.account_service import AccountService, parse_signup_rows
 
 logger = logging.getLogger("account-controller")
 
@@ -11,10 +11,15 @@ class AccountController:
     def __init__(self, account_service: AccountService):
         self.account_service = account_service
     
-    def signup(self, signup_data: SignupData) -> AccountResponse:
+    async def signup(self, signup_data: SignupData) -> AccountResponse:
         """회원가입 처리"""
-        return self.account_service.signup(signup_data)
+        return await self.account_service.signup(signup_data)
     
-    def login(self, login_data: LoginData) -> AccountResponse:
+    async def bulk_signup(self, body: bytes, content_type: str) -> BulkSignupResponse:
+        """일괄 가입 처리 (CSV / JSON Lines / JSON 배열)"""
+        rows, skipped = parse_signup_rows(body, content_type)
+        return await self.account_service.bulk_signup(rows, skipped)
+
+    async def login(self, login_data: LoginData) -> AccountResponse:
         """로그인 처리"""
-        return self.account_service.login(login_data)
+        return await self.account_service.login(login_data)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class LoginData(BaseModel):
     user_id: str
@@ -15,3 +15,17 @@ class AccountResponse(BaseModel):
     message: str
     user_id: str
     company_id: Optional[str] = None
+
+class BulkSignupIssue(BaseModel):
+    row: int                       # 입력의 줄 번호 (CSV는 헤더가 1번 줄)
+    user_id: Optional[str] = None
+    reason: str                    # invalid | duplicate | conflict
+    detail: Optional[str] = None
+
+class BulkSignupResponse(BaseModel):
+    status: str
+    total: int
+    created: int
+    skipped: List[BulkSignupIssue]
+    hash_ms: float
+    insert_ms: float
@@ -1,13 +1,31 @@
 """
 Account Repository - 순수한 데이터 접근 로직
+
+- AccountRepository: 동기 엔진(psycopg2). alembic, 스크립트, 비동기 드라이버가 없을 때 사용
+- AsyncAccountRepository: AsyncEngine(asyncpg). 쿼리 대기 중에도 이벤트 루프를 막지 않는다
 """
-from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Set, Tuple
+from ..statement.account_statement import (
+    COUNT_USERS, INSERT_USER, INSERT_USERS, SELECT_EXISTING_USER_IDS, SELECT_USER, UPDATE_PASSWORD,
+)
 
 logger = logging.getLogger("account-repository")
 
+def _user_row(row) -> Optional[Dict[str, Any]]:
+    if row:
+        return {
+            "user_id": row.user_id,
+            "company_id": row.company_id,
+            "user_pw": row.user_pw
+        }
+    return None
+
+def _bulk_params(users: List[Tuple[str, str, str]]) -> Dict[str, list]:
+    user_ids, user_pws, company_ids = (list(column) for column in zip(*users))
+    return {"user_ids": user_ids, "user_pws": user_pws, "company_ids": company_ids}
+
 class AccountRepository:
     def __init__(self, engine):
         self.engine = engine
@@ -17,8 +35,7 @@ class AccountRepository:
         try:
             with self.engine.connect() as conn:
                 conn.execute(
-                    text("""INSERT INTO auth (user_id, user_pw, company_id)
-                            VALUES (:user_id, :user_pw, :company_id)"""),
+                    INSERT_USER,
                     {"user_id": user_id, "user_pw": hashed_password, "company_id": company_id},
                 )
                 conn.commit()
@@ -34,19 +51,8 @@ class AccountRepository:
         """사용자 조회"""
         try:
             with self.engine.connect() as conn:
-                row = conn.execute(
-                    text("""SELECT user_id, company_id, user_pw
-                            FROM auth WHERE user_id = :user_id"""),
-                    {"user_id": user_id},
-                ).fetchone()
-            
-            if row:
-                return {
-                    "user_id": row.user_id,
-                    "company_id": row.company_id,
-                    "user_pw": row.user_pw
-                }
-            return None
+                row = conn.execute(SELECT_USER, {"user_id": user_id}).fetchone()
+            return _user_row(row)
         except SQLAlchemyError as e:
             logger.error(f"Database error during user retrieval: {e}")
             raise
@@ -55,8 +61,123 @@ class AccountRepository:
         """사용자 수 조회"""
         try:
             with self.engine.connect() as conn:
-                count = conn.execute(text("SELECT COUNT(*) FROM auth")).scalar()
+                count = conn.execute(COUNT_USERS).scalar()
             return count
         except SQLAlchemyError as e:
             logger.error(f"Database error during count retrieval: {e}")
             raise
+
+    def update_password(self, user_id: str, hashed_password: str) -> bool:
+        """비밀번호 해시 교체 (재해시)"""
+        try:
+            with self.engine.connect() as conn:
+                result = conn.execute(UPDATE_PASSWORD, {"user_id": user_id, "user_pw": hashed_password})
+                conn.commit()
+            return result.rowcount > 0
+        except SQLAlchemyError as e:
+            logger.error(f"Database error during password update: {e}")
+            raise
+
+    def get_existing_user_ids(self, user_ids: List[str]) -> Set[str]:
+        """이미 있는 user_id (일괄 가입 시 해시 전에 충돌 행을 거르는 용도)"""
+        if not user_ids:
+            return set()
+        try:
+            with self.engine.connect() as conn:
+                rows = conn.execute(SELECT_EXISTING_USER_IDS, {"user_ids": user_ids}).fetchall()
+            return {row.user_id for row in rows}
+        except SQLAlchemyError as e:
+            logger.error(f"Database error during existing user lookup: {e}")
+            raise
+
+    def create_users(self, users: List[Tuple[str, str, str]]) -> Set[str]:
+        """(user_id, 해시된 비밀번호, company_id) 목록을 한 트랜잭션/한 문장으로 생성.
+        이미 있는 user_id는 건너뛰고, 실제로 생성된 user_id를 돌려준다"""
+        if not users:
+            return set()
+        try:
+            with self.engine.begin() as conn:
+                rows = conn.execute(INSERT_USERS, _bulk_params(users)).fetchall()
+            return {row.user_id for row in rows}
+        except SQLAlchemyError as e:
+            logger.error(f"Database error during bulk user creation: {e}")
+            raise
+
+class AsyncAccountRepository:
+    """AccountRepository와 같은 메서드를 코루틴으로 제공"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def create_user(self, user_id: str, hashed_password: str, company_id: str) -> bool:
+        """사용자 생성 (해시된 비밀번호를 받음)"""
+        try:
+            async with self.engine.connect() as conn:
+                await conn.execute(
+                    INSERT_USER,
+                    {"user_id": user_id, "user_pw": hashed_password, "company_id": company_id},
+                )
+                await conn.commit()
+            return True
+        except IntegrityError:
+            logger.warning(f"User already exists: {user_id}")
+            return False
+        except SQLAlchemyError as e:
+            logger.error(f"Database error during user creation: {e}")
+            raise
+
+    async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """사용자 조회"""
+        try:
+            async with self.engine.connect() as conn:
+                row = (await conn.execute(SELECT_USER, {"user_id": user_id})).fetchone()
+            return _user_row(row)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error during user retrieval: {e}")
+            raise
+
+    async def get_user_count(self) -> int:
+        """사용자 수 조회"""
+        try:
+            async with self.engine.connect() as conn:
+                count = (await conn.execute(COUNT_USERS)).scalar()
+            return count
+        except SQLAlchemyError as e:
+            logger.error(f"Database error during count retrieval: {e}")
+            raise
+
+    async def update_password(self, user_id: str, hashed_password: str) -> bool:
+        """비밀번호 해시 교체 (재해시)"""
+        try:
+            async with self.engine.connect() as conn:
+                result = await conn.execute(UPDATE_PASSWORD, {"user_id": user_id, "user_pw": hashed_password})
+                await conn.commit()
+            return result.rowcount > 0
+        except SQLAlchemyError as e:
+            logger.error(f"Database error during password update: {e}")
+            raise
+
+    async def get_existing_user_ids(self, user_ids: List[str]) -> Set[str]:
+        """이미 있는 user_id (일괄 가입 시 해시 전에 충돌 행을 거르는 용도)"""
+        if not user_ids:
+            return set()
+        try:
+            async with self.engine.connect() as conn:
+                rows = (await conn.execute(SELECT_EXISTING_USER_IDS, {"user_ids": user_ids})).fetchall()
+            return {row.user_id for row in rows}
+        except SQLAlchemyError as e:
+            logger.error(f"Database error during existing user lookup: {e}")
+            raise
+
+    async def create_users(self, users: List[Tuple[str, str, str]]) -> Set[str]:
+        """(user_id, 해시된 비밀번호, company_id) 목록을 한 트랜잭션/한 문장으로 생성.
+        이미 있는 user_id는 건너뛰고, 실제로 생성된 user_id를 돌려준다"""
+        if not users:
+            return set()
+        try:
+            async with self.engine.begin() as conn:
+                rows = (await conn.execute(INSERT_USERS, _bulk_params(users))).fetchall()
+            return {row.user_id for row in rows}
+        except SQLAlchemyError as e:
+            logger.error(f"Database error during bulk user creation: {e}")
+            raise
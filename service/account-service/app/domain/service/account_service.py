@@ -2,27 +2,118 @@
 Account Service - 비즈니스 로직 및 보안 처리
 """
 from fastapi import HTTPException
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+import csv
+import inspect
+import io
+import json
 import logging
-from typing import Dict, Any
-from ..repository.account_repository import AccountRepository
-from ..model.account_model import LoginData, SignupData, AccountResponse
-from ...common.security import hash_password, verify_password
+import time
+from typing import Dict, Any, List, Tuple, Union
+from ..repository.account_repository import AccountRepository, AsyncAccountRepository
+from ..model.account_model import LoginData, SignupData, AccountResponse, BulkSignupIssue, BulkSignupResponse
+from ...common.config import settings
+from ...common.security import (
+    HashPoolSaturated, hash_password_async, hash_passwords_async, needs_rehash, verify_password_async,
+)
 
 logger = logging.getLogger("account-service")
 
+CSV_TYPES = ("text/csv", "application/csv")
+JSONL_TYPES = ("application/x-ndjson", "application/jsonl", "application/x-jsonlines")
+SIGNUP_FIELDS = ("user_id", "user_pw", "company_id")
+
+def _signup_row(row: int, record, skipped: List[BulkSignupIssue]):
+    """한 행 검증. 잘못된 행은 skipped에 기록하고 None"""
+    user_id = record.get("user_id") if isinstance(record, dict) else None
+    try:
+        if not isinstance(record, dict):
+            raise ValueError("행이 객체가 아닙니다.")
+        data = SignupData(**record)
+        if not data.user_id.strip() or not data.user_pw:
+            raise ValueError("user_id와 user_pw는 비어 있을 수 없습니다.")
+        return data
+    except ValidationError as e:
+        error = e.errors()[0]
+        detail = f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+    except (ValueError, TypeError) as e:
+        detail = str(e)
+    skipped.append(BulkSignupIssue(row=row, user_id=str(user_id) if user_id else None, reason="invalid", detail=detail))
+    return None
+
+def _records(body: bytes, content_type: str):
+    """(줄 번호, 레코드) 생성. CSV(헤더 필수), JSON Lines, JSON 배열"""
+    media_type = content_type.split(";")[0].strip().lower()
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="UTF-8 텍스트가 아닙니다.")
+    if media_type in CSV_TYPES:
+        reader = csv.DictReader(io.StringIO(text))
+        missing = [f for f in SIGNUP_FIELDS if f not in (reader.fieldnames or [])]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"CSV 헤더에 필요한 열이 없습니다: {', '.join(missing)}")
+        for record in reader:
+            yield reader.line_num, {f: record[f] for f in SIGNUP_FIELDS if record.get(f) is not None}
+    elif media_type in JSONL_TYPES:
+        for line_no, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError:
+                yield line_no, None
+    elif media_type == "application/json":
+        try:
+            records = json.loads(text)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="JSON 형식이 올바르지 않습니다.")
+        if not isinstance(records, list):
+            raise HTTPException(status_code=400, detail="JSON 본문은 배열이어야 합니다.")
+        yield from enumerate(records, 1)
+    else:
+        raise HTTPException(status_code=415, detail="text/csv, application/x-ndjson, application/json만 지원합니다.")
+
+def parse_signup_rows(body: bytes, content_type: str) -> Tuple[List[Tuple[int, SignupData]], List[BulkSignupIssue]]:
+    """일괄 가입 본문 → (유효한 행 목록, 잘못된 행). 행 수가 BULK_SIGNUP_MAX_ROWS를 넘으면 413"""
+    rows: List[Tuple[int, SignupData]] = []
+    skipped: List[BulkSignupIssue] = []
+    for count, (row, record) in enumerate(_records(body, content_type), 1):
+        if count > settings.BULK_SIGNUP_MAX_ROWS:
+            raise HTTPException(status_code=413, detail=f"한 번에 최대 {settings.BULK_SIGNUP_MAX_ROWS}행까지 가입할 수 있습니다.")
+        data = _signup_row(row, record, skipped)
+        if data is not None:
+            rows.append((row, data))
+    return rows, skipped
+
+def _busy(e: HashPoolSaturated) -> HTTPException:
+    """해시 풀 포화: 대기열에 쌓지 않고 바로 503"""
+    logger.warning(f"Hash pool saturated: {e}")
+    return HTTPException(status_code=503, detail="요청이 많아 잠시 후 다시 시도해 주세요.",
+                         headers={"Retry-After": "1"})
+
 class AccountService:
-    def __init__(self, account_repository: AccountRepository):
+    def __init__(self, account_repository: Union[AccountRepository, AsyncAccountRepository]):
         self.account_repository = account_repository
+
+    async def _repo(self, name: str, *args):
+        """저장소 호출. 동기 저장소는 스레드풀에서 실행해 이벤트 루프를 막지 않는다"""
+        method = getattr(self.account_repository, name)
+        if inspect.iscoroutinefunction(method):
+            return await method(*args)
+        return await run_in_threadpool(method, *args)
     
-    def signup(self, signup_data: SignupData) -> AccountResponse:
+    async def signup(self, signup_data: SignupData) -> AccountResponse:
         """회원가입 서비스"""
         logger.info(f"Signup request: user_id={signup_data.user_id}, company_id={signup_data.company_id}")
         
         try:
             # 비밀번호 해시화
-            hashed_password = hash_password(signup_data.user_pw)
+            hashed_password = await hash_password_async(signup_data.user_pw)
             
-            success = self.account_repository.create_user(
+            success = await self._repo(
+                "create_user",
                 signup_data.user_id, 
                 hashed_password, 
                 signup_data.company_id
@@ -40,22 +131,88 @@ class AccountService:
                 
         except HTTPException:
             raise
+        except HashPoolSaturated as e:
+            raise _busy(e)
         except Exception as e:
             logger.error(f"Signup service error: {e}")
             raise HTTPException(status_code=500, detail=f"회원가입 실패: {str(e)}")
     
-    def login(self, login_data: LoginData) -> AccountResponse:
+    async def bulk_signup(self, rows: List[Tuple[int, SignupData]], skipped: List[BulkSignupIssue]) -> BulkSignupResponse:
+        """일괄 가입 서비스.
+        입력 안 중복과 이미 있는 user_id를 먼저 걸러 해시 비용을 아끼고, 나머지를 병렬로 해시한 뒤
+        한 트랜잭션/한 문장으로 넣는다. 충돌 행은 건너뛰고 행 단위로 알려 준다 (배치 전체를 실패시키지 않음)"""
+        total = len(rows) + len(skipped)
+        logger.info(f"Bulk signup request: rows={total}")
+
+        try:
+            candidates: List[Tuple[int, SignupData]] = []
+            seen = set()
+            for row, data in rows:
+                if data.user_id in seen:
+                    skipped.append(BulkSignupIssue(row=row, user_id=data.user_id, reason="duplicate",
+                                                   detail="같은 요청 안에서 중복된 user_id입니다."))
+                else:
+                    seen.add(data.user_id)
+                    candidates.append((row, data))
+
+            existing = await self._repo("get_existing_user_ids", [data.user_id for _, data in candidates])
+            pending = []
+            for row, data in candidates:
+                if data.user_id in existing:
+                    skipped.append(BulkSignupIssue(row=row, user_id=data.user_id, reason="conflict",
+                                                   detail="이미 존재하는 사용자 ID입니다."))
+                else:
+                    pending.append((row, data))
+
+            started = time.perf_counter()
+            hashed = await hash_passwords_async([data.user_pw for _, data in pending])
+            hash_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            created = await self._repo(
+                "create_users",
+                [(data.user_id, pw, data.company_id) for (_, data), pw in zip(pending, hashed)],
+            )
+            insert_ms = (time.perf_counter() - started) * 1000
+
+            # 조회와 삽입 사이에 다른 요청이 같은 ID를 만든 경우
+            for row, data in pending:
+                if data.user_id not in created:
+                    skipped.append(BulkSignupIssue(row=row, user_id=data.user_id, reason="conflict",
+                                                   detail="이미 존재하는 사용자 ID입니다."))
+
+            skipped.sort(key=lambda issue: issue.row)
+            logger.info(f"Bulk signup done: created={len(created)}, skipped={len(skipped)}, "
+                        f"hash={hash_ms:.0f}ms, insert={insert_ms:.0f}ms")
+            return BulkSignupResponse(
+                status="success" if not skipped else "partial",
+                total=total,
+                created=len(created),
+                skipped=skipped,
+                hash_ms=round(hash_ms, 1),
+                insert_ms=round(insert_ms, 1),
+            )
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Bulk signup service error: {e}")
+            raise HTTPException(status_code=500, detail=f"일괄 가입 실패: {str(e)}")
+
+    async def login(self, login_data: LoginData) -> AccountResponse:
         """로그인 서비스"""
         logger.info(f"Login request: user_id={login_data.user_id}")
         
         try:
-            user = self.account_repository.get_user(login_data.user_id)
+            user = await self._repo("get_user", login_data.user_id)
             
             if not user:
                 raise HTTPException(status_code=401, detail="로그인 실패: 사용자 ID 또는 비밀번호가 올바르지 않습니다.")
             
             # 비밀번호 검증
-            if verify_password(login_data.user_pw, user["user_pw"]):
+            if await verify_password_async(login_data.user_pw, user["user_pw"]):
+                if needs_rehash(user["user_pw"]):
+                    await self._rehash(user["user_id"], login_data.user_pw)
                 return AccountResponse(
                     status="success",
                     message="로그인 성공",
@@ -67,14 +224,28 @@ class AccountService:
                 
         except HTTPException:
             raise
+        except HashPoolSaturated as e:
+            raise _busy(e)
         except Exception as e:
             logger.error(f"Login service error: {e}")
             raise HTTPException(status_code=500, detail=f"로그인 실패: {str(e)}")
     
-    def get_user_count(self) -> int:
+    async def _rehash(self, user_id: str, plain_password: str):
+        """cost 정책이 바뀐 해시를 새 cost로 교체. 실패해도 로그인은 성공시킨다"""
+        try:
+            new_hash = await hash_password_async(plain_password)
+            await self._repo("update_password", user_id, new_hash)
+            logger.info(f"Password rehashed: user_id={user_id}")
+        except HashPoolSaturated:
+            # 다음 로그인에서 다시 시도
+            logger.info(f"Rehash skipped (hash pool busy): user_id={user_id}")
+        except Exception as e:
+            logger.warning(f"Rehash failed: user_id={user_id}: {e}")
+
+    async def get_user_count(self) -> int:
         """사용자 수 조회"""
         try:
-            return self.account_repository.get_user_count()
+            return await self._repo("get_user_count")
         except Exception as e:
             logger.error(f"Get user count error: {e}")
             raise
@@ -0,0 +1,26 @@
+"""
+Account SQL 문 - 동기/비동기 저장소가 같은 쿼리를 쓰도록 한곳에 모아 둔다
+"""
+from sqlalchemy import text
+
+INSERT_USER = text("""INSERT INTO auth (user_id, user_pw, company_id)
+                      VALUES (:user_id, :user_pw, :company_id)""")
+
+SELECT_USER = text("""SELECT user_id, company_id, user_pw
+                      FROM auth WHERE user_id = :user_id""")
+
+COUNT_USERS = text("SELECT COUNT(*) FROM auth")
+
+UPDATE_PASSWORD = text("UPDATE auth SET user_pw = :user_pw WHERE user_id = :user_id")
+
+# 일괄 가입: 배열 파라미터 3개를 unnest로 펼쳐 한 문장/한 번의 왕복으로 넣는다 (행 수와 무관하게 파라미터 3개).
+# 이미 있는 user_id(auth_pkey 충돌)는 건너뛰고, 실제로 들어간 user_id만 돌려준다
+INSERT_USERS = text("""INSERT INTO auth (user_id, user_pw, company_id)
+                       SELECT * FROM unnest(CAST(:user_ids AS varchar[]),
+                                            CAST(:user_pws AS varchar[]),
+                                            CAST(:company_ids AS varchar[]))
+                       ON CONFLICT (user_id) DO NOTHING
+                       RETURNING user_id""")
+
+SELECT_EXISTING_USER_IDS = text("""SELECT user_id FROM auth
+                                   WHERE user_id = ANY(CAST(:user_ids AS varchar[]))""")
@@ -7,6 +7,14 @@ from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import logging, sys, traceback, os
 
+from .common.db import (
+    async_db_enabled, dispose_async_db_engine, dispose_db_engine, init_async_db_engine, init_db_engine, pool_stats,
+)
+from .common.deadline import DeadlineMiddleware
+from .common.redis_client import close_redis
+from .common.security import bcrypt_policy, hash_pool, init_bcrypt
+from .common.session import session_manager
+
 # ---------- Logging ----------
 logging.basicConfig(
     level=logging.INFO,
@@ -36,19 +44,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 게이트웨이 마감 시간(X-Request-Timeout-Ms) 적용, 연결이 끊기면 처리 취소
+app.add_middleware(DeadlineMiddleware)
+
 # ---------- Import Routers ----------
 from .router.account_router import account_router
 
 # ---------- Include Routers ----------
 app.include_router(account_router)
 
+# ---------- DB 엔진 (프로세스당 1개, 시작 시 커넥션 미리 열기) ----------
+@app.on_event("startup")
+async def startup():
+    if async_db_enabled():
+        await init_async_db_engine()
+    else:
+        init_db_engine()
+    await init_bcrypt()
+    await session_manager.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await session_manager.stop()
+    await close_redis()
+    await dispose_async_db_engine()
+    dispose_db_engine()
+    hash_pool.shutdown()
+
+@app.get("/health/db", summary="DB 커넥션 풀 상태")
+def db_pool_health():
+    return pool_stats()
+
+@app.get("/health/hash", summary="bcrypt 해시 풀 상태 (대기/해시 시간)")
+def hash_pool_health():
+    return {**hash_pool.stats(), "bcrypt": bcrypt_policy}
+
+@app.get("/health/session", summary="세션 저장소 상태 (캐시 적중/폐기)")
+def session_health():
+    return session_manager.stats()
+
 # ---------- Root Route ----------
 @app.get("/", summary="Root")
 def root():
     return {
         "status": "ok", 
         "service": "account-service", 
-        "endpoints": ["/login", "/signup", "/logout", "/profile"]
+        "endpoints": ["/login", "/signup", "/users/import", "/logout", "/profile"]
     }
 
 # ---------- Middleware ----------
@@ -1,25 +1,29 @@
 """
 Account Router - API 엔드포인트 및 의존성 주입
 """
-from fastapi import APIRouter, Cookie, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from fastapi.responses import JSONResponse
-from typing import Optional
+from typing import Union
 from ..domain.controller.account_controller import AccountController
 from ..domain.service.account_service import AccountService
-from ..domain.repository.account_repository import AccountRepository
-from ..domain.model.account_model import LoginData, SignupData, AccountResponse
-from ..common.db import get_db_engine
+from ..domain.repository.account_repository import AccountRepository, AsyncAccountRepository
+from ..domain.model.account_model import LoginData, SignupData, AccountResponse, BulkSignupResponse
+from ..common.config import settings
+from ..common.db import async_db_enabled, get_async_db_engine, get_db_engine
+from ..common.session import SessionStoreUnavailable, session_manager
 import logging
 
 logger = logging.getLogger("account-router")
 
 # DI 함수들
-def get_account_repository() -> AccountRepository:
-    """Account Repository 인스턴스 생성"""
-    engine = get_db_engine()
-    return AccountRepository(engine)
+def get_account_repository() -> Union[AccountRepository, AsyncAccountRepository]:
+    """Account Repository 인스턴스 생성 (엔진/커넥션 풀은 프로세스 공용).
+    asyncpg를 쓸 수 있으면 AsyncEngine 기반, 아니면 동기 엔진 기반 저장소"""
+    if async_db_enabled():
+        return AsyncAccountRepository(get_async_db_engine())
+    return AccountRepository(get_db_engine())
 
-def get_account_service(repo: AccountRepository = Depends(get_account_repository)) -> AccountService:
+def get_account_service(repo: Union[AccountRepository, AsyncAccountRepository] = Depends(get_account_repository)) -> AccountService:
     """Account Service 인스턴스 생성"""
     return AccountService(repo)
 
@@ -36,52 +40,135 @@ async def signup(
     controller: AccountController = Depends(get_account_controller)
 ):
     """회원가입 API"""
-    return controller.signup(signup_data)
+    return await controller.signup(signup_data)
+
+async def _require_bulk_admin(request: Request):
+    """세션 쿠키로 호출자를 확인하고 BULK_SIGNUP_ADMINS에 있는지 검사한다 (없으면 401, 권한 없으면 403).
+    계정 서비스가 세션의 주인이므로 X-User-Id 헤더 대신 세션을 직접 조회한다"""
+    token = request.cookies.get(settings.SESSION_COOKIE)
+    if not token:
+        raise HTTPException(status_code=401, detail="인증 쿠키가 없습니다.")
+    try:
+        session = await session_manager.get(token)
+    except SessionStoreUnavailable as e:
+        raise _session_unavailable(e)
+    if session is None:
+        raise HTTPException(status_code=401, detail="세션이 만료되었거나 유효하지 않습니다.")
+    if session.user_id not in settings.BULK_SIGNUP_ADMINS:
+        logger.warning(f"🚫 일괄 가입 권한 없음: {session.user_id} ({session.company_id})")
+        raise HTTPException(status_code=403, detail="일괄 가입 권한이 없습니다.")
+    return session
+
+async def _read_body_limited(request: Request, limit: int) -> bytes:
+    """본문을 읽되 limit 바이트를 넘으면 더 읽지 않고 413 (Content-Length가 크면 읽기 전에 거절)"""
+    too_large = HTTPException(status_code=413, detail=f"요청 본문은 최대 {limit} 바이트까지 허용됩니다.")
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise too_large
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+@account_router.post("/users/import", response_model=BulkSignupResponse, summary="일괄 회원가입")
+async def bulk_signup(
+    request: Request,
+    controller: AccountController = Depends(get_account_controller)
+):
+    """
+    여러 사용자를 한 번에 가입시킵니다 (공급망 온보딩용).
+    BULK_SIGNUP_ADMINS에 등록된 관리자 세션만 호출할 수 있고, 본문은 BULK_SIGNUP_MAX_BYTES까지 받습니다.
+    본문: text/csv(헤더 user_id,user_pw,company_id), application/x-ndjson, 또는 application/json 배열.
+    이미 있거나 요청 안에서 중복된 user_id, 형식이 잘못된 행은 건너뛰고 skipped에 줄 번호와 함께 돌려줍니다.
+    행당 bcrypt 해시 한 번이 필요하므로 큰 파일은 게이트웨이 타임아웃(ACCOUNT_UPSTREAM_TIMEOUT) 안에 끝나도록 나눠 보냅니다.
+    """
+    admin = await _require_bulk_admin(request)
+    body = await _read_body_limited(request, settings.BULK_SIGNUP_MAX_BYTES)
+    logger.info(f"일괄 가입 요청: admin={admin.user_id}, {len(body)} bytes")
+    return await controller.bulk_signup(body, request.headers.get("content-type", ""))
+
+def _set_session_cookie(response: Response, token: str):
+    response.set_cookie(
+        key=settings.SESSION_COOKIE,
+        value=token,
+        max_age=settings.SESSION_MAX_AGE,
+        path="/",
+        domain=settings.SESSION_COOKIE_DOMAIN,
+        secure=settings.SESSION_COOKIE_SECURE,
+        httponly=True,
+        samesite=settings.SESSION_COOKIE_SAMESITE,
+    )
+
+def _session_unavailable(e: SessionStoreUnavailable) -> HTTPException:
+    logger.error(f"❌ 세션 저장소 오류: {e}")
+    return HTTPException(status_code=503, detail="세션 저장소를 사용할 수 없습니다.", headers={"Retry-After": "1"})
 
 @account_router.post("/login", response_model=AccountResponse, summary="로그인")
 async def login(
     login_data: LoginData,
+    response: Response,
     controller: AccountController = Depends(get_account_controller)
 ):
-    """로그인 API"""
-    return controller.login(login_data)
+    """로그인 API - 성공하면 세션을 만들고 session_token 쿠키(HttpOnly)를 내려준다"""
+    result = await controller.login(login_data)
+    try:
+        session = await session_manager.create(result.user_id, result.company_id)
+    except SessionStoreUnavailable as e:
+        raise _session_unavailable(e)
+    _set_session_cookie(response, session.token)
+    return result
 
 @account_router.post("/logout", summary="로그아웃")
-async def logout(session_token: Optional[str] = Cookie(None)):
+async def logout(request: Request):
     """
-    사용자를 로그아웃하고 인증 쿠키를 삭제합니다.
+    세션을 폐기하고 인증 쿠키를 삭제합니다.
+    폐기는 게이트웨이와 다른 레플리카에도 전파됩니다.
     """
-    print(f"로그아웃 요청 - 받은 세션 토큰: {session_token}")
-    
+    token = request.cookies.get(settings.SESSION_COOKIE)
+    try:
+        revoked = await session_manager.revoke(token)
+    except SessionStoreUnavailable as e:
+        raise _session_unavailable(e)
+    logger.info(f"로그아웃 - 세션 폐기: {revoked}")
+
     # 로그아웃 응답 생성
     response = JSONResponse({
         "success": True,
         "message": "로그아웃되었습니다."
     })
-    
-    # 인증 쿠키 삭제
+
+    # 인증 쿠키 삭제 (발급 때와 같은 path/domain)
     response.delete_cookie(
-        key="session_token",
+        key=settings.SESSION_COOKIE,
         path="/",
-        # domain 설정 제거 (로컬 환경)
+        domain=settings.SESSION_COOKIE_DOMAIN,
+        secure=settings.SESSION_COOKIE_SECURE,
+        httponly=True,
+        samesite=settings.SESSION_COOKIE_SAMESITE,
     )
-    
-    print("✅ 로그아웃 완료 - 인증 쿠키 삭제됨")
     return response
 
 @account_router.get("/profile", summary="사용자 프로필 조회")
-async def get_profile(session_token: Optional[str] = Cookie(None)):
+async def get_profile(request: Request):
     """
     세션 토큰으로 사용자 프로필을 조회합니다.
     세션 토큰이 없거나 유효하지 않으면 401 에러를 반환합니다.
     """
-    print(f"프로필 요청 - 받은 세션 토큰: {session_token}")
-    
-    if not session_token:
+    token = request.cookies.get(settings.SESSION_COOKIE)
+    if not token:
         raise HTTPException(status_code=401, detail="인증 쿠키가 없습니다.")
-    
-    # 간단한 프로필 정보 반환 (실제로는 데이터베이스에서 조회)
+    try:
+        session = await session_manager.get(token)
+    except SessionStoreUnavailable as e:
+        raise _session_unavailable(e)
+    if session is None:
+        raise HTTPException(status_code=401, detail="세션이 만료되었거나 유효하지 않습니다.")
+
     return {
-        "user_id": "sample_user",
+        "user_id": session.user_id,
+        "company_id": session.company_id,
         "message": "사용자 프로필 조회 성공"
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,125 @@
+"""
+로그인 DB 조회 동시성 벤치마크 (동기 psycopg2 경로 vs AsyncEngine/asyncpg 경로)
+
+account-service 디렉터리에서 실행:
+    DATABASE_URL=postgresql://user:pw@host:5432/db python -m scripts.bench_login --concurrency 50 --requests 2000
+
+모드
+- sync-blocking  : async 핸들러 안에서 동기 저장소를 바로 호출 (이전 동작, 이벤트 루프가 멈춤)
+- sync-threadpool: 동기 저장소를 스레드풀에서 호출 (비동기 드라이버가 없을 때의 경로)
+- async          : AsyncAccountRepository (asyncpg)
+auth 테이블에 bench_ 로 시작하는 사용자가 없으면 --users개 만들고, 끝나면 지운다(--keep-users로 유지).
+loop_lag는 10ms 주기 타이머가 늦어진 최대 시간으로, 이벤트 루프가 막힌 정도를 보여준다.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from app.common.db import get_async_db_engine, get_db_engine, dispose_async_db_engine, dispose_db_engine, pool_stats
+from app.domain.repository.account_repository import AccountRepository, AsyncAccountRepository
+
+MODES = ("sync-blocking", "sync-threadpool", "async")
+USER_PREFIX = "bench_"
+
+
+def seed_users(engine, count: int):
+    with engine.connect() as conn:
+        conn.execute(
+            text("""INSERT INTO auth (user_id, user_pw, company_id) VALUES (:user_id, :user_pw, :company_id)
+                    ON CONFLICT (user_id) DO NOTHING"""),
+            [{"user_id": f"{USER_PREFIX}{i}", "user_pw": "x", "company_id": "bench"} for i in range(count)],
+        )
+        conn.commit()
+
+
+def drop_users(engine):
+    with engine.connect() as conn:
+        conn.execute(text("DELETE FROM auth WHERE user_id LIKE :prefix"), {"prefix": f"{USER_PREFIX}%"})
+        conn.commit()
+
+
+async def _loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def run_mode(mode: str, users: int, concurrency: int, requests: int) -> dict:
+    if mode == "async":
+        repo = AsyncAccountRepository(get_async_db_engine())
+        get_user = repo.get_user
+    else:
+        repo = AccountRepository(get_db_engine())
+        if mode == "sync-threadpool":
+            async def get_user(user_id):
+                return await run_in_threadpool(repo.get_user, user_id)
+        else:
+            async def get_user(user_id):
+                return repo.get_user(user_id)
+
+    latencies = []
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            user = await get_user(f"{USER_PREFIX}{i % users}")
+            latencies.append(time.perf_counter() - started)
+            assert user is not None
+
+    # 워밍업 (커넥션 수립 비용 제외)
+    await asyncio.gather(*(get_user(f"{USER_PREFIX}0") for _ in range(concurrency)))
+
+    stop = asyncio.Event()
+    lag = asyncio.ensure_future(_loop_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "loop_lag_ms": (await lag) * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--keep-users", action="store_true")
+    args = parser.parse_args()
+
+    engine = get_db_engine()
+    seed_users(engine, args.users)
+    try:
+        results = [await run_mode(mode, args.users, args.concurrency, args.requests)
+                   for mode in args.modes.split(",")]
+    finally:
+        if not args.keep_users:
+            drop_users(engine)
+
+    print(f"concurrency={args.concurrency} requests={args.requests}")
+    print(f"{'mode':<16} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'loop lag ms':>12}")
+    for r in results:
+        print(f"{r['mode']:<16} {r['rps']:>9.0f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['loop_lag_ms']:>12.2f}")
+    print(pool_stats())
+    await dispose_async_db_engine()
+    dispose_db_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
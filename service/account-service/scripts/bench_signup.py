@@ -0,0 +1,117 @@
+"""
+회원가입 처리량 벤치마크 (사용자별 signup 경로 vs 일괄 가입 경로)
+
+account-service 디렉터리에서 실행:
+    DATABASE_URL=postgresql://user:pw@host:5432/db python -m scripts.bench_signup --users 1000 --concurrency 20
+
+모드
+- per-user: AccountService.signup을 --concurrency개씩 동시에 호출 (행마다 커넥션 획득 + INSERT + COMMIT)
+- bulk    : AccountService.bulk_signup 한 번 (중복 조회 1회 + 병렬 해시 + unnest INSERT 1회)
+두 모드 모두 같은 해시 풀을 쓴다. --rounds로 bcrypt cost를 정한다 (기본 4: DB 경로 차이만 보기 위한 값,
+운영 cost에서는 해시가 대부분을 차지하므로 --rounds 0으로 보정값을 쓰면 해시 병렬화 효과를 볼 수 있다).
+--conflicts 비율만큼은 미리 만들어 두어 충돌 행 처리 비용도 함께 잰다. 끝나면 benchsu_ 사용자를 지운다.
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.common.db import async_db_enabled, dispose_async_db_engine, dispose_db_engine, get_async_db_engine, get_db_engine
+from app.common.security import configure_bcrypt, hash_pool, init_bcrypt
+from app.domain.model.account_model import SignupData
+from app.domain.repository.account_repository import AccountRepository, AsyncAccountRepository
+from app.domain.service.account_service import AccountService
+
+MODES = ("per-user", "bulk")
+USER_PREFIX = "benchsu_"
+
+
+def drop_users(engine):
+    with engine.connect() as conn:
+        conn.execute(text("DELETE FROM auth WHERE user_id LIKE :prefix"), {"prefix": f"{USER_PREFIX}%"})
+        conn.commit()
+
+
+def seed_conflicts(engine, mode: str, users: int, ratio: float):
+    count = int(users * ratio)
+    if count:
+        with engine.connect() as conn:
+            conn.execute(
+                text("INSERT INTO auth (user_id, user_pw, company_id) VALUES (:user_id, 'x', 'bench')"),
+                [{"user_id": f"{USER_PREFIX}{mode}_{i}"} for i in range(0, users, max(1, users // count))][:count],
+            )
+            conn.commit()
+
+
+def signup_rows(mode: str, users: int):
+    return [(i + 1, SignupData(user_id=f"{USER_PREFIX}{mode}_{i}", user_pw=f"pw-{i}", company_id="bench"))
+            for i in range(users)]
+
+
+async def run_mode(service: AccountService, mode: str, users: int, concurrency: int) -> dict:
+    rows = signup_rows(mode, users)
+    created, breakdown = 0, ""
+    started = time.perf_counter()
+    if mode == "bulk":
+        result = await service.bulk_signup(rows, [])
+        created = result.created
+        breakdown = f"hash {result.hash_ms:.0f}ms, insert {result.insert_ms:.0f}ms"
+    else:
+        queue = iter(rows)
+
+        async def worker():
+            nonlocal created
+            for _, data in queue:
+                try:
+                    await service.signup(data)
+                    created += 1
+                except HTTPException as e:
+                    if e.status_code != 409:
+                        raise
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"mode": mode, "rows_per_s": users / elapsed, "elapsed_s": elapsed, "created": created,
+            "breakdown": breakdown}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=4, help="bcrypt cost (0이면 시작 시 보정값)")
+    parser.add_argument("--conflicts", type=float, default=0.1, help="미리 만들어 둘 충돌 행 비율")
+    parser.add_argument("--modes", default=",".join(MODES))
+    args = parser.parse_args()
+
+    if args.rounds:
+        configure_bcrypt(args.rounds)
+    else:
+        await init_bcrypt()
+    engine = get_db_engine()
+    repo = AsyncAccountRepository(get_async_db_engine()) if async_db_enabled() else AccountRepository(engine)
+    service = AccountService(repo)
+
+    drop_users(engine)
+    results = []
+    try:
+        for mode in args.modes.split(","):
+            seed_conflicts(engine, mode, args.users, args.conflicts)
+            results.append(await run_mode(service, mode, args.users, args.concurrency))
+    finally:
+        drop_users(engine)
+
+    print(f"users={args.users} concurrency={args.concurrency} conflicts={args.conflicts:.0%} "
+          f"hash_workers={hash_pool.workers} repository={type(repo).__name__}")
+    print(f"{'mode':<10} {'rows/s':>9} {'elapsed s':>10} {'created':>8}")
+    for r in results:
+        print(f"{r['mode']:<10} {r['rows_per_s']:>9.0f} {r['elapsed_s']:>10.2f} {r['created']:>8}  {r['breakdown']}")
+    await dispose_async_db_engine()
+    dispose_db_engine()
+    hash_pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
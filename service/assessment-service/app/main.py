@@ -7,6 +7,11 @@ from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import logging, sys, traceback, os
 
+from .common.db import (
+    async_db_enabled, dispose_async_db_engine, dispose_db_engine, init_async_db_engine, init_db_engine, pool_stats,
+)
+from .common.deadline import DeadlineMiddleware
+
 # ---------- Logging ----------
 logging.basicConfig(
     level=logging.INFO,
@@ -36,12 +41,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 게이트웨이 마감 시간(X-Request-Timeout-Ms) 적용, 연결이 끊기면 처리 취소
+app.add_middleware(DeadlineMiddleware)
+
 # ---------- Import Routers ----------
 from .router.assesment_router import assessment_router
 
 # ---------- Include Routers ----------
 app.include_router(assessment_router)
 
+# ---------- DB 엔진 (프로세스당 1개, 시작 시 커넥션 미리 열기) ----------
+@app.on_event("startup")
+async def startup():
+    if async_db_enabled():
+        await init_async_db_engine()
+    else:
+        init_db_engine()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await dispose_async_db_engine()
+    dispose_db_engine()
+
+@app.get("/health/db", summary="DB 커넥션 풀 상태")
+def db_pool_health():
+    return pool_stats()
+
 # ---------- Root Route ----------
 @app.get("/", summary="Root")
 def root():
@@ -0,0 +1,37 @@
+import os
+from dotenv import load_dotenv, find_dotenv
+
+# Railway가 아니면 .env 로드
+if os.getenv("RAILWAY_ENVIRONMENT") != "true":
+    load_dotenv(find_dotenv())
+
+class Settings:
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "") or None   # 호환 API/프록시 사용 시
+    LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))          # OpenAI 호출 1회 상한(초)
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    # ---- LLM 동시 호출 스케줄러 (프로세스 단위) ----
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))     # 동시에 진행 중인 LLM 호출 상한
+    LLM_COMPANY_CONCURRENCY = int(os.getenv("LLM_COMPANY_CONCURRENCY", "8"))  # 회사(company_id)별 상한
+    LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))                 # 대기열이 이보다 길면 바로 503
+    LLM_COMPANY_MAX_QUEUE = int(os.getenv("LLM_COMPANY_MAX_QUEUE", "16"))
+    LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))       # 대기 상한(초), 요청 마감이 더 짧으면 그쪽
+    # ---- 회사별 벡터 저장소 (Chroma, 디스크에 영구 저장) ----
+    CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "data/chroma")
+    CHROMA_COLLECTION_PREFIX = os.getenv("CHROMA_COLLECTION_PREFIX", "company_")
+    DEFAULT_COMPANY_ID = os.getenv("DEFAULT_COMPANY_ID", "default")   # company_id 없는 문서/질문용
+    DOCUMENT_CHUNK_SIZE = int(os.getenv("DOCUMENT_CHUNK_SIZE", "1000"))
+    DOCUMENT_CHUNK_OVERLAP = int(os.getenv("DOCUMENT_CHUNK_OVERLAP", "200"))
+    # ---- 임베딩 캐시 (모델 + 정규화 텍스트 해시 → 벡터) ----
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/embeddings/cache.sqlite3")  # 비우면 메모리만
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "5000"))   # 프로세스 내 LRU 항목 수
+    # ---- RAG 검색 ----
+    RAG_TOP_K = int(os.getenv("RAG_TOP_K", "4"))                 # 프롬프트에 넣을 최대 청크 수
+    RAG_FETCH_K = int(os.getenv("RAG_FETCH_K", "20"))            # MMR 후보로 먼저 가져올 청크 수
+    RAG_MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", "0.5"))   # 1이면 유사도만, 0에 가까울수록 다양성 우선
+    RAG_CONTEXT_TOKENS = int(os.getenv("RAG_CONTEXT_TOKENS", "2000"))  # 검색 문서에 쓸 프롬프트 토큰 예산
+    SERVICE_NAME = "chatbot-service"
+    PORT = int(os.getenv("PORT", "8003"))
+
+settings = Settings()
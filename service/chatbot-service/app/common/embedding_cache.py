@@ -0,0 +1,207 @@
+"""
+내용 주소 기반 임베딩 캐시 (프로세스 내 LRU + SQLite)
+
+키 = sha256(모델 이름 + 정규화한 텍스트). 정규화는 NFC + 앞뒤 공백 제거 + 연속 공백을 한 칸으로 바꾸는 것이고,
+API에도 정규화한 텍스트를 보내므로 같은 키에는 항상 같은 벡터가 저장된다.
+- 조회 순서: LRU(EMBEDDING_CACHE_SIZE개) → SQLite(EMBEDDING_CACHE_PATH, 재시작 후에도 유지) → 임베딩 API
+- 한 번의 호출 안에서 같은 텍스트는 한 번만 임베딩하고, 없는 텍스트만 모아 한 번에 요청한다
+- 벡터는 float32 바이트로 저장한다 (1536차원 기준 6KB)
+문서 청크 임베딩(aembed_documents)과 질문 임베딩(aembed_query)이 같은 캐시를 쓴다.
+SQLite는 스레드풀에서 읽고 쓰며, 저장소 오류가 나면 경고만 남기고 API 결과를 그대로 쓴다.
+적중률과 저장 바이트 수는 stats()로 확인한다 (/health/embeddings).
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger("embedding-cache")
+
+_WHITESPACE = re.compile(r"\s+")
+# SQLite IN (...) 한 번에 넣을 최대 키 수
+_LOOKUP_BATCH = 500
+
+
+def normalize_text(text: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\x00{text}".encode()).hexdigest()
+
+
+@dataclass
+class EmbeddingCacheStats:
+    texts: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    api_calls: int = 0
+    store_errors: int = 0
+
+
+class EmbeddingStore:
+    """SQLite 영구 저장소 (스레드풀에서 호출되므로 연결 하나를 락으로 보호)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn = conn
+            logger.info(f"🗂️ 임베딩 캐시 열기: {self.path}")
+        return self._conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[i:i + _LOOKUP_BATCH]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                )
+                found.update(rows)
+        return found
+
+    def put_many(self, model: str, items: Dict[str, bytes]):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, model, vector, created_at) VALUES (?, ?, ?, ?)",
+                [(key, model, blob, now) for key, blob in items.items()],
+            )
+            conn.commit()
+
+    def usage(self) -> dict:
+        with self._lock:
+            rows, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+        return {"entries": rows, "vector_bytes": size}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CachedEmbeddings:
+    """LangChain 임베딩(aembed_documents/aembed_query)을 감싸 캐시를 거치게 한다 (이벤트 루프 단일 스레드 전제)"""
+
+    def __init__(self, embeddings, path: Optional[str], max_entries: int):
+        self.embeddings = embeddings
+        self.model = str(getattr(embeddings, "model", type(embeddings).__name__))
+        self.store = EmbeddingStore(path) if path else None
+        self.max_entries = max(0, max_entries)
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self.counters = EmbeddingCacheStats()
+
+    def _remember(self, key: str, blob: bytes):
+        if self.max_entries == 0:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = blob
+        self._memory_bytes += len(blob)
+        while len(self._memory) > self.max_entries:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        normalized = [normalize_text(text) for text in texts]
+        keys = [cache_key(self.model, text) for text in normalized]
+        self.counters.texts += len(texts)
+        found: Dict[str, bytes] = {}
+        for key in keys:
+            blob = self._memory.get(key)
+            if blob is not None:
+                self._memory.move_to_end(key)
+                found[key] = blob
+        self.counters.memory_hits += len(found)
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing and self.store is not None:
+            try:
+                stored = await run_in_threadpool(self.store.get_many, missing)
+            except Exception as e:
+                self.counters.store_errors += 1
+                logger.warning(f"임베딩 캐시 읽기 실패: {e}")
+                stored = {}
+            for key, blob in stored.items():
+                self._remember(key, blob)
+            found.update(stored)
+            self.counters.disk_hits += len(stored)
+            missing = [key for key in missing if key not in found]
+
+        if missing:
+            text_of = dict(zip(keys, normalized))
+            self.counters.misses += len(missing)
+            self.counters.api_calls += 1
+            vectors = await self.embeddings.aembed_documents([text_of[key] for key in missing])
+            fresh = {key: np.asarray(vector, dtype=np.float32).tobytes() for key, vector in zip(missing, vectors)}
+            for key, blob in fresh.items():
+                self._remember(key, blob)
+            found.update(fresh)
+            if self.store is not None:
+                try:
+                    await run_in_threadpool(self.store.put_many, self.model, fresh)
+                except Exception as e:
+                    self.counters.store_errors += 1
+                    logger.warning(f"임베딩 캐시 쓰기 실패: {e}")
+
+        return [np.frombuffer(found[key], dtype=np.float32).tolist() for key in keys]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self._embed(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self._embed([text]))[0]
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+
+    def stats(self) -> dict:
+        """동기 함수 (SQLite 집계가 있으므로 스레드풀에서 호출)"""
+        counters = asdict(self.counters)
+        hits = self.counters.memory_hits + self.counters.disk_hits
+        summary = {
+            "model": self.model,
+            **counters,
+            "hit_ratio": round(hits / self.counters.texts, 4) if self.counters.texts else None,
+            "memory": {"entries": len(self._memory), "max_entries": self.max_entries, "bytes": self._memory_bytes},
+            "disk": None,
+        }
+        if self.store is not None:
+            try:
+                summary["disk"] = {"path": self.store.path, **self.store.usage()}
+            except Exception as e:
+                summary["disk"] = {"path": self.store.path, "error": str(e)}
+        return summary
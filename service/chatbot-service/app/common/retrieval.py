@@ -0,0 +1,167 @@
+"""
+RAG 검색 단계 (질문 임베딩 → 회사 컬렉션 검색 → MMR → 토큰 예산 안에서 컨텍스트 구성)
+
+- embed : 질문을 aembed_query로 임베딩 (회사 컬렉션이 비어 있으면 호출하지 않는다)
+- search: 회사 컬렉션에서 가까운 청크 RAG_FETCH_K개를 가져와 MMR로 RAG_TOP_K개를 고른다
+          (RAG_MMR_LAMBDA=1이면 MMR 없이 가까운 순 RAG_TOP_K개)
+- build : 고른 순서대로 "[번호] (출처: ...)" 머리말을 붙여 RAG_CONTEXT_TOKENS 안에서 이어 붙인다
+- generate: LLM 응답 생성 (main에서 record로 기록)
+단계별 시간은 요청마다 timings로 돌려주고 rag_stats에 누적한다 (/health/rag).
+게이트웨이가 X-Company-Id를 붙이지 않은 요청(AUTH_MODE=off 등)은 검색 없이 답하고 unverified로 센다.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+from .vectorstore import vector_store
+
+logger = logging.getLogger("rag")
+
+STAGES = ("embed", "search", "build", "generate")
+# 출처 이름으로 쓸 메타데이터 키 (없으면 document_id)
+SOURCE_KEYS = ("title", "source", "filename")
+
+
+@dataclass
+class Retrieval:
+    context: str
+    sources: List[str]
+    chunks: int
+    tokens: int
+    best_score: Optional[float]          # 가장 가까운 청크의 코사인 유사도
+    timings: Dict[str, float] = field(default_factory=dict)   # 단계별 ms
+
+
+class RetrievalStats:
+    """단계별 횟수/누적/최대 시간과 검색 결과 요약"""
+
+    def __init__(self):
+        self.queries = 0
+        self.no_documents = 0
+        self.unverified = 0          # 검증된 회사(X-Company-Id)가 없어 검색을 건너뛴 요청
+        self.chunks_total = 0
+        self.tokens_total = 0
+        self._stages: Dict[str, List[float]] = {stage: [0, 0.0, 0.0] for stage in STAGES}
+
+    def record(self, stage: str, seconds: float):
+        entry = self._stages[stage]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+    def summary(self) -> dict:
+        return {
+            "queries": self.queries,
+            "no_documents": self.no_documents,
+            "unverified": self.unverified,
+            "chunks_avg": round(self.chunks_total / self.queries, 2) if self.queries else None,
+            "context_tokens_avg": round(self.tokens_total / self.queries, 1) if self.queries else None,
+            "stages": {
+                stage: {
+                    "count": count,
+                    "avg_ms": round(total / count * 1000, 2) if count else None,
+                    "max_ms": round(worst * 1000, 2),
+                }
+                for stage, (count, total, worst) in self._stages.items()
+            },
+        }
+
+
+rag_stats = RetrievalStats()
+
+_count_tokens: Optional[Callable[[str], int]] = None
+
+
+def count_tokens(text: str) -> int:
+    """LLM_MODEL의 tiktoken 인코딩으로 토큰 수를 센다. 인코딩을 못 받으면 UTF-8 바이트/3로 넉넉히 추정"""
+    global _count_tokens
+    if _count_tokens is None:
+        try:
+            import tiktoken
+
+            try:
+                encoding = tiktoken.encoding_for_model(settings.LLM_MODEL)
+            except KeyError:
+                encoding = tiktoken.get_encoding("cl100k_base")
+            _count_tokens = lambda value: len(encoding.encode(value))
+        except Exception as e:
+            logger.warning(f"tiktoken 인코딩을 불러오지 못해 토큰 수를 추정합니다: {str(e)}")
+            _count_tokens = lambda value: len(value.encode("utf-8")) // 3 + 1
+    return _count_tokens(text)
+
+
+def _source_of(metadata: Dict[str, Any]) -> str:
+    for key in SOURCE_KEYS:
+        if metadata.get(key):
+            return str(metadata[key])
+    return str(metadata.get("document_id", "unknown"))
+
+
+def _select(query: List[float], hits: Dict[str, list], top_k: int, lambda_mult: float) -> List[int]:
+    if lambda_mult >= 1 or len(hits["ids"]) <= top_k:
+        return list(range(min(top_k, len(hits["ids"]))))
+    return maximal_marginal_relevance(np.array(query, dtype=np.float32), hits["embeddings"], lambda_mult, top_k)
+
+
+def _build(hits: Dict[str, list], order: List[int], budget: int):
+    """고른 청크를 예산 안에서 순서대로 넣는다. 예산을 넘는 청크는 건너뛰고 다음(더 짧은) 청크를 본다"""
+    parts: List[str] = []
+    sources: List[str] = []
+    used = 0
+    for index in order:
+        source = _source_of(hits["metadatas"][index])
+        part = f"[{len(parts) + 1}] (출처: {source})\n{hits['documents'][index]}"
+        tokens = count_tokens(part)
+        if used + tokens > budget:
+            continue
+        parts.append(part)
+        used += tokens
+        if source not in sources:
+            sources.append(source)
+    return "\n\n".join(parts), sources, len(parts), used
+
+
+async def retrieve(company_id: Optional[str], question: str, embeddings) -> Retrieval:
+    """회사 문서에서 질문과 관련된 청크를 찾아 프롬프트 컨텍스트로 만든다 (찾은 문서가 없으면 빈 컨텍스트)"""
+    rag_stats.queries += 1
+    timings: Dict[str, float] = {}
+
+    if _count_tokens is None:
+        # 처음 한 번 tiktoken 인코딩을 읽는다 (내려받을 수 있으므로 이벤트 루프 밖에서)
+        await run_in_threadpool(count_tokens, "")
+    if not await vector_store.count(company_id):
+        rag_stats.no_documents += 1
+        return Retrieval("", [], 0, 0, None, timings)
+    started = time.perf_counter()
+    vector = await embeddings.aembed_query(question)
+    elapsed = time.perf_counter() - started
+    rag_stats.record("embed", elapsed)
+    timings["embed_ms"] = round(elapsed * 1000, 1)
+
+    started = time.perf_counter()
+    lambda_mult = settings.RAG_MMR_LAMBDA
+    hits = await vector_store.search(company_id, vector, max(settings.RAG_FETCH_K, settings.RAG_TOP_K),
+                                     with_embeddings=lambda_mult < 1)
+    order = _select(vector, hits, settings.RAG_TOP_K, lambda_mult)
+    elapsed = time.perf_counter() - started
+    rag_stats.record("search", elapsed)
+    timings["search_ms"] = round(elapsed * 1000, 1)
+
+    started = time.perf_counter()
+    context, sources, chunks, tokens = _build(hits, order, settings.RAG_CONTEXT_TOKENS)
+    elapsed = time.perf_counter() - started
+    rag_stats.record("build", elapsed)
+    timings["build_ms"] = round(elapsed * 1000, 1)
+
+    rag_stats.chunks_total += chunks
+    rag_stats.tokens_total += tokens
+    best = round(1 - min(hits["distances"]), 4) if hits["distances"] else None
+    logger.info(f"🔎 RAG 검색: company={vector_store.company(company_id)}, candidates={len(hits['ids'])}, "
+                f"chunks={chunks}, tokens={tokens}, timings={timings}")
+    return Retrieval(context, sources, chunks, tokens, best, timings)
@@ -0,0 +1,185 @@
+"""
+LLM 동시 호출 스케줄러
+
+LLM 호출은 대부분 OpenAI 응답을 기다리는 시간이므로 ainvoke로 이벤트 루프를 놓고 기다리면
+워커 하나가 여러 대화를 동시에 처리한다. 대신 동시에 나가는 호출 수를 제한한다.
+- 전체 상한(LLM_MAX_CONCURRENCY)과 회사(company_id)별 상한(LLM_COMPANY_CONCURRENCY)
+  회사 키는 게이트웨이가 검증한 X-Company-Id만 쓰고, 없으면 모두 ANONYMOUS_COMPANY 한 칸을 함께 쓴다
+- 자리가 없으면 FIFO 대기열에서 기다리되, 한 회사가 상한에 걸려 있으면 뒤의 다른 회사 요청이 먼저 간다
+- 대기열(전체 LLM_MAX_QUEUE, 회사별 LLM_COMPANY_MAX_QUEUE)이 가득 차면 기다리지 않고 LLMBusy (→ 503)
+- LLM_QUEUE_TIMEOUT 또는 요청 마감(deadline) 안에 자리가 나지 않아도 LLMBusy
+대기 시간과 거절 수는 stats()로 확인한다 (/health/llm).
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+from typing import Deque, Dict, Optional, Tuple
+
+from .config import settings
+from .deadline import remaining
+
+logger = logging.getLogger("llm-scheduler")
+
+# 검증된 회사가 없는 요청이 함께 쓰는 회사 키 (회사별 상한/대기열이 그대로 적용된다)
+ANONYMOUS_COMPANY = "anonymous"
+
+
+class LLMBusy(Exception):
+    """LLM 호출 대기열이 가득 찼거나 대기 시간 초과 (잠시 후 재시도)"""
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class SchedulerStats:
+    admitted: int = 0
+    queued: int = 0
+    queue_full: int = 0
+    queue_timeout: int = 0
+    wait_count: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+
+class LLMScheduler:
+    """전체/회사별 동시 실행 수 제한 + 대기열 (이벤트 루프 단일 스레드 전제, 락 없음)"""
+
+    def __init__(self, max_concurrency: int, company_concurrency: int, max_queue: int,
+                 company_max_queue: int, queue_timeout: float):
+        self.max_concurrency = max(1, max_concurrency)
+        self.company_concurrency = max(1, company_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.company_max_queue = max(0, company_max_queue)
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self._running_by_company: Dict[str, int] = {}
+        self._queued_by_company: Dict[str, int] = {}
+        # (회사, 자리가 나면 결과가 설정되는 future)
+        self._waiters: Deque[Tuple[Optional[str], asyncio.Future]] = deque()
+        self.counters = SchedulerStats()
+
+    def _can_run(self, company: Optional[str]) -> bool:
+        if self.running >= self.max_concurrency:
+            return False
+        return company is None or self._running_by_company.get(company, 0) < self.company_concurrency
+
+    def _grant(self, company: Optional[str]):
+        self.running += 1
+        if company is not None:
+            self._running_by_company[company] = self._running_by_company.get(company, 0) + 1
+
+    def _release(self, company: Optional[str]):
+        self.running -= 1
+        if company is not None:
+            left = self._running_by_company.get(company, 1) - 1
+            if left > 0:
+                self._running_by_company[company] = left
+            else:
+                self._running_by_company.pop(company, None)
+        self._dispatch()
+
+    def _dispatch(self):
+        """실행할 수 있게 된 대기자에게 순서대로 자리를 넘긴다 (회사 상한에 걸린 대기자는 건너뜀)"""
+        if not self._waiters:
+            return
+        kept: Deque[Tuple[Optional[str], asyncio.Future]] = deque()
+        while self._waiters:
+            company, future = self._waiters.popleft()
+            if self._can_run(company):
+                self._grant(company)
+                self._dequeued(company)
+                future.set_result(None)
+            else:
+                kept.append((company, future))
+                if self.running >= self.max_concurrency:
+                    kept.extend(self._waiters)
+                    self._waiters.clear()
+        self._waiters = kept
+
+    def _dequeued(self, company: Optional[str]):
+        if company is not None:
+            left = self._queued_by_company.get(company, 1) - 1
+            if left > 0:
+                self._queued_by_company[company] = left
+            else:
+                self._queued_by_company.pop(company, None)
+
+    async def acquire(self, company: Optional[str]):
+        """자리를 얻을 때까지 기다린다. 대기열이 가득 찼거나 시간 안에 못 얻으면 LLMBusy"""
+        started = time.perf_counter()
+        # 대기자가 있으면 자리가 날 때마다 바로 넘겨주므로, 지금 실행 가능하면 대기자 중 실행 가능한 사람은 없다
+        if self._can_run(company):
+            self._grant(company)
+            self.counters.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue or (
+                company is not None and self._queued_by_company.get(company, 0) >= self.company_max_queue):
+            self.counters.queue_full += 1
+            logger.warning(f"LLM 대기열 가득 참 (company={company}, waiting={len(self._waiters)})")
+            raise LLMBusy("llm queue full")
+
+        timeout = self.queue_timeout
+        left = remaining()
+        if left is not None:
+            timeout = min(timeout, left)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((company, future))
+        if company is not None:
+            self._queued_by_company[company] = self._queued_by_company.get(company, 0) + 1
+        self.counters.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=max(0.0, timeout))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done():
+                # 자리를 받은 직후에 취소/시간 초과 → 받은 자리를 돌려준다
+                self._release(company)
+            else:
+                future.cancel()
+                self._waiters.remove((company, future))
+                self._dequeued(company)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.counters.queue_timeout += 1
+            raise LLMBusy("llm queue timeout")
+        waited = time.perf_counter() - started
+        self.counters.admitted += 1
+        self.counters.wait_count += 1
+        self.counters.wait_total += waited
+        self.counters.wait_max = max(self.counters.wait_max, waited)
+
+    @asynccontextmanager
+    async def slot(self, company: Optional[str]):
+        await self.acquire(company)
+        try:
+            yield
+        finally:
+            self._release(company)
+
+    def stats(self) -> dict:
+        counters = asdict(self.counters)
+        wait_count, wait_total, wait_max = counters.pop("wait_count"), counters.pop("wait_total"), counters.pop("wait_max")
+        return {
+            "max_concurrency": self.max_concurrency,
+            "company_concurrency": self.company_concurrency,
+            "running": self.running,
+            "waiting": len(self._waiters),
+            **counters,
+            "wait_avg_ms": round(wait_total / wait_count * 1000, 2) if wait_count else None,
+            "wait_max_ms": round(wait_max * 1000, 2),
+            "running_by_company": dict(self._running_by_company),
+        }
+
+
+llm_scheduler = LLMScheduler(
+    settings.LLM_MAX_CONCURRENCY,
+    settings.LLM_COMPANY_CONCURRENCY,
+    settings.LLM_MAX_QUEUE,
+    settings.LLM_COMPANY_MAX_QUEUE,
+    settings.LLM_QUEUE_TIMEOUT,
+)
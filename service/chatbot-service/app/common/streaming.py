@@ -0,0 +1,126 @@
+"""
+LLM 토큰 스트리밍 (Server-Sent Events)
+
+체인의 astream()에서 나오는 토큰을 바로 SSE 이벤트로 보낸다.
+- event: token  data: {"text": "..."}             토큰(청크)마다
+- event: done   data: {"sources", "confidence", "ttft_ms", "total_ms"[, "timings"]}  마지막
+- event: error  data: {"detail": "..."}           생성 중 오류 (헤더는 이미 200으로 나갔으므로)
+클라이언트(게이트웨이) 연결이 끊기면 응답 태스크가 취소되고, 진행 중인 OpenAI 요청도 함께 닫혀 생성이 멈춘다.
+첫 토큰까지 걸린 시간(TTFT)과 전체 시간은 따로 집계한다 (stream_stats, /health/llm).
+"""
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger("chat-stream")
+
+EVENT_STREAM = "text/event-stream"
+# 프록시(nginx 등)가 응답을 모아 보내지 않도록
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+# 생성 태스크와 응답 사이에 쌓아 둘 최대 토큰(청크) 수
+STREAM_BUFFER = 64
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@dataclass
+class StreamTimings:
+    """스트림 결과별 개수와 TTFT/전체 시간"""
+    completed: int = 0
+    disconnected: int = 0
+    errors: int = 0
+    ttft_count: int = 0
+    ttft_total: float = 0.0
+    ttft_max: float = 0.0
+    total_count: int = 0
+    total_total: float = 0.0
+    total_max: float = 0.0
+
+    def record_ttft(self, seconds: float):
+        self.ttft_count += 1
+        self.ttft_total += seconds
+        self.ttft_max = max(self.ttft_max, seconds)
+
+    def record_total(self, seconds: float):
+        self.total_count += 1
+        self.total_total += seconds
+        self.total_max = max(self.total_max, seconds)
+
+    def summary(self) -> dict:
+        return {
+            "completed": self.completed,
+            "disconnected": self.disconnected,
+            "errors": self.errors,
+            "ttft_avg_ms": round(self.ttft_total / self.ttft_count * 1000, 2) if self.ttft_count else None,
+            "ttft_max_ms": round(self.ttft_max * 1000, 2),
+            "total_avg_ms": round(self.total_total / self.total_count * 1000, 2) if self.total_count else None,
+            "total_max_ms": round(self.total_max * 1000, 2),
+        }
+
+
+stream_stats = StreamTimings()
+
+
+async def _produce(chain, inputs: Dict[str, Any], queue: asyncio.Queue):
+    try:
+        async for chunk in chain.astream(inputs):
+            if chunk:
+                await queue.put(("token", chunk))
+        await queue.put(("done", None))
+    except Exception as e:
+        await queue.put(("error", e))
+
+
+async def stream_chain(chain, inputs: Dict[str, Any], sources: Optional[List[str]],
+                       confidence: float, started: float,
+                       timings: Optional[Dict[str, float]] = None) -> AsyncIterator[str]:
+    """체인 출력을 SSE 이벤트로. started는 요청을 받은 시각(perf_counter, 대기열 시간 포함).
+    timings(RAG 단계별 ms)를 넘기면 생성 시간(generate_ms)을 더해 done 이벤트에 넣는다.
+
+    체인은 별도 태스크에서 돌리고 크기가 제한된 큐로 받는다. 응답 쪽 취소(anyio 취소 범위)는 await마다
+    다시 발생해 LangChain/OpenAI 스트림의 정리 코드까지 끊어 버리므로, 연결이 끊기면 생성 태스크를
+    한 번만 취소해 OpenAI 요청이 정상적으로 닫히게 한다. 큐가 차면(느린 클라이언트) 생성도 멈춘다."""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_BUFFER)
+    began = time.perf_counter()
+    producer = asyncio.ensure_future(_produce(chain, inputs, queue))
+    first_token: Optional[float] = None
+    try:
+        while True:
+            kind, value = await queue.get()
+            if kind == "token":
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                    stream_stats.record_ttft(first_token)
+                yield sse_event("token", {"text": value})
+            elif kind == "error":
+                stream_stats.errors += 1
+                logger.error(f"Stream error: {str(value)}")
+                yield sse_event("error", {"detail": f"응답 생성 중 오류가 발생했습니다: {str(value)}"})
+                return
+            else:
+                break
+    except (asyncio.CancelledError, GeneratorExit):
+        stream_stats.disconnected += 1
+        logger.info("🔌 클라이언트 연결 종료, 생성 중단")
+        raise
+    finally:
+        producer.cancel()
+
+    total = time.perf_counter() - started
+    stream_stats.record_total(total)
+    stream_stats.completed += 1
+    logger.info(f"Stream done: ttft={first_token * 1000 if first_token else 0:.0f}ms, total={total * 1000:.0f}ms")
+    done = {
+        "sources": sources,
+        "confidence": confidence,
+        "ttft_ms": round(first_token * 1000, 1) if first_token is not None else None,
+        "total_ms": round(total * 1000, 1),
+    }
+    if timings is not None:
+        done["timings"] = {**timings, "generate_ms": round((time.perf_counter() - began) * 1000, 1)}
+    yield sse_event("done", done)
@@ -0,0 +1,218 @@
+"""
+회사별 영구 벡터 저장소 (Chroma)
+
+프로세스당 chromadb.PersistentClient 하나(CHROMA_PERSIST_DIR)를 열고, company_id마다 컬렉션 하나를 둔다.
+컬렉션 핸들은 처음 쓸 때 열어 재사용한다. 임베딩은 디스크에 남으므로 재시작/배포 후 다시 만들지 않는다.
+
+문서 단위 upsert/delete
+- 청크 id = "{document_id}:{content_hash 앞 12자}-{메타데이터 해시 앞 8자}:{순번}",
+  메타데이터에 document_id, chunk, content_hash를 넣는다
+- 같은 document_id로 다시 올리면 content_hash가 같을 때는 임베딩을 건너뛰고(unchanged, 메타데이터만 바뀌었으면
+  저장된 임베딩을 다시 읽어 새 id로 쓴다), 다르면 새로 임베딩한다. 어느 쪽이든 새 id로 청크를 넣은 뒤 옛 청크를 지운다
+  (교체 중에도 문서가 비는 순간이 없고, Chroma upsert처럼 옛 메타데이터가 섞이지 않는다)
+검색(search)은 질문 임베딩으로 회사 컬렉션만 조회한다 (다른 회사 문서는 섞이지 않음).
+읽기(count/search)와 삭제는 있는 컬렉션만 열고, 컬렉션은 문서를 올릴 때만 만든다.
+임베딩 API는 비동기로 호출하고, Chroma(SQLite/HNSW) 읽기/쓰기는 스레드풀에서 실행해 이벤트 루프를 막지 않는다.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+
+logger = logging.getLogger("vectorstore")
+
+# 저장소가 붙이는 메타데이터 키 (사용자 메타데이터 비교에서 제외)
+SYSTEM_KEYS = ("document_id", "chunk", "content_hash")
+
+# Chroma 컬렉션 이름 규칙: 3~63자, 영숫자/._- , 영숫자로 시작/끝
+_NAME_UNSAFE = re.compile(r"[^a-zA-Z0-9_-]")
+
+
+def content_hash(chunks: List[str]) -> str:
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk.encode())
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def _chunk_ids(document_id: str, digest: str, metadata: Dict[str, Any], count: int) -> List[str]:
+    meta_digest = hashlib.sha256(json.dumps(metadata, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+    return [f"{document_id}:{digest[:12]}-{meta_digest[:8]}:{i}" for i in range(count)]
+
+
+def _clean_metadata(metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Chroma 메타데이터는 str/int/float/bool만 받으므로 나머지는 JSON 문자열로"""
+    cleaned: Dict[str, Any] = {}
+    for key, value in (metadata or {}).items():
+        if value is None:
+            continue
+        cleaned[str(key)] = value if isinstance(value, (str, int, float, bool)) else json.dumps(value, ensure_ascii=False)
+    return cleaned
+
+
+class CompanyVectorStore:
+    """company_id → Chroma 컬렉션 (스레드풀에서 호출되므로 핸들 캐시는 락으로 보호)"""
+
+    def __init__(self, path: str, prefix: str = "company_", default_company: str = "default"):
+        self.path = path
+        self.prefix = prefix
+        self.default_company = default_company
+        self._client = None
+        self._collections: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def company(self, company_id: Optional[str]) -> str:
+        return company_id or self.default_company
+
+    def collection_name(self, company_id: str) -> str:
+        """회사 ID를 컬렉션 이름 규칙에 맞게 바꾼다. 바뀌거나 잘린 경우 해시를 붙여 충돌을 막는다"""
+        safe = _NAME_UNSAFE.sub("-", company_id)
+        name = f"{self.prefix}{safe}"
+        if safe != company_id or len(name) > 54 or not name[-1].isalnum():
+            name = f"{name[:45].rstrip('-_')}-{hashlib.sha1(company_id.encode()).hexdigest()[:8]}"
+        return name
+
+    def _get_client(self):
+        if self._client is None:
+            import chromadb
+            from chromadb.config import Settings as ChromaSettings
+
+            self._client = chromadb.PersistentClient(
+                path=self.path,
+                settings=ChromaSettings(anonymized_telemetry=False),
+            )
+            logger.info(f"🗂️ 벡터 저장소 열기: {self.path}")
+        return self._client
+
+    def collection(self, company_id: Optional[str]):
+        """회사 컬렉션 (없으면 생성). 임베딩은 항상 직접 넘기므로 Chroma 기본 임베딩 함수는 쓰지 않는다"""
+        company = self.company(company_id)
+        collection = self._collections.get(company)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.get(company)
+                if collection is None:
+                    collection = self._get_client().get_or_create_collection(
+                        name=self.collection_name(company),
+                        metadata={"hnsw:space": "cosine", "company_id": company},
+                        embedding_function=None,
+                    )
+                    self._collections[company] = collection
+        return collection
+
+    def existing_collection(self, company_id: Optional[str]):
+        """이미 있는 회사 컬렉션만 연다 (없으면 None). 읽기/삭제는 컬렉션을 새로 만들지 않는다"""
+        company = self.company(company_id)
+        collection = self._collections.get(company)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.get(company)
+                if collection is None:
+                    try:
+                        collection = self._get_client().get_collection(
+                            name=self.collection_name(company), embedding_function=None
+                        )
+                    except ValueError:
+                        return None
+                    self._collections[company] = collection
+        return collection
+
+    # ---- 동기 작업 (스레드풀에서 실행) ----
+    def _document_chunks(self, company_id: Optional[str], document_id: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+        result = self.collection(company_id).get(where={"document_id": document_id}, include=["metadatas"])
+        return result["ids"], result["metadatas"]
+
+    def _update_metadata(self, company_id: Optional[str], document_id: str, digest: str, ids: List[str],
+                         metadata: Dict[str, Any]):
+        # Chroma의 메타데이터 갱신/upsert는 기존 키와 합쳐지므로 지워진 키를 없앨 수 없다.
+        # 저장된 임베딩과 본문을 다시 읽어 _write처럼 새 id로 쓴 뒤 옛 청크를 지운다
+        current = self.collection(company_id).get(ids=ids, include=["embeddings", "documents", "metadatas"])
+        order = sorted(range(len(current["ids"])), key=lambda i: current["metadatas"][i].get("chunk", i))
+        self._write(company_id, document_id, [current["documents"][i] for i in order],
+                    [current["embeddings"][i] for i in order], metadata, digest, ids)
+
+    def _write(self, company_id: Optional[str], document_id: str, chunks: List[str], vectors: List[List[float]],
+               metadata: Dict[str, Any], digest: str, stale_ids: List[str]):
+        ids = _chunk_ids(document_id, digest, metadata, len(chunks))
+        metadatas = [
+            {**metadata, "document_id": document_id, "chunk": i, "content_hash": digest}
+            for i in range(len(chunks))
+        ]
+        collection = self.collection(company_id)
+        collection.upsert(ids=ids, embeddings=vectors, documents=chunks, metadatas=metadatas)
+        leftover = sorted(set(stale_ids) - set(ids))
+        if leftover:
+            collection.delete(ids=leftover)
+
+    def _delete(self, company_id: Optional[str], document_id: str) -> int:
+        collection = self.existing_collection(company_id)
+        if collection is None:
+            return 0
+        ids = collection.get(where={"document_id": document_id}, include=[])["ids"]
+        if ids:
+            collection.delete(ids=ids)
+        return len(ids)
+
+    def _count(self, company_id: Optional[str]) -> int:
+        collection = self.existing_collection(company_id)
+        return collection.count() if collection is not None else 0
+
+    def _query(self, company_id: Optional[str], vector: List[float], n_results: int,
+               with_embeddings: bool) -> Dict[str, list]:
+        collection = self.existing_collection(company_id)
+        include = ["documents", "metadatas", "distances"] + (["embeddings"] if with_embeddings else [])
+        count = collection.count() if collection is not None else 0
+        if not count:
+            return {key: [] for key in ["ids", *include]}
+        result = collection.query(query_embeddings=[vector], n_results=min(n_results, count), include=include)
+        return {key: result[key][0] for key in ["ids", *include]}
+
+    # ---- 비동기 API ----
+    async def upsert_document(self, company_id: Optional[str], document_id: str, chunks: List[str],
+                              metadata: Optional[Dict[str, Any]], embeddings) -> Tuple[str, int]:
+        """문서 청크를 임베딩해 저장. (created | updated | unchanged, 청크 수)"""
+        digest = content_hash(chunks)
+        metadata = _clean_metadata(metadata)
+        existing_ids, stored = await run_in_threadpool(self._document_chunks, company_id, document_id)
+        if existing_ids and stored[0].get("content_hash") == digest:
+            user_metadata = {k: v for k, v in stored[0].items() if k not in SYSTEM_KEYS}
+            if user_metadata == metadata:
+                return "unchanged", len(existing_ids)
+            await run_in_threadpool(self._update_metadata, company_id, document_id, digest, existing_ids, metadata)
+            return "updated", len(existing_ids)
+        vectors = await embeddings.aembed_documents(chunks)
+        await run_in_threadpool(self._write, company_id, document_id, chunks, vectors, metadata, digest, existing_ids)
+        return ("updated" if existing_ids else "created"), len(chunks)
+
+    async def count(self, company_id: Optional[str]) -> int:
+        """회사 컬렉션의 청크 수 (컬렉션이 없으면 만들지 않고 0)"""
+        return await run_in_threadpool(self._count, company_id)
+
+    async def search(self, company_id: Optional[str], vector: List[float], n_results: int,
+                     with_embeddings: bool = False) -> Dict[str, list]:
+        """가까운 순으로 청크 n_results개. ids/documents/metadatas/distances(코사인 거리)[/embeddings] 목록"""
+        return await run_in_threadpool(self._query, company_id, vector, n_results, with_embeddings)
+
+    async def delete_document(self, company_id: Optional[str], document_id: str) -> int:
+        """문서의 청크를 모두 지우고 지운 수를 돌려준다"""
+        return await run_in_threadpool(self._delete, company_id, document_id)
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "collections": {company: collection.count() for company, collection in list(self._collections.items())},
+        }
+
+
+vector_store = CompanyVectorStore(
+    settings.CHROMA_PERSIST_DIR,
+    settings.CHROMA_COLLECTION_PREFIX,
+    settings.DEFAULT_COMPANY_ID,
+)
@@ -3,22 +3,30 @@ Chatbot Service - LangChain 통합 서비스
 """
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, NamedTuple, Optional, Dict, Any
 import logging
 import os
+import time
 from dotenv import load_dotenv
 import uvicorn
 
+from .common.config import settings
+from .common.deadline import DeadlineMiddleware
+from .common.embedding_cache import CachedEmbeddings
+from .common.retrieval import rag_stats, retrieve
+from .common.scheduler import ANONYMOUS_COMPANY, LLMBusy, llm_scheduler
+from .common.streaming import EVENT_STREAM, STREAM_HEADERS, sse_event, stream_chain, stream_stats
+from .common.vectorstore import content_hash, vector_store
+
 # LangChain imports
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
-from langchain_community.vectorstores import Chroma
 from langchain_openai import OpenAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.schema import Document
 
 # 로거 설정
 logging.basicConfig(
@@ -51,21 +59,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 게이트웨이 마감 시간(X-Request-Timeout-Ms) 적용, 연결이 끊기면 처리 취소
+app.add_middleware(DeadlineMiddleware)
+
 # LangChain 모델 초기화
 try:
-    openai_api_key = os.getenv("OPENAI_API_KEY")
+    openai_api_key = settings.OPENAI_API_KEY
     if not openai_api_key:
         logger.warning("OPENAI_API_KEY가 설정되지 않았습니다. 기본 응답을 사용합니다.")
         llm = None
         embeddings = None
     else:
         llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
+            model=settings.LLM_MODEL,
             temperature=0.7,
-            api_key=openai_api_key
+            api_key=openai_api_key,
+            base_url=settings.OPENAI_BASE_URL,
+            timeout=settings.LLM_TIMEOUT,
+            max_retries=settings.LLM_MAX_RETRIES
         )
-        embeddings = OpenAIEmbeddings(
-            api_key=openai_api_key
+        # 같은 텍스트(문서 청크/질문)는 캐시에서 꺼내 API를 다시 부르지 않는다
+        embeddings = CachedEmbeddings(
+            OpenAIEmbeddings(
+                api_key=openai_api_key,
+                base_url=settings.OPENAI_BASE_URL
+            ),
+            settings.EMBEDDING_CACHE_PATH,
+            settings.EMBEDDING_CACHE_SIZE
         )
 except Exception as e:
     logger.error(f"LangChain 모델 초기화 실패: {str(e)}")
@@ -83,15 +103,19 @@ class ChatResponse(BaseModel):
     response: str
     sources: Optional[List[str]] = None
     confidence: Optional[float] = None
+    timings: Optional[Dict[str, float]] = None  # RAG 단계별 시간(ms)
 
 class DocumentUploadRequest(BaseModel):
     content: str
     metadata: Optional[Dict[str, Any]] = None
     company_id: Optional[str] = None
+    document_id: Optional[str] = None  # 같은 ID로 다시 올리면 교체(upsert). 없으면 내용 해시
 
 class DocumentResponse(BaseModel):
     document_id: str
     message: str
+    status: Optional[str] = None       # created | updated | unchanged | deleted
+    chunks: Optional[int] = None
 
 # 기본 프롬프트 템플릿
 DEFAULT_PROMPT = ChatPromptTemplate.from_template(
@@ -114,162 +138,311 @@ if llm:
 else:
     basic_chain = None
 
+CONTEXTUAL_PROMPT = ChatPromptTemplate.from_template(
+    """당신은 기업을 위한 전문적인 AI 어시스턴트입니다.
+    
+    컨텍스트 정보: {context}
+    
+    사용자 질문: {question}
+    
+    위 컨텍스트를 참고하여 답변해주세요. 한국어로 전문적이고 정확한 정보를 제공하세요.
+    
+    답변:"""
+)
+
+RAG_PROMPT = ChatPromptTemplate.from_template(
+    """당신은 기업 문서를 기반으로 답변하는 AI 어시스턴트입니다.
+    
+    검색된 관련 문서:
+    {context}
+    
+    사용자 질문: {question}
+    
+    위 문서를 참고하여 정확하고 유용한 답변을 제공하세요.
+    문서에 없는 정보는 명시적으로 언급하세요.
+    
+    답변:"""
+)
+
+FALLBACK_RESPONSE = "안녕하세요! 현재 AI 서비스가 준비 중입니다. 잠시 후 다시 시도해주세요."
+
+NO_DOCUMENTS_CONTEXT = "관련 문서를 찾을 수 없습니다. 일반적인 조언을 제공합니다."
+
+class ChatCall(NamedTuple):
+    """엔드포인트별 체인/입력과 응답에 붙일 정보 (일반/스트리밍 엔드포인트가 같이 쓴다)"""
+    chain: Any
+    inputs: Dict[str, Any]
+    sources: Optional[List[str]]
+    confidence: float
+    timings: Optional[Dict[str, float]] = None   # RAG만: 검색 단계별 ms (생성 시간은 실행 후 추가)
+
+def _basic_call(request: ChatRequest) -> ChatCall:
+    return ChatCall(basic_chain, {"question": request.message}, None, 0.8)
+
+def _contextual_call(request: ChatRequest) -> ChatCall:
+    # 컨텍스트가 있는 경우 프롬프트 수정
+    if request.context and llm:
+        chain = CONTEXTUAL_PROMPT | llm | StrOutputParser()
+        return ChatCall(chain, {"context": request.context, "question": request.message}, None, 0.85)
+    return ChatCall(basic_chain, {"question": request.message}, None, 0.85)
+
+async def _rag_call(request: ChatRequest, company_id: Optional[str]) -> ChatCall:
+    """회사 컬렉션에서 관련 청크를 검색해 프롬프트에 넣는다 (검색은 LLM 대기열 자리 없이 먼저 수행).
+    company_id는 검증된 회사만 넘긴다 (None이면 문서 검색 없이 일반 답변)"""
+    if not llm:
+        return ChatCall(None, {}, None, 0.5)
+    chain = RAG_PROMPT | llm | StrOutputParser()
+    if company_id is None:
+        rag_stats.unverified += 1
+        if rag_stats.unverified == 1:
+            logger.warning("X-Company-Id 없이 RAG 요청이 들어와 문서 검색을 건너뜁니다 (게이트웨이 AUTH_MODE 확인)")
+    if not embeddings or company_id is None:
+        return ChatCall(chain, {"context": NO_DOCUMENTS_CONTEXT, "question": request.message}, None, 0.5, {})
+    retrieval = await retrieve(company_id, request.message, embeddings)
+    if not retrieval.chunks:
+        return ChatCall(chain, {"context": NO_DOCUMENTS_CONTEXT, "question": request.message},
+                        None, 0.5, retrieval.timings)
+    # 가장 가까운 청크의 코사인 유사도를 신뢰도로
+    confidence = round(min(1.0, max(0.0, retrieval.best_score)), 2)
+    return ChatCall(chain, {"context": retrieval.context, "question": request.message},
+                    retrieval.sources, confidence, retrieval.timings)
+
+def _company_of(http_request: Request) -> str:
+    """LLM 동시 실행 제한용 회사 키. 게이트웨이가 검증한 X-Company-Id만 쓰고
+    (본문의 company_id는 클라이언트가 바꿀 수 있으므로 쓰지 않는다), 없으면 익명 요청이 한 칸을 함께 쓴다"""
+    return http_request.headers.get("x-company-id") or ANONYMOUS_COMPANY
+
+def _verified_company(http_request: Request, company_id: Optional[str], required: bool = True) -> Optional[str]:
+    """벡터 저장소(회사 문서)에 쓸 회사. 게이트웨이가 세션에서 확인해 붙인 X-Company-Id만 신뢰한다.
+    헤더가 없으면 401 (required=False면 company_id를 요청하지 않은 경우 None),
+    본문/쿼리의 company_id가 헤더와 다르면 403"""
+    verified = http_request.headers.get("x-company-id")
+    if not verified:
+        if required or company_id:
+            raise HTTPException(status_code=401, detail="회사 인증이 필요합니다.")
+        return None
+    if company_id and company_id != verified:
+        raise HTTPException(status_code=403, detail="다른 회사의 문서에는 접근할 수 없습니다.")
+    return verified
+
+def _busy(e: LLMBusy) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="요청이 많아 잠시 후 다시 시도해 주세요.",
+        headers={"Retry-After": str(int(e.retry_after))}
+    )
+
+async def _respond(call: ChatCall, company_id: str) -> ChatResponse:
+    """LLM 체인을 비동기로 실행 (스케줄러 자리를 얻은 뒤). 대기열이 가득 차면 503"""
+    if call.chain is None:
+        # OpenAI API 키가 없을 때 기본 응답
+        return ChatResponse(response=FALLBACK_RESPONSE, confidence=0.5)
+    timings = call.timings
+    try:
+        async with llm_scheduler.slot(company_id):
+            started = time.perf_counter()
+            response = await call.chain.ainvoke(call.inputs)
+            generated = time.perf_counter() - started
+    except LLMBusy as e:
+        raise _busy(e)
+    if timings is not None:
+        rag_stats.record("generate", generated)
+        timings = {**timings, "generate_ms": round(generated * 1000, 1)}
+    return ChatResponse(response=response, sources=call.sources, confidence=call.confidence, timings=timings)
+
+async def _events_in_slot(call: ChatCall, company_id: str, started: float):
+    async with llm_scheduler.slot(company_id):
+        # 자리를 얻었음을 알리는 주석 줄 (첫 바이트를 바로 보내 헤더도 함께 나간다)
+        yield ": start\n\n"
+        began = time.perf_counter()
+        async for event in stream_chain(call.chain, call.inputs, call.sources, call.confidence, started,
+                                        call.timings):
+            yield event
+        if call.timings is not None:
+            rag_stats.record("generate", time.perf_counter() - began)
+
+async def _stream(call: ChatCall, company_id: str) -> StreamingResponse:
+    """SSE 토큰 스트림. 대기열 자리는 응답을 시작하기 전에 얻어 두므로 가득 차면 일반 503으로 거절된다"""
+    started = time.perf_counter()
+    if call.chain is None:
+        async def fallback():
+            yield sse_event("token", {"text": FALLBACK_RESPONSE})
+            yield sse_event("done", {"sources": None, "confidence": 0.5, "ttft_ms": None, "total_ms": 0.0})
+        return StreamingResponse(fallback(), media_type=EVENT_STREAM, headers=STREAM_HEADERS)
+    events = _events_in_slot(call, company_id, started)
+    try:
+        first = await events.__anext__()
+    except LLMBusy as e:
+        raise _busy(e)
+
+    async def relay():
+        yield first
+        async for event in events:
+            yield event
+
+    return StreamingResponse(relay(), media_type=EVENT_STREAM, headers=STREAM_HEADERS)
+
+@app.on_event("shutdown")
+async def shutdown():
+    if embeddings:
+        embeddings.close()
+
 @app.get("/health")
 async def health_check():
     """서비스 상태 확인"""
     return {"status": "healthy", "service": "chatbot"}
 
+@app.get("/health/llm")
+async def llm_health():
+    """LLM 스케줄러 상태 (진행/대기 중 호출, 대기 시간, 거절 수)와 스트리밍 TTFT/전체 시간"""
+    return {**llm_scheduler.stats(), "stream": stream_stats.summary()}
+
+@app.get("/health/rag")
+async def rag_health():
+    """RAG 단계별(embed/search/build/generate) 평균/최대 시간과 검색 결과 요약"""
+    return rag_stats.summary()
+
 @app.get("/")
 async def root():
     """루트 엔드포인트"""
     return {"message": "Chatbot Service is running"}
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """기본 채팅 기능"""
     try:
         logger.info(f"Chat request from user: {request.user_id}")
+        return await _respond(_basic_call(request), _company_of(http_request))
         
-        if not basic_chain:
-            # OpenAI API 키가 없을 때 기본 응답
-            return ChatResponse(
-                response="안녕하세요! 현재 AI 서비스가 준비 중입니다. 잠시 후 다시 시도해주세요.",
-                confidence=0.5
-            )
-        
-        # 기본 체인 실행
-        response = basic_chain.invoke({"question": request.message})
-        
-        return ChatResponse(
-            response=response,
-            confidence=0.8
-        )
-        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Chat error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"채팅 처리 중 오류가 발생했습니다: {str(e)}")
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """기본 채팅 - 토큰 스트리밍(SSE)"""
+    logger.info(f"Chat stream request from user: {request.user_id}")
+    return await _stream(_basic_call(request), _company_of(http_request))
+
 @app.post("/chat/contextual", response_model=ChatResponse)
-async def contextual_chat(request: ChatRequest):
+async def contextual_chat(request: ChatRequest, http_request: Request):
     """컨텍스트를 고려한 채팅"""
     try:
         logger.info(f"Contextual chat request from user: {request.user_id}")
+        return await _respond(_contextual_call(request), _company_of(http_request))
         
-        if not llm:
-            return ChatResponse(
-                response="안녕하세요! 현재 AI 서비스가 준비 중입니다. 잠시 후 다시 시도해주세요.",
-                confidence=0.5
-            )
-        
-        # 컨텍스트가 있는 경우 프롬프트 수정
-        if request.context:
-            contextual_prompt = ChatPromptTemplate.from_template(
-                """당신은 기업을 위한 전문적인 AI 어시스턴트입니다.
-                
-                컨텍스트 정보: {context}
-                
-                사용자 질문: {question}
-                
-                위 컨텍스트를 참고하여 답변해주세요. 한국어로 전문적이고 정확한 정보를 제공하세요.
-                
-                답변:"""
-            )
-            chain = contextual_prompt | llm | StrOutputParser()
-            response = chain.invoke({
-                "context": request.context,
-                "question": request.message
-            })
-        else:
-            response = basic_chain.invoke({"question": request.message})
-        
-        return ChatResponse(
-            response=response,
-            confidence=0.85
-        )
-        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Contextual chat error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"컨텍스트 채팅 처리 중 오류가 발생했습니다: {str(e)}")
 
+@app.post("/chat/contextual/stream")
+async def contextual_chat_stream(request: ChatRequest, http_request: Request):
+    """컨텍스트를 고려한 채팅 - 토큰 스트리밍(SSE)"""
+    logger.info(f"Contextual chat stream request from user: {request.user_id}")
+    return await _stream(_contextual_call(request), _company_of(http_request))
+
+text_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=settings.DOCUMENT_CHUNK_SIZE,
+    chunk_overlap=settings.DOCUMENT_CHUNK_OVERLAP
+)
+
 @app.post("/documents/upload", response_model=DocumentResponse)
-async def upload_document(request: DocumentUploadRequest):
-    """문서 업로드 및 벡터화"""
+async def upload_document(request: DocumentUploadRequest, http_request: Request):
+    """문서 업로드 및 벡터화 (회사별 영구 컬렉션에 upsert)"""
     try:
-        logger.info(f"Document upload request for company: {request.company_id}")
+        company_id = _verified_company(http_request, request.company_id)
+        logger.info(f"Document upload request for company: {company_id}")
+        
+        if not embeddings:
+            raise HTTPException(status_code=503, detail="임베딩 서비스가 준비되지 않았습니다.")
         
         # 텍스트 분할
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200
-        )
+        chunks = text_splitter.split_text(request.content)
+        if not chunks:
+            raise HTTPException(status_code=400, detail="문서 내용이 비어 있습니다.")
         
-        documents = text_splitter.split_text(request.content)
+        document_id = request.document_id or f"doc_{content_hash([request.content])[:16]}"
+        status, count = await vector_store.upsert_document(
+            company_id, document_id, chunks, request.metadata, embeddings
+        )
         
-        # 메타데이터 추가
-        docs = [
-            Document(
-                page_content=doc,
-                metadata=request.metadata or {}
-            ) for doc in documents
-        ]
+        if status == "unchanged":
+            message = "내용이 같아 기존 임베딩을 그대로 사용합니다."
+        else:
+            message = f"{count}개의 문서 청크가 성공적으로 업로드되었습니다."
+        return DocumentResponse(document_id=document_id, message=message, status=status, chunks=count)
         
-        # 벡터 스토어 생성 (실제 구현에서는 영구 저장소 사용)
-        vectorstore = Chroma.from_documents(
-            documents=docs,
-            embedding=embeddings
-        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Document upload error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"문서 업로드 중 오류가 발생했습니다: {str(e)}")
+
+@app.delete("/documents/{document_id}", response_model=DocumentResponse)
+async def delete_document(document_id: str, http_request: Request, company_id: Optional[str] = None):
+    """문서 삭제 (회사 컬렉션에서 해당 문서의 청크를 모두 지움)"""
+    try:
+        company_id = _verified_company(http_request, company_id)
+        logger.info(f"Document delete request for company: {company_id}, document: {document_id}")
         
+        deleted = await vector_store.delete_document(company_id, document_id)
+        if not deleted:
+            raise HTTPException(status_code=404, detail="문서를 찾을 수 없습니다.")
         return DocumentResponse(
-            document_id=f"doc_{len(docs)}",
-            message=f"{len(docs)}개의 문서 청크가 성공적으로 업로드되었습니다."
+            document_id=document_id,
+            message=f"{deleted}개의 문서 청크를 삭제했습니다.",
+            status="deleted",
+            chunks=deleted
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Document upload error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"문서 업로드 중 오류가 발생했습니다: {str(e)}")
+        logger.error(f"Document delete error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"문서 삭제 중 오류가 발생했습니다: {str(e)}")
+
+@app.get("/health/vectorstore")
+def vectorstore_health():
+    """벡터 저장소 상태 (열린 회사 컬렉션과 청크 수)"""
+    return vector_store.stats()
+
+@app.get("/health/embeddings")
+def embeddings_health():
+    """임베딩 캐시 적중률(메모리/디스크)과 저장 크기"""
+    if not embeddings:
+        return {"enabled": False}
+    return embeddings.stats()
 
 @app.post("/chat/rag", response_model=ChatResponse)
-async def rag_chat(request: ChatRequest):
+async def rag_chat(request: ChatRequest, http_request: Request):
     """RAG (Retrieval-Augmented Generation) 채팅"""
     try:
         logger.info(f"RAG chat request from user: {request.user_id}")
+        company_id = _verified_company(http_request, request.company_id, required=False)
+        return await _respond(await _rag_call(request, company_id), _company_of(http_request))
         
-        # 실제 구현에서는 사용자/회사별 벡터 스토어에서 검색
-        # 여기서는 기본 응답으로 대체
-        
-        rag_prompt = ChatPromptTemplate.from_template(
-            """당신은 기업 문서를 기반으로 답변하는 AI 어시스턴트입니다.
-            
-            검색된 관련 문서:
-            {context}
-            
-            사용자 질문: {question}
-            
-            위 문서를 참고하여 정확하고 유용한 답변을 제공하세요.
-            문서에 없는 정보는 명시적으로 언급하세요.
-            
-            답변:"""
-        )
-        
-        # 실제 구현에서는 벡터 검색 결과를 context에 넣어야 함
-        mock_context = "관련 문서를 찾을 수 없습니다. 일반적인 조언을 제공합니다."
-        
-        chain = rag_prompt | llm | StrOutputParser()
-        response = chain.invoke({
-            "context": mock_context,
-            "question": request.message
-        })
-        
-        return ChatResponse(
-            response=response,
-            sources=["문서 검색 기능은 개발 중입니다"],
-            confidence=0.7
-        )
-        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"RAG chat error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"RAG 채팅 처리 중 오류가 발생했습니다: {str(e)}")
 
+@app.post("/chat/rag/stream")
+async def rag_chat_stream(request: ChatRequest, http_request: Request):
+    """RAG 채팅 - 토큰 스트리밍(SSE). 마지막 done 이벤트에 sources/confidence"""
+    logger.info(f"RAG chat stream request from user: {request.user_id}")
+    company_id = _verified_company(http_request, request.company_id, required=False)
+    try:
+        call = await _rag_call(request, company_id)
+    except Exception as e:
+        logger.error(f"RAG retrieval error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"문서 검색 중 오류가 발생했습니다: {str(e)}")
+    return await _stream(call, _company_of(http_request))
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """요청 로깅 미들웨어"""
@@ -0,0 +1,151 @@
+"""
+요청 마감 시간(deadline) 전파와 협조적 취소 미들웨어
+
+게이트웨이가 보내는 X-Request-Timeout-Ms(남은 예산, 밀리초)를 받은 시점 기준 마감 시각으로 바꾼다.
+- 이미 마감이 지난 요청은 핸들러를 실행하지 않고 504로 거절
+- 응답 헤더를 보내기 전에 마감이 지나면 핸들러 태스크를 취소하고 504
+- 클라이언트(게이트웨이) 연결이 끊기면 언제든 핸들러 태스크를 취소
+요청 본문은 버퍼링하지 않는다: 핸들러가 읽는 대로 청크를 그대로 넘기고(업로드 스트리밍 유지),
+본문을 다 읽은 뒤부터 미들웨어가 receive로 연결 종료를 감시한다 (본문을 읽는 중의 종료는 핸들러가 받는 메시지로 감지).
+동기 함수(스레드풀)나 이벤트 루프를 막는 호출은 취소되지 않으므로 async 호출로 바꿔야 효과가 있다.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+logger = logging.getLogger("deadline")
+
+DEADLINE_HEADER = b"x-request-timeout-ms"
+# 헤더가 없을 때 적용할 기본 예산(초). 0이면 마감 없음 (연결 종료 감시만)
+DEFAULT_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "0"))
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+def remaining() -> Optional[float]:
+    """현재 요청의 남은 시간(초). 마감이 없으면 None (하위 호출 timeout 계산용)"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _budget(scope) -> Optional[float]:
+    for name, value in scope.get("headers", []):
+        if name == DEADLINE_HEADER:
+            try:
+                return int(value) / 1000
+            except ValueError:
+                return None
+    return DEFAULT_TIMEOUT or None
+
+
+def _has_body(scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == b"transfer-encoding":
+            return True
+        if name == b"content-length":
+            return value.strip() not in (b"", b"0")
+    return False
+
+
+async def _send_timeout(send, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 504,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class DeadlineMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget = _budget(scope)
+        if budget is not None and budget <= 0:
+            logger.warning(f"⏱️ 마감이 지난 요청 거절: {scope['method']} {scope['path']}")
+            await _send_timeout(send, "request deadline already exceeded")
+            return
+        deadline = time.monotonic() + budget if budget is not None else None
+
+        body_done = asyncio.Event()
+        disconnected = asyncio.Event()
+        first = None
+        if not _has_body(scope):
+            # 본문이 없으면 빈 메시지 하나만 미리 받아 두고 바로 연결 종료 감시를 시작한다
+            first = await receive()
+            if first["type"] == "http.disconnect":
+                return
+            body_done.set()
+
+        async def app_receive():
+            nonlocal first
+            if first is not None:
+                message, first = first, None
+                return message
+            if body_done.is_set():
+                # 본문을 다 읽은 뒤의 receive는 연결 종료를 기다리는 용도 (receive는 감시 태스크만 호출)
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+            elif not message.get("more_body"):
+                body_done.set()
+            return message
+
+        started = False
+
+        async def app_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        async def watch_disconnect():
+            await body_done.wait()
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                    return
+
+        token = _deadline.set(deadline)
+        try:
+            handler = asyncio.ensure_future(self.app(scope, app_receive, app_send))
+        finally:
+            _deadline.reset(token)
+        watcher = asyncio.ensure_future(watch_disconnect())
+        gone = asyncio.ensure_future(disconnected.wait())
+        try:
+            while True:
+                timeout = None if deadline is None or started else max(0.0, deadline - time.monotonic())
+                done, _ = await asyncio.wait({handler, gone}, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if handler in done:
+                    handler.result()
+                    return
+                if gone in done:
+                    logger.info(f"🔌 클라이언트 연결 종료, 처리 취소: {scope['method']} {scope['path']}")
+                    break
+                if not started:
+                    logger.warning(f"⏱️ 마감 초과, 처리 취소: {scope['method']} {scope['path']} ({budget:.2f}s)")
+                    handler.cancel()
+                    await asyncio.gather(handler, return_exceptions=True)
+                    await _send_timeout(send, "request deadline exceeded")
+                    return
+        finally:
+            watcher.cancel()
+            gone.cancel()
+            if not handler.done():
+                handler.cancel()
+                await asyncio.gather(handler, return_exceptions=True)
@@ -7,6 +7,14 @@ if os.getenv("RAILWAY_ENVIRONMENT") != "true":
 
 class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    # ---- DB 커넥션 풀 (프로세스당 엔진 1개) ----
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))      # 커넥션 획득 대기 상한(초)
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))      # 이보다 오래된 커넥션은 다시 연결(초)
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("true", "1", "yes", "on")
+    DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "2"))          # 시작 시 미리 열어 둘 커넥션 수
+    DB_ASYNC = os.getenv("DB_ASYNC", "true").lower() in ("true", "1", "yes", "on")  # async 라우트에서 AsyncEngine(asyncpg) 사용
     ALLOW_ORIGINS = [
         "https://eripotter.com",
         "https://www.eripotter.com",